@@ -0,0 +1,474 @@
+import hashlib
+import os
+import zlib
+from collections import deque
+from typing import Iterator, List, Optional, Tuple, Union
+from src.core.registry import create_compressor
+from src.core.combined import CombinedCompressor
+from src.core.estimator import AUTO_ALGORITHM, resolve_algorithm
+from src.models.archive_models import ArchiveEntry, ArchiveBlock, StoredRange
+from src.utils.format_detector import detect_format_from_header
+from src.utils.console import log
+from src.utils.parallel import parallel_map
+from src.utils.io_pipeline import WriteBehind, prefetch
+from src.utils.zero_copy import copy_range, read_range
+from src.utils.checksum import crc32_combine
+from src.utils.cdc import cut_point, chunk_limits
+
+ARCHIVE_MAGIC = b"ARCHIVE\0"  # Магическое число + версия
+# Версия - набор флагов. Дедупликация: после каталога идет последовательность
+# номеров блоков. Контрольные суммы: CRC32 каждого блока в каталоге и CRC32
+# всего логического потока в конце каталога
+ARCHIVE_FLAG_DEDUP = 1
+ARCHIVE_FLAG_CHECKSUMS = 2
+ARCHIVE_MAX_VERSION = ARCHIVE_FLAG_DEDUP | ARCHIVE_FLAG_CHECKSUMS
+
+
+def _compress_block(algorithm: str, data: bytes, filters=None) -> bytes:
+    if filters:
+        from src.core.filters import FilterCompressor
+        return FilterCompressor(algorithm=algorithm, filters=filters).compress_bytes(data)
+    return create_compressor(algorithm).compress_bytes(data)
+
+
+def _decompress_block(data):
+    if isinstance(data, StoredRange):
+        return data  # Копируется из архива при записи файлов
+    algorithm = detect_format_from_header(data[:8])
+    if algorithm is None or algorithm == 'archive':
+        raise ValueError("Неизвестный формат блока архива")
+    return create_compressor(algorithm).decompress_bytes(data)
+
+
+def _checksum_block(data) -> Tuple[int, Union[int, StoredRange, None], Optional[str]]:
+    """Размер и CRC32 распакованного блока или текст ошибки; для несжатого блока вместо CRC32 - его StoredRange."""
+    try:
+        decoded_data = _decompress_block(data)
+    except Exception as e:
+        return 0, None, str(e) or type(e).__name__
+    if isinstance(decoded_data, StoredRange):
+        return len(decoded_data), decoded_data, None
+    return len(decoded_data), zlib.crc32(decoded_data), None
+
+
+class ArchiveCompressor:
+    """
+    Архив из многих файлов с центральным каталогом в конце.
+
+    Все файлы склеиваются в один логический поток, который режется на блоки
+    по block_size байтов. Мелкие файлы попадают в общие блоки и делят таблицы
+    Хаффмана и историю LZ77, блоки сжимаются параллельно в пуле процессов,
+    а чтение и запись идут в фоновых потоках одновременно со сжатием.
+
+    С dedup поток режется по содержимому (FastCDC, в среднем block_size),
+    каждый уникальный фрагмент сжимается и хранится один раз, а повторы
+    записываются в последовательность блоков ссылкой на уже сохраненный.
+    """
+
+    def __init__(self, algorithm='combined', block_size=1 << 16, workers=None, filters=None, dedup=False):
+        self.algorithm = algorithm
+        self.filters = filters
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self.dedup = dedup
+        self.block_count = 0
+        self.duplicate_count = 0
+
+    def pack(self, input_dir: str, output_path: str):
+        try:
+            if not os.path.isdir(input_dir):
+                raise ValueError(f"{input_dir} не является директорией")
+
+            files = self._collect_files(input_dir)
+            log(f"Архив: Найдено {len(files)} файлов в {input_dir}")
+
+            entries = []
+            blocks = []
+            sequence = []  # Номера блоков в порядке логического потока
+            fingerprints = {}
+            self.duplicate_count = 0
+            duplicate_size = 0
+
+            data_crc = 0
+            version = ARCHIVE_FLAG_CHECKSUMS | (ARCHIVE_FLAG_DEDUP if self.dedup else 0)
+
+            with open(output_path, 'wb') as f:
+                f.write(ARCHIVE_MAGIC[:-1] + bytes([version]))
+
+                original_sizes = deque()
+
+                def tasks():
+                    nonlocal duplicate_size, data_crc
+                    for data in self._read_blocks(input_dir, files, entries):
+                        data_crc = zlib.crc32(data, data_crc)
+                        if self.dedup:
+                            fingerprint = hashlib.sha256(data).digest()
+                            block_index = fingerprints.get(fingerprint)
+                            if block_index is not None:
+                                # Повтор не проходит через движки сжатия
+                                sequence.append(block_index)
+                                self.duplicate_count += 1
+                                duplicate_size += len(data)
+                                continue
+                            fingerprints[fingerprint] = len(fingerprints)
+                            sequence.append(fingerprints[fingerprint])
+
+                        if self.algorithm == AUTO_ALGORITHM:
+                            self.algorithm = resolve_algorithm(self.algorithm, data)
+                            log(f"Архив: Выбран алгоритм {self.algorithm}")
+                        original_sizes.append((len(data), zlib.crc32(data)))
+                        yield self.algorithm, data, self.filters
+
+                with WriteBehind(f, position=f.tell()) as writer:
+                    for compressed_data in self._parallel_map(_compress_block, prefetch(tasks())):
+                        original_size, block_crc = original_sizes.popleft()
+                        blocks.append(ArchiveBlock(writer.tell(), len(compressed_data), original_size, block_crc))
+                        writer.write(compressed_data)
+
+                directory_offset = f.tell()
+                self._write_directory(f, blocks, entries)
+                if self.dedup:
+                    self._write_sequence(f, sequence)
+                f.write(data_crc.to_bytes(4, 'big'))
+                f.write(directory_offset.to_bytes(8, 'big'))
+
+            self.block_count = len(blocks)
+            log(f"Архив: Упаковано {len(entries)} файлов в {len(blocks)} блоков")
+            if self.dedup:
+                log(f"Архив: {self.duplicate_count} повторяющихся фрагментов ({duplicate_size} байтов) "
+                    f"сохранены ссылками")
+
+        except Exception as e:
+            log(f"Архив: Ошибка упаковки: {e}")
+            raise
+
+    def unpack(self, input_path: str, output_dir: str):
+        try:
+            with open(input_path, 'rb') as f:
+                blocks, entries, sequence, data_crc = self.read_index(f)
+                self.block_count = len(blocks)
+                log(f"Архив: {len(entries)} файлов в {len(blocks)} блоках")
+
+                os.makedirs(output_dir, exist_ok=True)
+
+                decoded_blocks = self._decode_sequence(f, blocks, sequence)
+                self._write_entries(f, output_dir, [blocks[i] for i in sequence], entries, decoded_blocks)
+                if data_crc is not None and self._data_crc != data_crc:
+                    raise ValueError("Архив поврежден: контрольная сумма всех данных не совпадает")
+
+            log(f"Архив: Распаковано {len(entries)} файлов в {output_dir}")
+
+        except Exception as e:
+            log(f"Архив: Ошибка распаковки: {e}")
+            raise
+
+    def _collect_files(self, input_dir: str) -> List[str]:
+        files = []
+        for root, dirs, names in os.walk(input_dir):
+            dirs.sort()
+            for name in names:
+                full_path = os.path.join(root, name)
+                if os.path.isfile(full_path):
+                    files.append(os.path.relpath(full_path, input_dir).replace(os.sep, '/'))
+
+        # Файлы одного типа кладем рядом, чтобы они попадали в общие блоки
+        files.sort(key=lambda path: (os.path.splitext(path)[1], path))
+        return files
+
+    def verify(self, input_path: str) -> int:
+        """
+        Распаковывает все блоки в пуле процессов без записи файлов и сверяет
+        размеры и контрольные суммы. Возвращает размер данных, при первой
+        ошибке бросает ValueError с номером блока.
+        """
+        with open(input_path, 'rb') as f:
+            blocks, entries, sequence, data_crc = self.read_index(f)
+            self.block_count = len(blocks)
+            log(f"Проверка архива: {len(entries)} файлов в {len(blocks)} блоках")
+
+            checksums = []
+            tasks = ((self._read_block(f, block),) for block in blocks)
+            results = self._parallel_map(_checksum_block, prefetch(tasks))
+            for index, (block, (size, crc, error)) in enumerate(zip(blocks, results)):
+                if isinstance(crc, StoredRange):
+                    stored, crc = crc, 0
+                    for chunk in self._block_chunks(f, stored):
+                        crc = zlib.crc32(chunk, crc)
+                if error is None and size != block.original_size:
+                    error = f"распакован в {size} байтов, ожидалось {block.original_size}"
+                elif error is None and block.crc is not None and crc != block.crc:
+                    error = "контрольная сумма не совпадает"
+                if error is not None:
+                    raise ValueError(f"Архив поврежден: блок {index}: {error}")
+                checksums.append((crc, size))
+
+        total_size = sum(checksums[block_index][1] for block_index in sequence)
+        if total_size != sum(entry.size for entry in entries):
+            raise ValueError("Архив поврежден: размер данных не совпадает с каталогом")
+        if data_crc is not None:
+            total_crc = 0
+            for block_index in sequence:
+                total_crc = crc32_combine(total_crc, *checksums[block_index])
+            if total_crc != data_crc:
+                raise ValueError("Архив поврежден: контрольная сумма всех данных не совпадает")
+        return total_size
+
+    def read_index(self, f):
+        """Читает каталог: блоки, файлы, последовательность блоков и CRC32 всех данных (или None)."""
+        magic = f.read(len(ARCHIVE_MAGIC))
+        if magic[:-1] != ARCHIVE_MAGIC[:-1] or not magic or magic[-1] > ARCHIVE_MAX_VERSION:
+            raise ValueError("Не валидный архив")
+        version = magic[-1]
+        checksums = bool(version & ARCHIVE_FLAG_CHECKSUMS)
+
+        blocks, entries = self._read_directory(f, checksums)
+        if version & ARCHIVE_FLAG_DEDUP:
+            sequence = self._read_sequence(f, len(blocks))
+        else:
+            sequence = list(range(len(blocks)))
+        data_crc = int.from_bytes(f.read(4), 'big') if checksums else None
+        return blocks, entries, sequence, data_crc
+
+    def _read_blocks(self, input_dir: str, files: List[str], entries: List[ArchiveEntry]) -> Iterator[bytes]:
+        if self.dedup:
+            yield from self._read_chunks(input_dir, files, entries)
+            return
+
+        buffer = bytearray()
+        position = 0
+
+        for path in files:
+            entry = ArchiveEntry(path, position, 0)
+            with open(os.path.join(input_dir, path), 'rb') as f:
+                while True:
+                    chunk = f.read(self.block_size)
+                    if not chunk:
+                        break
+                    buffer.extend(chunk)
+                    entry.size += len(chunk)
+
+                    while len(buffer) >= self.block_size:
+                        yield bytes(buffer[:self.block_size])
+                        del buffer[:self.block_size]
+
+            position += entry.size
+            entries.append(entry)
+
+        if buffer:
+            yield bytes(buffer)
+
+    def _read_chunks(self, input_dir: str, files: List[str], entries: List[ArchiveEntry]) -> Iterator[bytes]:
+        """Режет логический поток по содержимому; граница ищется, когда накоплен максимум фрагмента."""
+        _, max_size = chunk_limits(self.block_size)
+        buffer = bytearray()
+        position = 0
+
+        def cut_chunks(final: bool):
+            view = memoryview(buffer)
+            start = 0
+            while len(buffer) - start >= max_size or (final and start < len(buffer)):
+                length = cut_point(view[start:], self.block_size)
+                yield bytes(view[start:start + length])
+                start += length
+            view.release()
+            del buffer[:start]
+
+        for path in files:
+            entry = ArchiveEntry(path, position, 0)
+            with open(os.path.join(input_dir, path), 'rb') as f:
+                while True:
+                    chunk = f.read(max_size)
+                    if not chunk:
+                        break
+                    buffer.extend(chunk)
+                    entry.size += len(chunk)
+                    yield from cut_chunks(final=False)
+
+            position += entry.size
+            entries.append(entry)
+
+        yield from cut_chunks(final=True)
+
+    def _parallel_map(self, function, tasks) -> Iterator:
+        return parallel_map(function, tasks, self.workers)
+
+    def _write_directory(self, f, blocks: List[ArchiveBlock], entries: List[ArchiveEntry]):
+        f.write(len(blocks).to_bytes(4, 'big'))
+        for block in blocks:
+            f.write(block.offset.to_bytes(8, 'big'))
+            f.write(block.compressed_size.to_bytes(4, 'big'))
+            f.write(block.original_size.to_bytes(4, 'big'))
+            f.write(block.crc.to_bytes(4, 'big'))
+
+        f.write(len(entries).to_bytes(4, 'big'))
+        for entry in entries:
+            path_data = entry.path.encode('utf-8')
+            f.write(len(path_data).to_bytes(2, 'big'))
+            f.write(path_data)
+            f.write(entry.offset.to_bytes(8, 'big'))
+            f.write(entry.size.to_bytes(8, 'big'))
+
+    def _write_sequence(self, f, sequence: List[int]):
+        f.write(len(sequence).to_bytes(4, 'big'))
+        for block_index in sequence:
+            f.write(block_index.to_bytes(4, 'big'))
+
+    def _decode_sequence(self, f, blocks: List[ArchiveBlock], sequence: List[int]) -> Iterator:
+        """
+        Распаковывает каждый блок один раз; блок, на который есть еще ссылки,
+        хранится в памяти до последней из них.
+        """
+        remaining = {}
+        first_uses = []
+        for block_index in sequence:
+            if block_index not in remaining:
+                first_uses.append(block_index)
+            remaining[block_index] = remaining.get(block_index, 0) + 1
+
+        # Блоки читаются в фоновом потоке; остальные чтения архива идут через pread и ему не мешают
+        tasks = ((self._read_block(f, blocks[block_index]),) for block_index in first_uses)
+        decoded_blocks = self._parallel_map(_decompress_block, prefetch(tasks))
+        cache = {}
+        self._data_crc = 0
+        for block_index in sequence:
+            data = cache.get(block_index)
+            if data is None:
+                data = next(decoded_blocks)
+                block_crc = 0
+                for chunk in self._block_chunks(f, data):
+                    block_crc = zlib.crc32(chunk, block_crc)
+                    self._data_crc = zlib.crc32(chunk, self._data_crc)
+                if blocks[block_index].crc is not None and block_crc != blocks[block_index].crc:
+                    raise ValueError(f"Архив поврежден: контрольная сумма блока {block_index} не совпадает")
+            else:
+                for chunk in self._block_chunks(f, data):
+                    self._data_crc = zlib.crc32(chunk, self._data_crc)
+            remaining[block_index] -= 1
+            if remaining[block_index]:
+                cache[block_index] = data
+            else:
+                cache.pop(block_index, None)
+            yield data
+
+    @staticmethod
+    def _block_chunks(f, data) -> Iterator[bytes]:
+        """Данные блока частями; несжатый блок читается из архива без загрузки целиком."""
+        if isinstance(data, StoredRange):
+            yield from read_range(f, data.offset, data.size)
+        else:
+            yield data
+
+    def _read_sequence(self, f, block_count: int) -> List[int]:
+        # Последовательность лежит сразу за каталогом, то есть там, где остановилось его чтение
+        sequence = []
+        for _ in range(int.from_bytes(f.read(4), 'big')):
+            block_index = int.from_bytes(f.read(4), 'big')
+            if block_index >= block_count:
+                raise ValueError("Архив поврежден: ссылка на несуществующий блок")
+            sequence.append(block_index)
+        return sequence
+
+    def _read_directory(self, f, checksums: bool) -> Tuple[List[ArchiveBlock], List[ArchiveEntry]]:
+        f.seek(-8, os.SEEK_END)
+        directory_offset = int.from_bytes(f.read(8), 'big')
+        f.seek(directory_offset)
+
+        blocks = []
+        num_blocks = int.from_bytes(f.read(4), 'big')
+        for _ in range(num_blocks):
+            offset = int.from_bytes(f.read(8), 'big')
+            compressed_size = int.from_bytes(f.read(4), 'big')
+            original_size = int.from_bytes(f.read(4), 'big')
+            crc = int.from_bytes(f.read(4), 'big') if checksums else None
+            blocks.append(ArchiveBlock(offset, compressed_size, original_size, crc))
+
+        entries = []
+        num_entries = int.from_bytes(f.read(4), 'big')
+        for _ in range(num_entries):
+            path_length = int.from_bytes(f.read(2), 'big')
+            path = f.read(path_length).decode('utf-8')
+            offset = int.from_bytes(f.read(8), 'big')
+            size = int.from_bytes(f.read(8), 'big')
+            entries.append(ArchiveEntry(path, offset, size))
+
+        return blocks, entries
+
+    def _read_block(self, f, block: ArchiveBlock):
+        """Возвращает сжатый блок или StoredRange для несжатого."""
+        f.seek(block.offset)
+        header_size = CombinedCompressor.STORED_HEADER_SIZE
+        data = f.read(min(block.compressed_size, header_size))
+        if data.startswith(CombinedCompressor.STORED_MAGIC) and len(data) == header_size:
+            size = int.from_bytes(data[len(CombinedCompressor.STORED_MAGIC):], 'big')
+            if size != block.compressed_size - header_size:
+                raise ValueError("Архив поврежден: неверный размер несжатого блока")
+            return StoredRange(block.offset + header_size, size)
+
+        data += f.read(block.compressed_size - len(data))
+        if len(data) != block.compressed_size:
+            raise ValueError("Архив поврежден: блок обрезан")
+        return data
+
+    def _write_entries(self, archive_f, output_dir: str, blocks: List[ArchiveBlock],
+                       entries: List[ArchiveEntry], decoded_blocks: Iterator):
+        with WriteBehind() as writer:
+            self._write_entry_data(writer, archive_f, output_dir, blocks, entries, decoded_blocks)
+
+    def _write_entry_data(self, writer: WriteBehind, archive_f, output_dir: str, blocks: List[ArchiveBlock],
+                          entries: List[ArchiveEntry], decoded_blocks: Iterator):
+        # Файлы открываются здесь, а запись и закрытие выполняет поток writer по порядку
+        entry_index = 0
+        out_file = None
+        written = 0
+        block_start = 0
+
+        for block, data in zip(blocks, decoded_blocks):
+            if len(data) != block.original_size:
+                raise ValueError(f"Архив поврежден: блок распакован в {len(data)} байтов, "
+                                 f"ожидалось {block.original_size}")
+            block_end = block_start + len(data)
+
+            while entry_index < len(entries):
+                entry = entries[entry_index]
+                start = entry.offset + written
+                if entry.size and start >= block_end:
+                    break
+
+                if out_file is None:
+                    out_file = open(self._output_path(output_dir, entry.path), 'wb')
+
+                end = min(entry.offset + entry.size, block_end)
+                if isinstance(data, StoredRange):
+                    writer.submit(copy_range, archive_f, out_file, data.offset + start - block_start, end - start)
+                else:
+                    writer.submit(out_file.write, data[start - block_start:end - block_start])
+                written += end - start
+
+                if written < entry.size:
+                    break
+
+                writer.submit(out_file.close)
+                out_file = None
+                written = 0
+                entry_index += 1
+
+            block_start = block_end
+
+        if out_file is not None:
+            writer.submit(out_file.close)
+            raise ValueError("Архив поврежден: данные файлов обрезаны")
+
+        # Пустые файлы в конце потока не попадают ни в один блок
+        for entry in entries[entry_index:]:
+            if entry.size:
+                raise ValueError("Архив поврежден: данные файлов обрезаны")
+            open(self._output_path(output_dir, entry.path), 'wb').close()
+
+    def _output_path(self, output_dir: str, path: str) -> str:
+        relative_path = os.path.normpath(path)
+        if os.path.isabs(relative_path) or relative_path.split(os.sep)[0] == '..':
+            raise ValueError(f"Недопустимый путь в архиве: {path}")
+
+        output_path = os.path.join(output_dir, relative_path)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        return output_path
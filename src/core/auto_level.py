@@ -0,0 +1,149 @@
+"""
+Подбор уровня сжатия под целевую скорость (--target-mbps) или срок (--deadline).
+
+Уровни упорядочены от самого быстрого (блок без сжатия) к самым медленным:
+меняются алгоритм, энтропийный кодер и глубина поиска совпадений LZ77.
+Перед каждым блоком LevelController вычисляет скорость, нужную, чтобы
+уложиться в цель с учетом уже потраченного времени, и выбирает уровень с
+лучшим ожидаемым сжатием среди тех, что успевают. После блока скорость и
+степень сжатия уровня обновляются скользящим средним, а отношение замеренной
+скорости к ожидаемой переносится на еще не пробованные уровни. Кадры потока
+независимы и несут свой формат, поэтому уровень меняется от блока к блоку
+без изменений в распаковке.
+"""
+import time
+from typing import Dict, Optional
+from src.core.combined import CombinedCompressor
+from src.core.registry import create_compressor
+from src.models.level_models import CompressionLevel, LevelMeasurement
+
+# Ожидаемые скорость и степень сжатия - замеры на текстовом блоке 64 КиБ
+LEVELS = (
+    CompressionLevel('store', None, speed=1e9, ratio=1.0),
+    CompressionLevel('huffman', 'huffman', speed=6.5e6, ratio=0.50),
+    CompressionLevel('fse', 'fse', speed=2.7e6, ratio=0.50),
+    CompressionLevel('combined:4', 'combined', max_chain=4, speed=1.0e6, ratio=0.46),
+    CompressionLevel('bwt', 'bwt', speed=5.0e5, ratio=0.21),
+    CompressionLevel('combined:16', 'combined', max_chain=16, speed=5.0e5, ratio=0.40),
+    CompressionLevel('combined:64', 'combined', max_chain=64, speed=2.3e5, ratio=0.40),
+    CompressionLevel('combined', 'combined', speed=7.0e4, ratio=0.34),
+    CompressionLevel('combined-fse', 'combined-fse', speed=6.0e4, ratio=0.33),
+)
+
+SMOOTHING = 0.3  # Вес нового замера в скользящем среднем
+HEADROOM = 1.2  # Запас скорости: замеры на разных данных разбросаны
+# Каждый EXPLORE_INTERVAL-й блок сжимается наименее замеренным из успевающих уровней:
+# ожидаемая степень сжатия из таблицы может не подходить к данным
+EXPLORE_INTERVAL = 8
+
+
+class StoredCompressor:
+    """Блок без сжатия в формате NOCOMPR, который распаковывает CombinedCompressor."""
+
+    def compress_bytes(self, data: bytes) -> bytes:
+        return CombinedCompressor.STORED_MAGIC + len(data).to_bytes(4, 'big') + data
+
+
+def create_level_compressor(level: CompressionLevel):
+    if level.algorithm is None:
+        return StoredCompressor()
+    compressor = create_compressor(level.algorithm)
+    if level.max_chain is not None:
+        compressor.lz77.max_chain = level.max_chain
+    if level.algorithm == 'huffman':
+        compressor.reuse_tables = True  # Уровень кодирует кадры одного потока по порядку
+    return compressor
+
+
+class LevelController:
+    def __init__(self, target_rate: Optional[float] = None, deadline: Optional[float] = None,
+                 total_size: Optional[int] = None):
+        """target_rate - байтов в секунду; deadline - секунд на все total_size байтов."""
+        if (target_rate is None) == (deadline is None):
+            raise ValueError("Нужна либо целевая скорость, либо срок")
+        if deadline is not None and total_size is None:
+            raise ValueError("Срок требует известного размера входных данных (файла, а не канала)")
+        if (target_rate is not None and target_rate <= 0) or (deadline is not None and deadline <= 0):
+            raise ValueError("Целевая скорость и срок должны быть положительными")
+        self.target_rate = target_rate
+        self.deadline = deadline
+        self.total_size = total_size
+        self.processed = 0
+        self.measurements: Dict[str, LevelMeasurement] = {}
+        self._speed_scale = 1.0  # Замеренная скорость относительно ожидаемой на этой машине
+        self._compressors = {}
+        self._blocks = 0
+        self._start = time.perf_counter()
+
+    def required_rate(self, block_size: int) -> float:
+        """Скорость сжатия следующего блока, при которой цель еще достижима."""
+        elapsed = time.perf_counter() - self._start
+        if self.deadline is not None:
+            remaining_time = self.deadline - elapsed
+            remaining_size = max(self.total_size - self.processed, block_size)
+            return remaining_size / remaining_time if remaining_time > 0 else float('inf')
+        # Отставание от целевой скорости догоняется на следующем блоке, запас - тратится на сжатие
+        allowance = (self.processed + block_size) / self.target_rate - elapsed
+        return block_size / allowance if allowance > 0 else float('inf')
+
+    def expected(self, level: CompressionLevel):
+        measurement = self.measurements.get(level.name)
+        if measurement is not None:
+            return measurement.speed, measurement.ratio
+        return level.speed * self._speed_scale, level.ratio
+
+    def choose(self, block_size: int) -> CompressionLevel:
+        required = self.required_rate(block_size) * HEADROOM
+        feasible = [level for level in LEVELS if self.expected(level)[0] >= required]
+        if not feasible:
+            return LEVELS[0]
+        self._blocks += 1
+        explore = [level for level in feasible if level.algorithm is not None]
+        if self._blocks % EXPLORE_INTERVAL == 0 and explore:
+            return min(explore, key=lambda level: (self._measured_blocks(level), level.ratio))
+        return min(feasible, key=lambda level: self.expected(level)[1])
+
+    def _measured_blocks(self, level: CompressionLevel) -> int:
+        measurement = self.measurements.get(level.name)
+        return measurement.blocks if measurement is not None else 0
+
+    def compressor(self, level: CompressionLevel):
+        compressor = self._compressors.get(level.name)
+        if compressor is None:
+            compressor = self._compressors[level.name] = create_level_compressor(level)
+        return compressor
+
+    def record(self, level: CompressionLevel, original_size: int, compressed_size: int, seconds: float):
+        self.processed += original_size
+        if not original_size:
+            return
+        speed = original_size / max(seconds, 1e-6)
+        ratio = compressed_size / original_size
+        measurement = self.measurements.get(level.name)
+        if measurement is None:
+            measurement = self.measurements[level.name] = LevelMeasurement(speed, ratio)
+        else:
+            measurement.speed += SMOOTHING * (speed - measurement.speed)
+            measurement.ratio += SMOOTHING * (ratio - measurement.ratio)
+        measurement.blocks += 1
+        if level.algorithm is not None:
+            self._speed_scale += SMOOTHING * (speed / level.speed - self._speed_scale)
+
+    def compress_block(self, data: bytes) -> bytes:
+        level = self.choose(len(data))
+        start = time.perf_counter()
+        compressed_data = self.compressor(level).compress_bytes(data)
+        self.record(level, len(data), len(compressed_data), time.perf_counter() - start)
+        return compressed_data
+
+    def dominant_level(self) -> Optional[str]:
+        """Уровень, сжавший больше всего блоков (для статистики задания)."""
+        if not self.measurements:
+            return None
+        return max(self.measurements, key=lambda name: self.measurements[name].blocks)
+
+    def report(self) -> str:
+        levels = ', '.join(f"{name} x{measurement.blocks}" for name, measurement in self.measurements.items())
+        elapsed = time.perf_counter() - self._start
+        rate = self.processed / elapsed / 1e6 if elapsed > 0 else 0.0
+        return f"Уровни: {levels}; {rate:.2f} МБ/с"
@@ -0,0 +1,269 @@
+import asyncio
+import io
+import json
+import os
+import shlex
+import signal
+import stat
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional
+from src.core.registry import create_compressor
+from src.core.estimator import resolve_algorithm
+from src.core.segments import decompress_segments_bytes
+from src.models.batch_models import BatchJob, BatchResult
+from src.utils.format_detector import detect_format_from_header
+from src.utils.console import log, is_quiet, set_quiet
+from src.utils.result_cache import hash_bytes, compression_params
+from src.utils.checksum import add_checksum, decompress_verified
+
+ACTIONS = ('compress', 'decompress')
+
+# Компрессоры, созданные один раз на процесс пула и переиспользуемые между задачами
+_worker_compressors = {}
+
+
+def _process_data(action: str, algorithm: str, data: bytes):
+    """Возвращает результат и затраченное процессорное время рабочего процесса."""
+    cpu_start = time.process_time()
+    if action == 'decompress':
+        result = decompress_segments_bytes(data)
+        if result is not None:
+            return result, time.process_time() - cpu_start
+        algorithm = detect_format_from_header(data[:8])
+        if algorithm is None:
+            raise ValueError("Формат не определен")
+        if algorithm == 'stream':
+            return _decompress_stream_data(data), time.process_time() - cpu_start
+        if algorithm == 'archive':
+            raise ValueError("Архив распаковывается действием unpack, а не в пакетном режиме")
+        if algorithm == 'patch':
+            raise ValueError("Патч распаковывается только с опорным файлом (--ref), а не в пакетном режиме")
+
+    if action == 'compress':
+        algorithm = resolve_algorithm(algorithm, data)
+
+    compressor = _worker_compressors.get(algorithm)
+    if compressor is None:
+        compressor = create_compressor(algorithm)
+        _worker_compressors[algorithm] = compressor
+
+    if action == 'compress':
+        result = add_checksum(compressor.compress_bytes(data), data)
+    else:
+        result = decompress_verified(compressor, data)
+    return result, time.process_time() - cpu_start
+
+
+def _decompress_stream_data(data: bytes) -> bytes:
+    from src.core.stream import StreamCompressor
+
+    output = io.BytesIO()
+    StreamCompressor().decompress_stream(io.BytesIO(data), output)
+    return output.getvalue()
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _socket_inode(path: str) -> Optional[int]:
+    """Inode сокета по пути; None, если пути нет или там не сокет."""
+    try:
+        status = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    return status.st_ino if stat.S_ISSOCK(status.st_mode) else None
+
+
+def _remove_stale_socket(path: str):
+    """Удаляет сокет, оставшийся от прошлого запуска; другой файл по пути не трогается."""
+    if _socket_inode(path) is not None:
+        os.remove(path)
+    elif os.path.lexists(path):
+        raise ValueError(f"Путь {path} занят и не является сокетом")
+
+
+def default_output_path(action: str, input_path: str) -> str:
+    if action == 'compress':
+        return input_path + '.compressed'
+    if input_path.endswith('.compressed'):
+        return input_path[:-11] + '.decompressed'
+    return input_path + '.decompressed'
+
+
+def parse_job_line(line: str) -> Optional[BatchJob]:
+    """Строка списка: `<compress|decompress> <вход> [выход]`, пути можно брать в кавычки."""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    parts = shlex.split(line)
+    if parts[0] not in ACTIONS or len(parts) not in (2, 3):
+        raise ValueError(f"Неверная строка задания: {line}")
+    return BatchJob(parts[0], parts[1], parts[2] if len(parts) == 3 else None)
+
+
+def load_job_list(path: str) -> List[BatchJob]:
+    jobs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            job = parse_job_line(line)
+            if job is not None:
+                jobs.append(job)
+    return jobs
+
+
+class BatchService:
+    """
+    Долгоживущий пакетный режим: файлы читаются и пишутся в asyncio,
+    сжатие выполняется в пуле процессов с прогретыми компрессорами.
+
+    Число одновременно обрабатываемых заданий ограничено concurrency,
+    очередь заданий ограничена тем же числом, что дает обратное давление.
+    """
+
+    def __init__(self, algorithm='combined', workers=None, concurrency=None, cache=None):
+        self.algorithm = algorithm
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency or self.workers * 2
+        self.cache = cache  # ResultCache для результатов сжатия или None
+        self._executor = None
+
+    async def __aenter__(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=set_quiet,
+                                             initargs=(is_quiet(),))
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def run_job(self, job: BatchJob) -> BatchResult:
+        loop = asyncio.get_running_loop()
+        output_path = job.output_path or default_output_path(job.action, job.input_path)
+        wall_start = time.perf_counter()
+
+        try:
+            if job.action not in ACTIONS:
+                raise ValueError(f"Неизвестное действие: {job.action}")
+
+            data = await asyncio.to_thread(_read_file, job.input_path)
+            algorithm = job.algorithm or self.algorithm
+
+            cache_key = None
+            if self.cache is not None and job.action == 'compress':
+                content_hash = await asyncio.to_thread(hash_bytes, data)
+                cache_key = self.cache.key(content_hash, compression_params(algorithm))
+                result = await asyncio.to_thread(self.cache.get, cache_key, len(data))
+                if result is not None:
+                    await asyncio.to_thread(_write_file, output_path, result)
+                    return BatchResult(job, True, output_path, len(data), len(result),
+                                       wall_time=time.perf_counter() - wall_start, cached=True)
+
+            result, cpu_time = await loop.run_in_executor(self._executor, _process_data, job.action,
+                                                          algorithm, data)
+            await asyncio.to_thread(_write_file, output_path, result)
+            if cache_key is not None:
+                await asyncio.to_thread(self.cache.put, cache_key, result)
+
+            return BatchResult(job, True, output_path, len(data), len(result),
+                               wall_time=time.perf_counter() - wall_start, cpu_time=cpu_time)
+
+        except Exception as e:
+            return BatchResult(job, False, output_path, error=str(e))
+
+    async def run_batch(self, jobs: Iterable[BatchJob], on_result=None) -> List[BatchResult]:
+        queue = asyncio.Queue(maxsize=self.concurrency)
+        results = []
+
+        async def worker():
+            while True:
+                job = await queue.get()
+                try:
+                    if job is None:
+                        return
+                    result = await self.run_job(job)
+                    results.append(result)
+                    if on_result is not None:
+                        on_result(result)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+
+        # put ждет свободного места в очереди - список заданий не читается впрок
+        for job in jobs:
+            await queue.put(job)
+        for _ in workers:
+            await queue.put(None)
+
+        await asyncio.gather(*workers)
+        return results
+
+    async def serve(self, socket_path: str):
+        """Принимает задания JSON-строками через Unix сокет и отвечает JSON-строками."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def handle_request(line: bytes, writer, write_lock):
+            try:
+                request = json.loads(line)
+                job = BatchJob(request['action'], request['input'], request.get('output'),
+                               request.get('algorithm'), request.get('id'))
+                response = (await self.run_job(job)).to_dict()
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                response = {'ok': False, 'error': f"Неверный запрос: {e}"}
+            finally:
+                semaphore.release()
+
+            async with write_lock:
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+                await writer.drain()
+
+        async def handle_client(reader, writer):
+            write_lock = asyncio.Lock()
+            tasks = set()
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if not line.strip():
+                        continue
+
+                    # Пока все слоты заняты, новые строки из сокета не читаются
+                    await semaphore.acquire()
+
+                    task = asyncio.create_task(handle_request(line, writer, write_lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+                if tasks:
+                    await asyncio.gather(*tasks)
+            finally:
+                writer.close()
+
+        _remove_stale_socket(socket_path)
+
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, stop_event.set)
+
+        server = await asyncio.start_unix_server(handle_client, path=socket_path)
+        socket_inode = os.lstat(socket_path).st_ino
+        log(f"Сервис: Ожидание заданий на {socket_path}")
+        try:
+            async with server:
+                await stop_event.wait()
+            log("Сервис остановлен")
+        finally:
+            # Удаляется только сокет, созданный этим сервисом, а не подмененный файл
+            if _socket_inode(socket_path) == socket_inode:
+                os.remove(socket_path)
@@ -0,0 +1,203 @@
+"""
+Блочное сжатие преобразованием Барроуза-Уилера.
+
+Каждый блок проходит BWT (суффиксный массив SA-IS), move-to-front и
+кодирование серий нулей, после чего сжимается алгоритмом Хаффмана.
+Блоки независимы и сжимаются/распаковываются параллельно в пуле процессов.
+"""
+import io
+import os
+import re
+from typing import List
+from src.core.huffman import HuffmanCompressor
+from src.utils.suffix_array import suffix_array
+from src.utils.profiler import PROFILER
+from src.utils.console import log, is_quiet, set_quiet
+
+BWT_MAGIC = b"BWT\0"  # Магическое число + версия
+
+_ZERO_RUN = re.compile(b"\0+")
+
+
+@PROFILER.timed('bwt.transform')
+def bwt_transform(data: bytes):
+    """Возвращает последний столбец матрицы сдвигов без стража и номер строки исходной строки."""
+    # Байты сдвигаются на 1, 0 - уникальный наименьший страж в конце
+    text = [byte + 1 for byte in data]
+    text.append(0)
+    sa = suffix_array(text, 256)
+
+    primary = sa.index(0)
+    last_column = bytes(data[i - 1] for i in sa if i)
+    return last_column, primary
+
+
+@PROFILER.timed('bwt.inverse')
+def bwt_inverse(last_column: bytes, primary: int) -> bytes:
+    keys = list(last_column)
+    keys.insert(primary, -1)  # Страж меньше любого байта
+
+    # Устойчивая сортировка столбца L дает переход к строке следующего суффикса
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+
+    output = bytearray(len(last_column))
+    row = order[0]
+    for i in range(len(output)):
+        row = order[row]
+        output[i] = keys[row]
+    return bytes(output)
+
+
+@PROFILER.timed('bwt.mtf')
+def mtf_encode(data: bytes) -> bytes:
+    table = list(range(256))
+    output = bytearray(len(data))
+    for i, byte in enumerate(data):
+        rank = table.index(byte)
+        output[i] = rank
+        if rank:
+            del table[rank]
+            table.insert(0, byte)
+    return bytes(output)
+
+
+@PROFILER.timed('bwt.mtf')
+def mtf_decode(data: bytes) -> bytes:
+    table = list(range(256))
+    output = bytearray(len(data))
+    for i, rank in enumerate(data):
+        byte = table[rank]
+        output[i] = byte
+        if rank:
+            del table[rank]
+            table.insert(0, byte)
+    return bytes(output)
+
+
+def _encode_run_length(length: int) -> bytes:
+    # Длина - 1 по основанию 255: байт 255 - продолжение, меньший байт завершает
+    length -= 1
+    return b"\xff" * (length // 255) + bytes([length % 255])
+
+
+@PROFILER.timed('bwt.zero_runs')
+def zero_run_encode(data: bytes) -> bytes:
+    """Серия нулей после MTF записывается как 0 и длина серии, остальные байты как есть."""
+    return _ZERO_RUN.sub(lambda match: b"\0" + _encode_run_length(len(match.group())), data)
+
+
+@PROFILER.timed('bwt.zero_runs')
+def zero_run_decode(data: bytes) -> bytes:
+    output = bytearray()
+    position = 0
+    while True:
+        zero = data.find(b"\0", position)
+        if zero == -1:
+            output += data[position:]
+            return bytes(output)
+
+        output += data[position:zero]
+        position = zero + 1
+        length = 1
+        while data[position] == 255:
+            length += 255
+            position += 1
+        length += data[position]
+        position += 1
+        output += bytes(length)
+
+
+def _compress_block(data: bytes) -> bytes:
+    last_column, primary = bwt_transform(data)
+    payload = HuffmanCompressor().compress_bytes(zero_run_encode(mtf_encode(last_column)))
+    return primary.to_bytes(4, 'big') + len(payload).to_bytes(4, 'big') + payload
+
+
+def _decompress_block(primary: int, payload: bytes) -> bytes:
+    last_column = mtf_decode(zero_run_decode(HuffmanCompressor().decompress_bytes(payload)))
+    return bwt_inverse(last_column, primary)
+
+
+class BWTCompressor:
+    def __init__(self, block_size=1 << 18, workers=None):
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+
+    def compress(self, input_path: str, output_path: str):
+        try:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
+
+            if original_data:
+                log(f"BWT: Прочитано {len(original_data)} байтов из {input_path}")
+
+            compressed_data = self.compress_bytes(original_data)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
+
+        except Exception as e:
+            log(f"BWT: Ошибка сжатия: {e}")
+            raise
+
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        blocks = [original_data[i:i + self.block_size] for i in range(0, len(original_data), self.block_size)]
+
+        output = io.BytesIO()
+        output.write(BWT_MAGIC)
+        output.write(len(original_data).to_bytes(4, 'big'))
+        output.write(len(blocks).to_bytes(4, 'big'))
+        for compressed_block in self._map(_compress_block, [(block,) for block in blocks]):
+            output.write(compressed_block)
+
+        log(f"BWT: Сжато {len(original_data)} байтов в {len(blocks)} блоков, {output.tell()} байтов")
+        return output.getvalue()
+
+    def decompress(self, input_path: str, output_path: str):
+        try:
+            with open(input_path, 'rb') as f:
+                decoded_data = self._read_compressed(f)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
+
+            log(f"BWT: Распаковано {len(decoded_data)} байтов")
+
+        except Exception as e:
+            log(f"BWT: Ошибка распаковки: {e}")
+            raise
+
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
+
+    def _read_compressed(self, f) -> bytes:
+        if f.read(len(BWT_MAGIC)) != BWT_MAGIC:
+            raise ValueError("Не валидный файл BWT")
+
+        original_size = int.from_bytes(f.read(4), 'big')
+        num_blocks = int.from_bytes(f.read(4), 'big')
+
+        tasks = []
+        for _ in range(num_blocks):
+            primary = int.from_bytes(f.read(4), 'big')
+            payload_size = int.from_bytes(f.read(4), 'big')
+            payload = f.read(payload_size)
+            if len(payload) != payload_size:
+                raise ValueError("Файл BWT поврежден: блок обрезан")
+            tasks.append((primary, payload))
+
+        decoded_data = b"".join(self._map(_decompress_block, tasks))
+        if len(decoded_data) != original_size:
+            raise ValueError(f"Файл BWT поврежден: распаковано {len(decoded_data)} байтов, "
+                             f"ожидалось {original_size}")
+        return decoded_data
+
+    def _map(self, function, tasks: List[tuple]) -> List[bytes]:
+        if len(tasks) <= 1 or self.workers <= 1:
+            return [function(*task) for task in tasks]
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), initializer=set_quiet,
+                                 initargs=(is_quiet(),)) as executor:
+            return list(executor.map(function, *zip(*tasks)))
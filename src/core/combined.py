@@ -1,100 +1,200 @@
+import io
+import os
 import pickle
 import math
 from src.core.lz77 import LZ77Compressor
 from src.core.huffman import HuffmanCompressor
+from src.core import fse
+from src.core.estimator import sample_bytes, sample_file
+from src.utils.zero_copy import copy_range
 from src.utils.bit_io import BitWriter, BitReader
+from src.utils.profiler import PROFILER
+from src.utils.console import log
 
 class CombinedCompressor:
-    def __init__(self):
+    ENTROPY_CODERS = ('huffman', 'fse')
+
+    # Выборка для эвристики выбора этапов: 16 блоков по 4 КиБ
+    ANALYSIS_BLOCKS = 16
+    ANALYSIS_BLOCK_SIZE = 4096
+
+    STORED_MAGIC = b"NOCOMPR"
+    STORED_HEADER_SIZE = 11  # Магическое число и размер (4 байта)
+    # Файлы от этого размера проверяются по выборке, несжимаемые копируются без чтения
+    STORE_CHECK_MIN_SIZE = 1 << 20
+    MAX_STORED_SIZE = (1 << 32) - 1
+
+    def __init__(self, dictionary=None, entropy='huffman'):
+        if entropy not in self.ENTROPY_CODERS:
+            raise ValueError(f"Неизвестный энтропийный кодер: {entropy}")
         self.lz77 = LZ77Compressor()
-        self.huffman = HuffmanCompressor()
+        self.huffman = HuffmanCompressor(dictionary)
+        self.fse = fse.FSECompressor()
+        self.dictionary = dictionary
+        # Кодер второго этапа; со словарем всегда используются его коды Хаффмана
+        self.entropy = entropy
 
     def compress(self, input_path: str, output_path: str):
         try:
-            with open(input_path, 'rb') as f:
-                original_data = f.read()
-
-            original_size = len(original_data)
-            if original_size == 0:
-                self._write_empty_file(output_path)
+            if self._is_incompressible_file(input_path):
+                log("Комбинированный: Файл несжимаем по выборке, копируем без чтения...")
+                self._store_file(input_path, output_path, os.path.getsize(input_path))
                 return
 
-            print(f"Комбинированный: Чтение {original_size} байтов из {input_path}")
-
-            # АНАЛИЗ ЭФФЕКТИВНОСТИ СЖАТИЯ
-            analysis = self._analyze_compression_potential(original_data)
-            print(f"Комбинированный: Анализ данных - Энтропия: {analysis['entropy']:.2f}, "
-                  f"Коэффициент повторяемости: {analysis['repetition_ratio']:.2f}")
-
-            if not self._should_use_combined(analysis, original_size):
-                print("Комбинированный: Файл имеет слабый потенциал сжатия, используем только алгоритм Хаффмана...")
-                self.huffman.compress(input_path, output_path)
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
 
-                compressed_size = self._get_file_size(output_path)
-                if not self._is_compression_effective(original_size, compressed_size):
-                    print("Комбинированный: Сжатие не эффективно, сохраняем оригинальные данные...")
-                    self._store_original_data(output_path, original_data)
-                return
+            if original_data:
+                log(f"Комбинированный: Чтение {len(original_data)} байтов из {input_path}")
 
-            print("Комбинированный: Этап 1 - Сжатие LZ77...")
-            lz77_tokens = self._lz77_compress_data(original_data)
+            compressed_data = self.compress_bytes(original_data)
 
-            serialized_size = len(lz77_tokens) * 4  # 4 байта на токен
-            if serialized_size > original_size * 0.95:
-                print("Комбинированный: LZ77 не эффективен, используем только алгоритм Хаффмана...")
-                self.huffman.compress(input_path, output_path)
+            if compressed_data.startswith(self.STORED_MAGIC):
+                # Данные уже в памяти, но копия из файла не проходит через Python еще раз
+                self._store_file(input_path, output_path, len(original_data))
                 return
 
-            print("Комбинированный: Сериализация токенов LZ77...")
-            serialized_tokens = self._serialize_tokens(lz77_tokens)
-
-            print("Комбинированный: Этап 2 - Сжатие Хоффмана...")
-            frequency = self.huffman.build_frequency_table(serialized_tokens)
-            root = self.huffman.build_huffman_tree(frequency)
-            self.huffman.build_codes(root)
-
-            with open(output_path, 'wb') as f:
-                # Заголовок
-                f.write(b"COMBI")  # Магическое число
-                f.write(b"\0")     # Версия
-                f.write(original_size.to_bytes(4, 'big'))
-
-                # Сохраняем параметры LZ77
-                f.write(self.lz77.window_size.to_bytes(2, 'big'))
-                f.write(self.lz77.lookahead_size.to_bytes(1, 'big'))
-
-                # Сохраняем дерево Хаффмана
-                tree_data = pickle.dumps(frequency)
-                f.write(len(tree_data).to_bytes(4, 'big'))
-                f.write(tree_data)
-
-                # Кодируем данные алгоритмом Хаффмана
-                bit_writer = BitWriter(f)
-
-                # Кодируем сериализованные токены
-                for byte in serialized_tokens:
-                    code = self.huffman.codes[byte]
-                    bit_writer.write_bits(code)
-
-                # Добавляем маркер конца данных
-                eof_code = self.huffman.codes[256]
-                bit_writer.write_bits(eof_code)
-
-                # Завершаем запись
-                padding_bits = bit_writer.flush()
-
-            # ФИНАЛЬНАЯ ПРОВЕРКА ЭФФЕКТИВНОСТИ
-            compressed_size = self._get_file_size(output_path)
-            if not self._is_compression_effective(original_size, compressed_size):
-                print("Комбинированный: Финальное сжатие не эффективно, сохраняем оригинальный файл...")
-                self._store_original_data(output_path, original_data)
-            else:
-                print(f"Комбинированный: Сжатие завершено")
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
 
         except Exception as e:
-            print(f"Ошибка комбинированного сжатия: {e}")
+            log(f"Ошибка комбинированного сжатия: {e}")
             raise
 
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        original_size = len(original_data)
+        if original_size == 0:
+            return self._empty_file_data()
+
+        if self.dictionary is not None:
+            return self._compress_with_dictionary(original_data)
+
+        # АНАЛИЗ ЭФФЕКТИВНОСТИ СЖАТИЯ по выборке - время не зависит от размера данных
+        analysis = self._analyze_compression_potential(
+            sample_bytes(original_data, self.ANALYSIS_BLOCKS, self.ANALYSIS_BLOCK_SIZE))
+        log(f"Комбинированный: Анализ данных - Энтропия: {analysis['entropy']:.2f}, "
+              f"Коэффициент повторяемости: {analysis['repetition_ratio']:.2f}")
+
+        if not self._should_use_combined(analysis, original_size):
+            log("Комбинированный: Файл имеет слабый потенциал сжатия, используем только энтропийный кодер...")
+            compressed_data = self._entropy_compress(original_data)
+
+            if not self._is_compression_effective(original_size, len(compressed_data)):
+                log("Комбинированный: Сжатие не эффективно, сохраняем оригинальные данные...")
+                return self._store_original_data(original_data)
+            return compressed_data
+
+        log("Комбинированный: Этап 1 - Сжатие LZ77...")
+        lz77_tokens = self._lz77_compress_data(original_data)
+
+        serialized_size = len(lz77_tokens) * 4  # 4 байта на токен
+        if serialized_size > original_size * 0.95:
+            log("Комбинированный: LZ77 не эффективен, используем только энтропийный кодер...")
+            return self._entropy_compress(original_data)
+
+        log("Комбинированный: Сериализация токенов LZ77...")
+        serialized_tokens = self._serialize_tokens(lz77_tokens)
+
+        if self.entropy == 'fse':
+            log("Комбинированный: Этап 2 - Сжатие FSE...")
+            output = io.BytesIO()
+            output.write(b"COMBI")
+            output.write(b"\2")  # Версия 2 - токены закодированы tANS/FSE
+            output.write(original_size.to_bytes(4, 'big'))
+            output.write(self.lz77.window_size.to_bytes(2, 'big'))
+            output.write(self.lz77.lookahead_size.to_bytes(1, 'big'))
+            output.write(fse.encode_block(serialized_tokens))
+
+            if not self._is_compression_effective(original_size, output.tell()):
+                log("Комбинированный: Финальное сжатие не эффективно, сохраняем оригинальный файл...")
+                return self._store_original_data(original_data)
+            return output.getvalue()
+
+        log("Комбинированный: Этап 2 - Сжатие Хоффмана...")
+        frequency = self.huffman.build_frequency_table(serialized_tokens)
+        self.huffman.load_table(frequency)
+
+        output = io.BytesIO()
+
+        # Заголовок
+        output.write(b"COMBI")  # Магическое число
+        output.write(b"\0")     # Версия
+        output.write(original_size.to_bytes(4, 'big'))
+
+        # Сохраняем параметры LZ77
+        output.write(self.lz77.window_size.to_bytes(2, 'big'))
+        output.write(self.lz77.lookahead_size.to_bytes(1, 'big'))
+
+        # Сохраняем дерево Хаффмана
+        tree_data = pickle.dumps(frequency)
+        output.write(len(tree_data).to_bytes(4, 'big'))
+        output.write(tree_data)
+
+        # Кодируем данные алгоритмом Хаффмана
+        bit_writer = BitWriter(output)
+
+        # Кодируем сериализованные токены и маркер конца данных
+        self.huffman.encode_symbols(bit_writer, serialized_tokens)
+
+        # Завершаем запись
+        padding_bits = bit_writer.flush()
+
+        # ФИНАЛЬНАЯ ПРОВЕРКА ЭФФЕКТИВНОСТИ
+        if not self._is_compression_effective(original_size, output.tell()):
+            log("Комбинированный: Финальное сжатие не эффективно, сохраняем оригинальный файл...")
+            return self._store_original_data(original_data)
+
+        log(f"Комбинированный: Сжатие завершено")
+        return output.getvalue()
+
+    def _is_incompressible_file(self, input_path: str) -> bool:
+        size = os.path.getsize(input_path)
+        if self.dictionary is not None or not self.STORE_CHECK_MIN_SIZE <= size <= self.MAX_STORED_SIZE:
+            return False
+
+        sample = sample_file(input_path, self.ANALYSIS_BLOCKS, self.ANALYSIS_BLOCK_SIZE)
+        analysis = self._analyze_compression_potential(sample)
+        if self._should_use_combined(analysis, size):
+            return False
+        # Та же проверка, что и для всего буфера: Хаффман не дает и 2%
+        return not self._is_compression_effective(len(sample), len(self._entropy_compress(sample)))
+
+    @PROFILER.timed('combined.store')
+    def _store_file(self, input_path: str, output_path: str, size: int):
+        with open(input_path, 'rb') as in_f, open(output_path, 'wb') as out_f:
+            out_f.write(self.STORED_MAGIC + size.to_bytes(4, 'big'))
+            copy_range(in_f, out_f, 0, size)
+
+    def _compress_with_dictionary(self, original_data: bytes) -> bytes:
+        # Со словарем нет таблицы в заголовке, поэтому LZ77 выгоден и для мелких файлов
+        dictionary = self.dictionary
+        lz77 = LZ77Compressor(dictionary.window_size, dictionary.lookahead_size)
+        lz77_tokens = lz77.encode_tokens(original_data, dictionary.history)
+        serialized_tokens = self._serialize_tokens(lz77_tokens)
+
+        self.huffman.load_canonical_table(dictionary.token_code_lengths)
+
+        output = io.BytesIO()
+        output.write(b"COMBI")  # Магическое число
+        output.write(b"\1")     # Версия 1 - сжатие со словарем
+        output.write(len(original_data).to_bytes(4, 'big'))
+        output.write(dictionary.dict_id.to_bytes(4, 'big'))
+
+        bit_writer = BitWriter(output)
+        self.huffman.encode_symbols(bit_writer, serialized_tokens)
+        bit_writer.flush()
+        compressed_data = output.getvalue()
+
+        # Статический Хаффман без LZ77 иногда короче на совсем неповторяющихся данных
+        huffman_data = self.huffman.compress_bytes(original_data)
+        if len(huffman_data) < len(compressed_data):
+            compressed_data = huffman_data
+
+        if not self._is_compression_effective(len(original_data), len(compressed_data)):
+            return self._store_original_data(original_data)
+        return compressed_data
+
+    @PROFILER.timed('combined.analyze')
     def _analyze_compression_potential(self, data: bytes) -> dict:
         if not data:
             return {'entropy': 0, 'repetition_ratio': 0}
@@ -153,134 +253,113 @@ class CombinedCompressor:
         # Считаем эффективным если сжали хотя бы на 2%
         return compressed_size < original_size * 0.98
 
-    def _store_original_data(self, output_path: str, data: bytes):
-        with open(output_path, 'wb') as f:
-            f.write(b"NOCOMPR")
-            f.write(len(data).to_bytes(4, 'big'))
-            f.write(data)
+    def _entropy_compress(self, data: bytes) -> bytes:
+        if self.entropy == 'fse':
+            return self.fse.compress_bytes(data)
+        return self.huffman.compress_bytes(data)
+
+    def _store_original_data(self, data: bytes) -> bytes:
+        return self.STORED_MAGIC + len(data).to_bytes(4, 'big') + data
 
     def decompress(self, input_path: str, output_path: str):
         try:
             with open(input_path, 'rb') as f:
-                magic = f.read(7)
-                if magic == b"NOCOMPR":
+                if f.read(len(self.STORED_MAGIC)) == self.STORED_MAGIC:
                     original_size = int.from_bytes(f.read(4), 'big')
-                    original_data = f.read(original_size)
-                    with open(output_path, 'wb') as out_f:
-                        out_f.write(original_data)
-                    print(f"Комбинированный: Возвращен оригнальный файл ({original_size} байтов)")
-                    return
-
-                if magic[:5] != b"COMBI":
-                    f.seek(0)
-                    print("Комбинированный: Не комбинированный файл, пробуем алгоритм Хаффмана...")
-                    self.huffman.decompress(input_path, output_path)
+                    with PROFILER.stage('combined.store'), open(output_path, 'wb') as out_f:
+                        copy_range(f, out_f, self.STORED_HEADER_SIZE, original_size)
+                    log(f"Комбинированный: Скопирован оригинальный файл ({original_size} байтов)")
                     return
 
-                version = magic[5] if len(magic) > 5 else 0
-                if len(magic) < 7:
-                    remaining_header = f.read(7 - len(magic))
-                    magic = magic + remaining_header
+                f.seek(0)
+                decoded_data = self._read_compressed(f)
 
-                original_size = int.from_bytes(f.read(4), 'big')
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as out_f:
+                out_f.write(decoded_data)
 
-                if original_size == 0:
-                    with open(output_path, 'wb') as out_f:
-                        out_f.write(b"")
-                    return
-
-                # Читаем параметры LZ77
-                window_size = int.from_bytes(f.read(2), 'big')
-                lookahead_size = int.from_bytes(f.read(1), 'big')
-
-                # Восстанавливаем дерево Хаффмана
-                tree_size = int.from_bytes(f.read(4), 'big')
-                tree_data = f.read(tree_size)
-                frequency = pickle.loads(tree_data)
-
-                root = self.huffman.build_huffman_tree(frequency)
-                self.huffman.build_codes(root)
+        except Exception as e:
+            log(f"Комбинированный Ошибка распаковки: {e}")
+            raise
 
-                # Декодируем данные Хаффмана
-                bit_reader = BitReader(f)
-                decoded_bytes = bytearray()
-                current_node = root
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
 
-                while True:
-                    bit = bit_reader.read_bit()
-                    if bit == -1:
-                        break
+    def _read_compressed(self, f) -> bytes:
+        magic = f.read(7)
+        if magic == self.STORED_MAGIC:
+            original_size = int.from_bytes(f.read(4), 'big')
+            original_data = f.read(original_size)
+            log(f"Комбинированный: Возвращен оригнальный файл ({original_size} байтов)")
+            return original_data
 
-                    if bit == 0:
-                        current_node = current_node.left
-                    else:
-                        current_node = current_node.right
+        if magic.startswith(fse.FSE_MAGIC):
+            f.seek(0)
+            return self.fse._read_compressed(f)
 
-                    if current_node and current_node.symbol is not None:
-                        if current_node.symbol == 256:
-                            break
-                        decoded_bytes.append(current_node.symbol)
-                        current_node = root
+        if magic[:5] != b"COMBI":
+            f.seek(0)
+            log("Комбинированный: Не комбинированный файл, пробуем алгоритм Хаффмана...")
+            return self.huffman._read_compressed(f)
 
-                # Десериализуем токены LZ77
-                lz77_tokens = self._deserialize_tokens(decoded_bytes)
+        # Заголовок COMBI - 5 байтов магического числа и байт версии
+        version = magic[5] if len(magic) > 5 else 0
+        f.seek(6)
 
-                # LZ77 декомпрессия
-                decoded_data = self._lz77_decompress_data(lz77_tokens, original_size)
+        original_size = int.from_bytes(f.read(4), 'big')
 
-                with open(output_path, 'wb') as out_f:
-                    out_f.write(decoded_data)
+        if original_size == 0:
+            return b""
 
-                print(f"Комбинированный: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+        if version == 1:
+            return self._decompress_with_dictionary(f, original_size)
 
-        except Exception as e:
-            print(f"Комбинированный Ошибка распаковки: {e}")
-            raise
+        # Читаем параметры LZ77
+        window_size = int.from_bytes(f.read(2), 'big')
+        lookahead_size = int.from_bytes(f.read(1), 'big')
 
-    def _lz77_compress_data(self, data: bytes) -> list:
-        from src.models.lz77_models import SlidingWindow
+        if version == 2:
+            lz77_tokens = self._deserialize_tokens(fse.decode_block(f))
+            return self._lz77_decompress_data(lz77_tokens, original_size, lookahead_size)
 
-        window = SlidingWindow(self.lz77.window_size, self.lz77.lookahead_size)
-        window.add_data(data)
+        # Восстанавливаем дерево Хаффмана
+        tree_size = int.from_bytes(f.read(4), 'big')
+        tree_data = f.read(tree_size)
+        frequency = pickle.loads(tree_data)
 
-        tokens = []
-        while window.has_more_data():
-            search_buffer = window.get_search_buffer()
-            lookahead_buffer = window.get_lookahead_buffer()
+        root = self.huffman.load_table(frequency)
 
-            if not lookahead_buffer:
-                break
+        # Декодируем данные Хаффмана
+        bit_reader = BitReader(f)
+        decoded_bytes = self.huffman.decode_symbols(bit_reader, root)
 
-            offset, length = self.lz77.find_longest_match(search_buffer, lookahead_buffer)
+        # Десериализуем токены LZ77
+        lz77_tokens = self._deserialize_tokens(decoded_bytes)
 
-            if length < len(lookahead_buffer):
-                next_char = lookahead_buffer[length]
-                advance_by = length + 1
-            else:
-                next_char = 0
-                advance_by = length
+        # LZ77 декомпрессия
+        decoded_data = self._lz77_decompress_data(lz77_tokens, original_size, lookahead_size)
 
-            from src.models.lz77_models import LZ77Token
-            tokens.append(LZ77Token(offset, length, next_char))
-            window.advance(advance_by)
+        log(f"Комбинированный: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+        return decoded_data
 
-        return tokens
+    def _decompress_with_dictionary(self, f, original_size: int) -> bytes:
+        dictionary = self.huffman._require_dictionary(f)
 
-    def _lz77_decompress_data(self, tokens: list, original_size: int) -> bytes:
-        decoded_data = bytearray()
+        root = self.huffman.load_canonical_table(dictionary.token_code_lengths)
+        decoded_bytes = self.huffman.decode_symbols(BitReader(f), root)
 
-        for token in tokens:
-            if token.offset > 0:
-                start_pos = len(decoded_data) - token.offset
-                for i in range(token.length):
-                    if start_pos + i < len(decoded_data):
-                        decoded_data.append(decoded_data[start_pos + i])
+        lz77_tokens = self._deserialize_tokens(decoded_bytes)
+        history = dictionary.history[-dictionary.window_size:]
+        decoded_data = self.lz77.decode_tokens(lz77_tokens, dictionary.lookahead_size, history)
+        return bytes(decoded_data[:original_size])
 
-            if token.next_char != 0:
-                decoded_data.append(token.next_char)
+    def _lz77_compress_data(self, data: bytes) -> list:
+        return self.lz77.encode_tokens(data)
 
+    def _lz77_decompress_data(self, tokens: list, original_size: int, lookahead_size: int) -> bytes:
+        decoded_data = self.lz77.decode_tokens(tokens, lookahead_size)
         return bytes(decoded_data[:original_size])
 
+    @PROFILER.timed('combined.serialize')
     def _serialize_tokens(self, tokens: list) -> bytes:
         result = bytearray()
         for token in tokens:
@@ -289,6 +368,7 @@ class CombinedCompressor:
             result.append(token.next_char)
         return bytes(result)
 
+    @PROFILER.timed('combined.deserialize')
     def _deserialize_tokens(self, data: bytes) -> list:
         from src.models.lz77_models import LZ77Token
 
@@ -301,11 +381,5 @@ class CombinedCompressor:
                 tokens.append(LZ77Token(offset, length, next_char))
         return tokens
 
-    def _write_empty_file(self, output_path: str):
-        with open(output_path, 'wb') as f:
-            f.write(b"COMBI\0")
-            f.write((0).to_bytes(4, 'big'))
-
-    def _get_file_size(self, file_path: str) -> int:
-        import os
-        return os.path.getsize(file_path)
\ No newline at end of file
+    def _empty_file_data(self) -> bytes:
+        return b"COMBI\0" + (0).to_bytes(4, 'big')
\ No newline at end of file
@@ -0,0 +1,168 @@
+import os
+import zlib
+from typing import List
+from src.core.lz77 import LZ77Compressor
+from src.core.huffman import HuffmanCompressor
+from src.core.combined import CombinedCompressor
+from src.models.dictionary_models import CompressionDictionary
+from src.utils.console import log
+
+DICT_MAGIC = b"DICT\0"  # Магическое число + версия
+NUM_SYMBOLS = 257  # 256 байтов + EOF
+
+
+class DictionaryTrainer:
+    """
+    Обучает словарь на примерах мелких файлов.
+
+    История LZ77 собирается из сегментов с самыми частыми n-граммами,
+    статические длины кодов Хаффмана считаются по всем примерам.
+    """
+
+    def __init__(self, window_size=4096, lookahead_size=18, gram_size=8, segment_size=64):
+        self.window_size = window_size
+        self.lookahead_size = lookahead_size
+        self.gram_size = gram_size
+        self.segment_size = segment_size
+
+    def train(self, samples: List[bytes]) -> CompressionDictionary:
+        samples = [sample for sample in samples if sample]
+        if not samples:
+            raise ValueError("Нет данных для обучения словаря")
+
+        history = self._build_history(samples)
+        log(f"Словарь: История {len(history)} байтов из {len(samples)} примеров")
+
+        lz77 = LZ77Compressor(self.window_size, self.lookahead_size)
+        huffman = HuffmanCompressor()
+        combined = CombinedCompressor()
+
+        # Сглаживание: любой символ должен иметь код, даже если не встречался
+        literal_frequency = {symbol: 1 for symbol in range(NUM_SYMBOLS)}
+        token_frequency = {symbol: 1 for symbol in range(NUM_SYMBOLS)}
+
+        for sample in samples:
+            for symbol, count in huffman.build_frequency_table(sample).items():
+                literal_frequency[symbol] += count
+
+            tokens = lz77.encode_tokens(sample, history)
+            serialized_tokens = combined._serialize_tokens(tokens)
+            for symbol, count in huffman.build_frequency_table(serialized_tokens).items():
+                token_frequency[symbol] += count
+
+        dictionary = CompressionDictionary(
+            dict_id=0,
+            history=history,
+            literal_code_lengths=huffman.code_lengths(literal_frequency),
+            token_code_lengths=huffman.code_lengths(token_frequency),
+            window_size=self.window_size,
+            lookahead_size=self.lookahead_size,
+        )
+        dictionary.dict_id = zlib.crc32(_serialize_body(dictionary))
+        return dictionary
+
+    def _build_history(self, samples: List[bytes]) -> bytes:
+        # В скольких примерах встречается каждая n-грамма
+        document_frequency = {}
+        for sample in samples:
+            grams = {sample[i:i + self.gram_size] for i in range(len(sample) - self.gram_size + 1)}
+            for gram in grams:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+
+        # Сегмент полезен, если его n-граммы повторяются в других примерах
+        scores = {}
+        for sample in samples:
+            for start in range(0, len(sample), self.segment_size):
+                segment = sample[start:start + self.segment_size]
+                if len(segment) < self.gram_size or segment in scores:
+                    continue
+                scores[segment] = sum(document_frequency[segment[i:i + self.gram_size]] - 1
+                                      for i in range(len(segment) - self.gram_size + 1))
+
+        chosen = []
+        history_size = 0
+        for segment, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            if score <= 0:
+                break
+            if history_size + len(segment) > self.window_size:
+                continue
+            chosen.append(segment)
+            history_size += len(segment)
+
+        # Самые полезные сегменты в конце истории - у них самые короткие смещения
+        return b"".join(reversed(chosen))
+
+
+def _serialize_lengths(code_lengths: dict) -> bytes:
+    return bytes(code_lengths.get(symbol, 0) for symbol in range(NUM_SYMBOLS))
+
+
+def _deserialize_lengths(data: bytes) -> dict:
+    return {symbol: length for symbol, length in enumerate(data) if length}
+
+
+def _serialize_body(dictionary: CompressionDictionary) -> bytes:
+    return (dictionary.window_size.to_bytes(2, 'big') +
+            dictionary.lookahead_size.to_bytes(1, 'big') +
+            len(dictionary.history).to_bytes(2, 'big') +
+            dictionary.history +
+            _serialize_lengths(dictionary.literal_code_lengths) +
+            _serialize_lengths(dictionary.token_code_lengths))
+
+
+def dictionary_to_bytes(dictionary: CompressionDictionary) -> bytes:
+    return DICT_MAGIC + dictionary.dict_id.to_bytes(4, 'big') + _serialize_body(dictionary)
+
+
+def dictionary_from_bytes(data: bytes) -> CompressionDictionary:
+    if data[:len(DICT_MAGIC)] != DICT_MAGIC:
+        raise ValueError("Не валидный файл словаря")
+
+    position = len(DICT_MAGIC)
+    dict_id = int.from_bytes(data[position:position + 4], 'big')
+    body = data[position + 4:]
+    if zlib.crc32(body) != dict_id:
+        raise ValueError("Файл словаря поврежден")
+
+    window_size = int.from_bytes(body[0:2], 'big')
+    lookahead_size = body[2]
+    history_size = int.from_bytes(body[3:5], 'big')
+    position = 5 + history_size
+    history = body[5:position]
+    literal_lengths = body[position:position + NUM_SYMBOLS]
+    token_lengths = body[position + NUM_SYMBOLS:position + 2 * NUM_SYMBOLS]
+
+    return CompressionDictionary(
+        dict_id=dict_id,
+        history=history,
+        literal_code_lengths=_deserialize_lengths(literal_lengths),
+        token_code_lengths=_deserialize_lengths(token_lengths),
+        window_size=window_size,
+        lookahead_size=lookahead_size,
+    )
+
+
+def save_dictionary(dictionary: CompressionDictionary, path: str):
+    with open(path, 'wb') as f:
+        f.write(dictionary_to_bytes(dictionary))
+
+
+def load_dictionary(path: str) -> CompressionDictionary:
+    with open(path, 'rb') as f:
+        return dictionary_from_bytes(f.read())
+
+
+def load_samples(path: str) -> List[bytes]:
+    if os.path.isfile(path):
+        paths = [path]
+    else:
+        paths = []
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            paths.extend(os.path.join(root, name) for name in sorted(names))
+
+    samples = []
+    for sample_path in paths:
+        with open(sample_path, 'rb') as f:
+            samples.append(f.read())
+    return samples
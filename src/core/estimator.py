@@ -0,0 +1,143 @@
+"""
+Оценка сжатия по выборке.
+
+Из файла читается ограниченное число блоков, равномерно разнесенных по
+всей длине, и каждый алгоритм сжимает и распаковывает только их. Степень
+сжатия и время экстраполируются на весь файл, поэтому оценка 50 ГБ занимает
+столько же, сколько оценка 50 МБ. Семейство LZ77 ищет совпадения с
+ограниченной глубиной цепочки, а алгоритмы пробуются от быстрых к медленным,
+пока не исчерпан бюджет работы оценки.
+
+Бюджет и выбор auto зависят только от выборки и реестра кодеков, а не от
+замеренного времени: одни и те же данные всегда получают один алгоритм, и
+ключ кэша результатов для -a auto остается верным. Оценивается только
+алгоритм с настройками по умолчанию - уровни (глубина поиска, энтропийный
+кодер, --target-mbps) не перебираются.
+"""
+import os
+import time
+from typing import Iterable, List, Optional
+from src.core.registry import codec_names, create_compressor, get_codec
+from src.models.estimator_models import AlgorithmEstimate
+from src.utils.profiler import PROFILER
+from src.utils.console import is_quiet, set_quiet
+
+AUTO_ALGORITHM = 'auto'
+
+SAMPLE_BLOCKS = 8
+SAMPLE_BLOCK_SIZE = 2048
+
+# При выборе auto более быстрый алгоритм побеждает, если проигрывает не больше 2% размера
+AUTO_SIZE_TOLERANCE = 1.02
+
+# Глубина поиска LZ77 при оценке, как у уровня combined:16 подбора по скорости
+ESTIMATE_MAX_CHAIN = 16
+# Бюджет оценки в байтах выборки, взвешенных медленностью алгоритма (длина / speed
+# из реестра): выборка 16 КиБ укладывается целиком, большие выборки от вызывающих
+# отсекают медленные алгоритмы одинаково при каждом запуске
+ESTIMATE_WORK_BUDGET = 1 << 17
+
+
+def _sample_offsets(size: int, block_count: int, block_size: int) -> List[int]:
+    if size <= block_count * block_size:
+        return [0]
+    last = size - block_size
+    # Выравнивание по 8 байтам сохраняет границы элементов числовых массивов
+    return [(last * i // (block_count - 1)) & ~7 for i in range(block_count)]
+
+
+def sample_bytes(data: bytes, block_count=SAMPLE_BLOCKS, block_size=SAMPLE_BLOCK_SIZE) -> bytes:
+    if len(data) <= block_count * block_size:
+        return data
+    return b"".join(data[offset:offset + block_size]
+                    for offset in _sample_offsets(len(data), block_count, block_size))
+
+
+def sample_file(path: str, block_count=SAMPLE_BLOCKS, block_size=SAMPLE_BLOCK_SIZE) -> bytes:
+    """Читает только блоки выборки: время не зависит от размера файла."""
+    size = os.path.getsize(path)
+    if size <= block_count * block_size:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    blocks = []
+    with open(path, 'rb') as f:
+        for offset in _sample_offsets(size, block_count, block_size):
+            f.seek(offset)
+            blocks.append(f.read(block_size))
+    return b"".join(blocks)
+
+
+@PROFILER.timed('estimator.estimate')
+def estimate(sample: bytes, input_size: int, algorithms: Optional[Iterable[str]] = None) -> List[AlgorithmEstimate]:
+    """
+    Сжимает выборку каждым алгоритмом и экстраполирует результат на
+    input_size байтов. Без явного списка алгоритмы идут от быстрых к
+    медленным, и те, что не укладываются в ESTIMATE_WORK_BUDGET, в результат
+    не попадают.
+    """
+    scale = input_size / len(sample) if sample else 0.0
+    estimates = []
+    if algorithms is None:
+        algorithms = sorted(codec_names(), key=lambda name: get_codec(name).speed, reverse=True)
+        budget = ESTIMATE_WORK_BUDGET
+    else:
+        budget = None
+
+    quiet = is_quiet()
+    set_quiet(True)  # Сообщения движков о выборке только мешают отчету
+    try:
+        for algorithm in algorithms:
+            if budget is not None:
+                budget -= len(sample) / get_codec(algorithm).speed
+                if estimates and budget < 0:
+                    break
+            compressor = create_compressor(algorithm)
+            lz77 = getattr(compressor, 'lz77', compressor)
+            if getattr(lz77, 'max_chain', False) is None:
+                lz77.max_chain = ESTIMATE_MAX_CHAIN
+            try:
+                start = time.process_time()
+                compressed = compressor.compress_bytes(sample)
+                compress_seconds = time.process_time() - start
+
+                start = time.process_time()
+                compressor.decompress_bytes(compressed)
+                decompress_seconds = time.process_time() - start
+            except Exception as e:
+                estimates.append(AlgorithmEstimate(algorithm, len(sample), len(sample), input_size, 0.0, 0.0, str(e)))
+                continue
+
+            estimates.append(AlgorithmEstimate(algorithm, len(sample), len(compressed), input_size,
+                                               compress_seconds * scale, decompress_seconds * scale))
+    finally:
+        set_quiet(quiet)
+
+    return estimates
+
+
+def estimate_file(path: str, algorithms: Optional[Iterable[str]] = None) -> List[AlgorithmEstimate]:
+    return estimate(sample_file(path), os.path.getsize(path), algorithms)
+
+
+def choose_algorithm(estimates: List[AlgorithmEstimate]) -> str:
+    """
+    Наименьший прогноз размера; почти равные по размеру решает скорость
+    алгоритма из реестра, а не замер: выбор не меняется от запуска к запуску.
+    """
+    candidates = [estimate for estimate in estimates if estimate.error is None]
+    if not candidates:
+        raise ValueError("Ни один алгоритм не смог сжать выборку")
+
+    smallest = min(estimate.sample_compressed_size for estimate in candidates)
+    close = [estimate for estimate in candidates
+             if estimate.sample_compressed_size <= smallest * AUTO_SIZE_TOLERANCE]
+    return min(close, key=lambda estimate: (-get_codec(estimate.algorithm).speed,
+                                            estimate.sample_compressed_size)).algorithm
+
+
+def resolve_algorithm(algorithm: str, data: bytes) -> str:
+    """Заменяет auto выбором по выборке из data, остальные имена возвращает как есть."""
+    if algorithm != AUTO_ALGORITHM:
+        return algorithm
+    return choose_algorithm(estimate(sample_bytes(data), len(data)))
@@ -0,0 +1,310 @@
+"""
+Фильтры для числовых данных перед сжатием.
+
+delta и xor заменяют элементы ширины width разностью (или XOR) с предыдущим,
+shuffle раскладывает байты элементов по плоскостям (все первые байты, затем
+все вторые...), bitshuffle - то же по битам. Массивы int32/float64 после
+этого превращаются в длинные серии нулей и одинаковых байтов, которые
+находят RLE и LZ77. Фильтры записываются в заголовок и снимаются при
+распаковке в обратном порядке.
+
+Все преобразования работают срезами байтов и операциями над большими
+целыми, без цикла Python по элементам и битам.
+"""
+import io
+from typing import List, Tuple
+from src.core.registry import create_compressor, detect_codec, DEFAULT_CODEC
+from src.utils.profiler import PROFILER
+from src.utils.console import log
+
+FILTER_MAGIC = b"FLT\0"  # Магическое число + версия
+
+FILTER_IDS = {'delta': 1, 'xor': 2, 'shuffle': 3, 'bitshuffle': 4}
+FILTER_NAMES = {filter_id: name for name, filter_id in FILTER_IDS.items()}
+WIDTHS = (1, 2, 4, 8)
+
+# Префиксная свертка при распаковке delta/xor идет блоками такого размера:
+# удвоение сдвига внутри блока стоит log2(элементов) проходов по блоку
+SCAN_BLOCK = 8192
+
+# Размер выборки для автоматического выбора фильтров
+SAMPLE_SIZE = 1 << 16
+# Фильтр выбирается, только если выборка сжимается хотя бы на 3% лучше
+AUTO_MIN_GAIN = 0.97
+
+
+def parse_filters(spec: str) -> List[Tuple[str, int]]:
+    """Разбирает цепочку вида "delta:4,shuffle:4"; ширина по умолчанию 4."""
+    filters = []
+    for item in spec.split(','):
+        name, _, width = item.strip().partition(':')
+        if name not in FILTER_IDS:
+            raise ValueError(f"Неизвестный фильтр: {name}")
+        width = int(width) if width else 4
+        if width not in WIDTHS:
+            raise ValueError(f"Ширина элемента фильтра должна быть одной из {WIDTHS}")
+        filters.append((name, width))
+    return filters
+
+
+def format_filters(filters: List[Tuple[str, int]]) -> str:
+    return ','.join(f"{name}:{width}" for name, width in filters) or 'none'
+
+
+def _split_tail(data: bytes, width: int):
+    # Неполный последний элемент фильтры не трогают
+    body_size = len(data) - len(data) % width
+    return data[:body_size], data[body_size:]
+
+
+def _lane_masks(size: int, width: int):
+    """Маски старших и остальных битов всех элементов в size байтах (little-endian)."""
+    high = int.from_bytes((b"\0" * (width - 1) + b"\x80") * (size // width), 'little')
+    return high, ((1 << (8 * size)) - 1) ^ high
+
+
+# Сложение и вычитание по элементам внутри одного большого целого:
+# старший бит каждого элемента считается отдельно, поэтому переносы не выходят за элемент
+def _lane_add(x: int, y: int, high: int, low: int) -> int:
+    return ((x & low) + (y & low)) ^ ((x ^ y) & high)
+
+
+def _lane_sub(x: int, y: int, high: int, low: int) -> int:
+    return ((x | high) - (y & low)) ^ ((x ^ y ^ high) & high)
+
+
+def _lane_xor(x: int, y: int, high: int, low: int) -> int:
+    return x ^ y
+
+
+def _previous(body: bytes, width: int):
+    # Элементы и они же, сдвинутые на один элемент (первому достается 0)
+    high, low = _lane_masks(len(body), width)
+    current = int.from_bytes(body, 'little')
+    return current, (current << (8 * width)) & (high | low), high, low
+
+
+def _prefix_scan(body: bytes, width: int, combine) -> bytes:
+    """Нарастающий итог combine по элементам: обратное преобразование для delta и xor."""
+    output = []
+    carry = 0
+    masks = {}
+    for start in range(0, len(body), SCAN_BLOCK):
+        block = body[start:start + SCAN_BLOCK]
+        if len(block) not in masks:
+            masks[len(block)] = _lane_masks(len(block), width)
+        high, low = masks[len(block)]
+        value = int.from_bytes(block, 'little')
+        shift = 8 * width
+        while shift < 8 * len(block):
+            value = combine(value, (value << shift) & (high | low), high, low)
+            shift *= 2
+        # Итог предыдущего блока добавляется ко всем элементам этого
+        value = combine(value, carry * (high >> (8 * width - 1)), high, low)
+        output.append(value.to_bytes(len(block), 'little'))
+        carry = value >> (8 * (len(block) - width))
+    return b"".join(output)
+
+
+def delta_encode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    return _lane_sub(*_previous(body, width)).to_bytes(len(body), 'little') + tail
+
+
+def delta_decode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    return _prefix_scan(body, width, _lane_add) + tail
+
+
+def xor_encode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    return _lane_xor(*_previous(body, width)).to_bytes(len(body), 'little') + tail
+
+
+def xor_decode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    return _prefix_scan(body, width, _lane_xor) + tail
+
+
+def shuffle_encode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    return b"".join(body[i::width] for i in range(width)) + tail
+
+
+def shuffle_decode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, width)
+    count = len(body) // width
+    output = bytearray(len(body))
+    for i in range(width):
+        output[i::width] = body[i * count:(i + 1) * count]
+    return bytes(output) + tail
+
+
+# Байт -> ASCII '0'/'1' его бита номер bit
+_BIT_TABLES = [bytes(ord('0') + ((value >> bit) & 1) for value in range(256)) for bit in range(8)]
+# ASCII '0'/'1' -> байт 0/1
+_ASCII_TO_BIT = bytes.maketrans(b"01", b"\0\1")
+
+
+def bitshuffle_encode(data: bytes, width: int) -> bytes:
+    """Битовые плоскости: для каждого байта элемента - 8 плоскостей по биту от каждого элемента."""
+    # Плоскости берутся по группам из 8 элементов, остаток не трогаем - размер не меняется
+    body, tail = _split_tail(data, 8 * width)
+    planes = []
+    for byte_plane in (body[i::width] for i in range(width)):
+        for bit in range(7, -1, -1):
+            bits = byte_plane.translate(_BIT_TABLES[bit])
+            if bits:
+                planes.append(int(bits, 2).to_bytes(len(bits) // 8, 'big'))
+    return b"".join(planes) + tail
+
+
+def bitshuffle_decode(data: bytes, width: int) -> bytes:
+    body, tail = _split_tail(data, 8 * width)
+    count = len(body) // width
+    plane_size = count // 8
+    output = bytearray(len(body))
+
+    position = 0
+    for i in range(width):
+        value = 0
+        for bit in range(7, -1, -1):
+            plane = body[position:position + plane_size]
+            position += plane_size
+            bits = format(int.from_bytes(plane, 'big'), f'0{count}b')
+            # Байты 0/1, сдвинутые на номер бита, складываются без переносов
+            value |= int.from_bytes(bits.encode('ascii').translate(_ASCII_TO_BIT), 'big') << bit
+        if count:
+            output[i::width] = value.to_bytes(count, 'big')
+    return bytes(output) + tail
+
+
+_ENCODERS = {'delta': delta_encode, 'xor': xor_encode, 'shuffle': shuffle_encode, 'bitshuffle': bitshuffle_encode}
+_DECODERS = {'delta': delta_decode, 'xor': xor_decode, 'shuffle': shuffle_decode, 'bitshuffle': bitshuffle_decode}
+
+
+@PROFILER.timed('filters.apply')
+def apply_filters(data: bytes, filters: List[Tuple[str, int]]) -> bytes:
+    for name, width in filters:
+        data = _ENCODERS[name](data, width)
+    return data
+
+
+@PROFILER.timed('filters.remove')
+def remove_filters(data: bytes, filters: List[Tuple[str, int]]) -> bytes:
+    for name, width in reversed(filters):
+        data = _DECODERS[name](data, width)
+    return data
+
+
+def _candidate_chains():
+    yield []
+    for width in (2, 4, 8):
+        yield [('shuffle', width)]
+        yield [('delta', width), ('shuffle', width)]
+        yield [('xor', width), ('shuffle', width)]
+        yield [('bitshuffle', width)]
+        yield [('delta', width), ('bitshuffle', width)]
+
+
+@PROFILER.timed('filters.choose')
+def choose_filters(data: bytes) -> List[Tuple[str, int]]:
+    """
+    Подбирает цепочку фильтров по выборке из начала, середины и конца данных.
+    Оценка - размер выборки после быстрого zlib: он, как и наши алгоритмы,
+    выигрывает и от повторов, и от перекоса частот байтов.
+    """
+    import zlib
+
+    if len(data) <= SAMPLE_SIZE:
+        sample = data
+    else:
+        # Три куска, выровненных по 8 байтам, чтобы не сбить границы элементов
+        part = SAMPLE_SIZE // 3 & ~7
+        middle = (len(data) // 2) & ~7
+        end = (len(data) - part) & ~7
+        sample = data[:part] + data[middle:middle + part] + data[end:end + part]
+
+    best_filters = []
+    best_size = len(zlib.compress(sample, 1)) * AUTO_MIN_GAIN
+    for filters in _candidate_chains():
+        if not filters:
+            continue
+        size = len(zlib.compress(apply_filters(sample, filters), 1))
+        if size < best_size:
+            best_filters, best_size = filters, size
+    return best_filters
+
+
+class FilterCompressor:
+    """
+    Фильтры + любой алгоритм: заголовок FLT хранит цепочку фильтров,
+    за ним - данные в формате внутреннего алгоритма.
+    """
+
+    def __init__(self, dictionary=None, algorithm=DEFAULT_CODEC, filters='auto'):
+        self.dictionary = dictionary
+        self.algorithm = algorithm
+        self.filters = filters if filters == 'auto' or not isinstance(filters, str) else parse_filters(filters)
+
+    def compress(self, input_path: str, output_path: str):
+        try:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
+
+            compressed_data = self.compress_bytes(original_data)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
+
+        except Exception as e:
+            log(f"Фильтры: Ошибка сжатия: {e}")
+            raise
+
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        filters = choose_filters(original_data) if self.filters == 'auto' else self.filters
+        log(f"Фильтры: {format_filters(filters)}")
+
+        output = io.BytesIO()
+        output.write(FILTER_MAGIC)
+        output.write(bytes([len(filters)]))
+        for name, width in filters:
+            output.write(bytes([FILTER_IDS[name], width]))
+
+        compressor = create_compressor(self.algorithm, self.dictionary)
+        output.write(compressor.compress_bytes(apply_filters(original_data, filters)))
+        return output.getvalue()
+
+    def decompress(self, input_path: str, output_path: str):
+        try:
+            with open(input_path, 'rb') as f:
+                decoded_data = self.decompress_bytes(f.read())
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
+
+        except Exception as e:
+            log(f"Фильтры: Ошибка распаковки: {e}")
+            raise
+
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        if not compressed_data.startswith(FILTER_MAGIC):
+            raise ValueError("Не валидный файл с фильтрами")
+
+        position = len(FILTER_MAGIC)
+        filters = []
+        for _ in range(compressed_data[position]):
+            filter_id, width = compressed_data[position + 1:position + 3]
+            if filter_id not in FILTER_NAMES or width not in WIDTHS:
+                raise ValueError(f"Неизвестный фильтр в заголовке: {filter_id}")
+            filters.append((FILTER_NAMES[filter_id], width))
+            position += 2
+        payload = compressed_data[position + 1:]
+
+        algorithm = detect_codec(payload[:8])
+        if algorithm is None:
+            raise ValueError("Формат данных под фильтрами не определен")
+        log(f"Фильтры: {format_filters(filters)}, алгоритм {algorithm}")
+
+        data = create_compressor(algorithm, self.dictionary).decompress_bytes(payload)
+        return remove_filters(data, filters)
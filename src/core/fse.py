@@ -0,0 +1,259 @@
+"""
+Энтропийный кодер tANS (FSE, Finite State Entropy).
+
+В отличие от Хаффмана, который тратит на символ целое число бит, tANS
+кодирует символ дробным числом бит: состояние кодера несет остаток
+вероятности в следующий символ. На перекошенных распределениях, таких как
+байты токенов LZ77, это дает выигрыш до бита на символ. Кодирование и
+декодирование идут по таблицам без обхода дерева.
+"""
+import io
+from src.models.fse_models import FSETable
+from src.utils.lru_cache import LRUCache
+from src.utils.profiler import PROFILER
+from src.utils.console import log
+
+FSE_MAGIC = b"FSE\0"  # Магическое число + версия
+
+MIN_TABLE_LOG = 5
+MAX_TABLE_LOG = 11
+
+# Таблицы по нормированным частотам: одинаковые распределения блоков не строятся заново
+FSE_TABLE_CACHE = LRUCache(maxsize=256, name='fse.tables')
+
+_MASKS = [(1 << bits) - 1 for bits in range(33)]
+
+
+def choose_table_log(data_size: int, symbol_count: int) -> int:
+    # Мелким блокам не нужна большая таблица, но в ней должно хватать мест на все символы
+    table_log = min(MAX_TABLE_LOG, max(MIN_TABLE_LOG, (data_size - 1).bit_length() - 2))
+    return max(table_log, (symbol_count - 1).bit_length())
+
+
+def normalize_counts(frequency: dict, table_log: int) -> dict:
+    """Масштабирует частоты так, чтобы их сумма была 2^table_log, каждому символу - хотя бы 1."""
+    table_size = 1 << table_log
+    total = sum(frequency.values())
+
+    normalized = {}
+    remainders = []
+    for symbol, count in frequency.items():
+        scaled = count * table_size
+        normalized[symbol] = max(1, scaled // total)
+        remainders.append((scaled % total, count, symbol))
+
+    diff = table_size - sum(normalized.values())
+    if diff > 0:
+        # Недостающие места отдаем символам с наибольшим дробным остатком
+        remainders.sort(reverse=True)
+        for i in range(diff):
+            normalized[remainders[i % len(remainders)][2]] += 1
+    while diff < 0:
+        # Лишние места забираем у самых частых символов
+        for symbol in sorted(normalized, key=lambda s: -normalized[s]):
+            if diff == 0:
+                break
+            if normalized[symbol] > 1:
+                normalized[symbol] -= 1
+                diff += 1
+
+    return normalized
+
+
+def build_table(normalized: dict, table_log: int) -> FSETable:
+    key = (table_log, tuple(sorted(normalized.items())))
+    table = FSE_TABLE_CACHE.get(key)
+    if table is not None:
+        return table
+
+    table_size = 1 << table_log
+    mask = table_size - 1
+    step = (table_size >> 1) + (table_size >> 3) + 3  # Нечетный шаг обходит все позиции
+
+    spread = [0] * table_size
+    position = 0
+    for symbol, count in key[1]:
+        for _ in range(count):
+            spread[position] = symbol
+            position = (position + step) & mask
+
+    decode = []
+    states = {symbol: [] for symbol in normalized}
+    counters = dict(normalized)
+    for state in range(table_size):
+        symbol = spread[state]
+        counter = counters[symbol]
+        counters[symbol] += 1
+        bits = table_log - (counter.bit_length() - 1)
+        decode.append((symbol, bits, (counter << bits) - table_size))
+        states[symbol].append(table_size + state)
+
+    encode = {}
+    for symbol, count in normalized.items():
+        max_bits = table_log - (count.bit_length() - 1)
+        encode[symbol] = (count, max_bits, count << max_bits, states[symbol])
+
+    table = FSETable(table_log, key[1], decode, encode)
+    FSE_TABLE_CACHE.put(key, table)
+    return table
+
+
+@PROFILER.timed('fse.encode')
+def encode_block(data: bytes) -> bytes:
+    """
+    Кодирует данные в самостоятельный блок: число символов, таблица частот
+    и поток бит. Символы кодируются с конца, чтобы декодер читал поток вперед.
+    """
+    output = io.BytesIO()
+    output.write(len(data).to_bytes(4, 'big'))
+    if not data:
+        return output.getvalue()
+
+    frequency = {}
+    for byte in data:
+        frequency[byte] = frequency.get(byte, 0) + 1
+
+    table_log = choose_table_log(len(data), len(frequency))
+    table = build_table(normalize_counts(frequency, table_log), table_log)
+
+    output.write(bytes([table_log]))
+    output.write(len(table.normalized).to_bytes(2, 'big'))
+    for symbol, count in table.normalized:
+        output.write(bytes([symbol]))
+        output.write(count.to_bytes(2, 'big'))
+
+    encode = table.encode
+    masks = _MASKS
+    values = []
+    bit_counts = []
+    state = 1 << table_log
+    for symbol in reversed(data):
+        count, max_bits, threshold, states = encode[symbol]
+        bits = max_bits if state >= threshold else max_bits - 1
+        values.append(state & masks[bits])
+        bit_counts.append(bits)
+        state = states[(state >> bits) - count]
+
+    # Биты первого закодированного символа декодеру не нужны - он на нем останавливается
+    values.reverse()
+    bit_counts.reverse()
+    values.pop()
+    bit_counts.pop()
+
+    buffer = bytearray()
+    accumulator = state - (1 << table_log)
+    accumulator_bits = table_log
+    for value, bits in zip(values, bit_counts):
+        accumulator = (accumulator << bits) | value
+        accumulator_bits += bits
+        if accumulator_bits >= 32:
+            accumulator_bits -= 32
+            buffer += (accumulator >> accumulator_bits).to_bytes(4, 'big')
+            accumulator &= masks[accumulator_bits]
+
+    if accumulator_bits:
+        padding_bits = -accumulator_bits % 8
+        buffer += (accumulator << padding_bits).to_bytes((accumulator_bits + padding_bits) // 8, 'big')
+
+    output.write(buffer)
+    PROFILER.count('fse.symbols_encoded', len(data))
+    PROFILER.count('fse.bits_written', len(buffer) * 8)
+    return output.getvalue()
+
+
+@PROFILER.timed('fse.decode')
+def decode_block(f) -> bytes:
+    """Читает блок encode_block из файла до конца потока."""
+    size_data = f.read(4)
+    if len(size_data) != 4:
+        raise ValueError("Неверный формат блока FSE")
+    symbol_count = int.from_bytes(size_data, 'big')
+    if symbol_count == 0:
+        return b""
+
+    table_log = f.read(1)[0]
+    if not MIN_TABLE_LOG <= table_log <= MAX_TABLE_LOG:
+        raise ValueError(f"Неверный размер таблицы FSE: {table_log}")
+
+    normalized = {}
+    for _ in range(int.from_bytes(f.read(2), 'big')):
+        entry = f.read(3)
+        normalized[entry[0]] = int.from_bytes(entry[1:], 'big')
+    if sum(normalized.values()) != 1 << table_log:
+        raise ValueError("Таблица частот FSE повреждена")
+
+    decode = build_table(normalized, table_log).decode
+    # Нули в конце позволяют дочитывать по 4 байта без проверок границы
+    stream = f.read() + bytes(8)
+    masks = _MASKS
+
+    output = bytearray(symbol_count)
+    accumulator = int.from_bytes(stream[:4], 'big')
+    accumulator_bits = 32
+    position = 4
+
+    accumulator_bits -= table_log
+    state = accumulator >> accumulator_bits
+    last = symbol_count - 1
+
+    for i in range(symbol_count):
+        symbol, bits, base = decode[state]
+        output[i] = symbol
+        if i == last:
+            break
+        if accumulator_bits < bits:
+            accumulator = ((accumulator & masks[accumulator_bits]) << 32) | \
+                int.from_bytes(stream[position:position + 4], 'big')
+            position += 4
+            accumulator_bits += 32
+        accumulator_bits -= bits
+        state = base + ((accumulator >> accumulator_bits) & masks[bits])
+
+    if position > len(stream):
+        raise ValueError("Поток FSE обрезан")
+
+    PROFILER.count('fse.symbols_decoded', symbol_count)
+    return bytes(output)
+
+
+class FSECompressor:
+    def compress(self, input_path: str, output_path: str):
+        try:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
+
+            compressed_data = self.compress_bytes(original_data)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
+
+            log(f"FSE: Сжато {len(original_data)} байтов в {len(compressed_data)}")
+
+        except Exception as e:
+            log(f"FSE: Ошибка сжатия: {e}")
+            raise
+
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        return FSE_MAGIC + encode_block(original_data)
+
+    def decompress(self, input_path: str, output_path: str):
+        try:
+            with open(input_path, 'rb') as f:
+                decoded_data = self._read_compressed(f)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
+
+            log(f"FSE: Распаковано {len(decoded_data)} байтов")
+
+        except Exception as e:
+            log(f"FSE: Ошибка распаковки: {e}")
+            raise
+
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
+
+    def _read_compressed(self, f) -> bytes:
+        if f.read(len(FSE_MAGIC)) != FSE_MAGIC:
+            raise ValueError("Не валидный файл FSE")
+        return decode_block(f)
@@ -1,16 +1,65 @@
+import io
+import os
 import pickle
-from src.models.huffman_models import Node, MinHeap
+from collections import Counter
+from src.models.huffman_models import Node, MinHeap, HuffmanTable
 from src.utils.bit_io import BitWriter, BitReader
+from src.utils.bit_packing import write_codes
+from src.utils.lru_cache import LRUCache
+from src.utils.profiler import PROFILER
+from src.utils.console import log
+
+# Общий для процесса кэш построенных таблиц: повторяющиеся таблицы
+# и таблицы словарей не строятся заново
+TABLE_CACHE = LRUCache(maxsize=256, name='huffman.tables')
+
+# Число независимых потоков бит в формате версии 2, как в Huff0
+STREAM_COUNT = 4
+
+# Версии формата для цепочки блоков (кадров потока): версия 3 хранит таблицу,
+# которую запоминает декодер, версия 4 таблицы не хранит и повторяет запомненную
+VERSION_REUSABLE = b"\3"
+VERSION_REPEAT = b"\4"
+
+
+def _decode_stream(frequency_items: tuple, stream: bytes, count: int) -> bytes:
+    """Декодирует один поток формата версии 2, в том числе в процессе пула."""
+    compressor = HuffmanCompressor()
+    root = compressor.load_table(dict(frequency_items))
+    decoded_data = compressor.decode_symbols(BitReader(io.BytesIO(stream)), root, count)
+    if len(decoded_data) != count:
+        raise ValueError(f"Поток Хаффмана обрезан: декодировано {len(decoded_data)} байтов, ожидалось {count}")
+    return bytes(decoded_data)
+
+
+def _stream_sizes(original_size: int) -> list:
+    segment_size = (original_size + STREAM_COUNT - 1) // STREAM_COUNT
+    return [min(segment_size, max(0, original_size - i * segment_size)) for i in range(STREAM_COUNT)]
+
 
 class HuffmanCompressor:
-    def __init__(self):
+    # Блоки от этого размера в формате версии 2 декодируются по потокам в пуле процессов
+    parallel_min_size = 1 << 22
+
+    def __init__(self, dictionary=None, streams=1, reuse_tables=False):
+        if streams not in (1, STREAM_COUNT):
+            raise ValueError(f"Число потоков Хаффмана должно быть 1 или {STREAM_COUNT}")
+        if reuse_tables and streams != 1:
+            raise ValueError("Повтор таблицы предыдущего блока поддерживается только для одного потока")
         self.codes = {}
         self.reverse_codes = {}
-
+        self.dictionary = dictionary
+        self.streams = streams
+        # Блоки сжимаются и распаковываются по порядку одним экземпляром:
+        # таблица прошлого блока версии 3 повторяется, если так выходит короче
+        self.reuse_tables = reuse_tables
+        self.previous_frequency = None
+        self.previous_lengths = None
+
+    @PROFILER.timed('huffman.frequency')
     def build_frequency_table(self, data):
-        frequency = {}
-        for byte in data:
-            frequency[byte] = frequency.get(byte, 0) + 1
+        # Counter считает на C и сохраняет порядок первого появления, как и прежний цикл
+        frequency = dict(Counter(data))
 
         # Добавляем специальный символ для конца данных (EOF)
         # Это поможет при декодировании, чтобы не читать лишние биты
@@ -51,6 +100,127 @@ class HuffmanCompressor:
         if root:
             self._build_codes_recursive(root, "")
 
+    def code_lengths(self, frequency) -> dict:
+        root = self.build_huffman_tree(frequency)
+        lengths = {}
+        stack = [(root, 0)] if root else []
+        while stack:
+            node, depth = stack.pop()
+            if node.symbol is not None:
+                # Единственный символ в дереве все равно кодируется одним битом
+                lengths[node.symbol] = max(depth, 1)
+            else:
+                stack.append((node.right, depth + 1))
+                stack.append((node.left, depth + 1))
+        return lengths
+
+    def build_canonical_codes(self, code_lengths: dict):
+        """Строит канонические коды: коды однозначно задаются одними длинами."""
+        self.codes = {}
+        self.reverse_codes = {}
+
+        code = 0
+        previous_length = 0
+        for symbol, length in sorted(code_lengths.items(), key=lambda item: (item[1], item[0])):
+            code <<= length - previous_length
+            bit_string = format(code, f'0{length}b')
+            self.codes[symbol] = bit_string
+            self.reverse_codes[bit_string] = symbol
+            code += 1
+            previous_length = length
+
+    def build_tree_from_codes(self):
+        root = Node(0)
+        for bit_string, symbol in self.reverse_codes.items():
+            node = root
+            for bit_char in bit_string[:-1]:
+                if bit_char == '0':
+                    node.left = node.left or Node(0)
+                    node = node.left
+                else:
+                    node.right = node.right or Node(0)
+                    node = node.right
+
+            if bit_string[-1] == '0':
+                node.left = Node(0, symbol)
+            else:
+                node.right = Node(0, symbol)
+        return root
+
+    @PROFILER.timed('huffman.table')
+    def load_table(self, frequency):
+        """Строит коды и дерево по таблице частот через кэш, возвращает корень дерева."""
+        # Порядок символов влияет на разбор равных частот в куче, поэтому входит в ключ
+        key = ('frequency', tuple(frequency.items()))
+        table = TABLE_CACHE.get(key)
+        if table is None:
+            root = self.build_huffman_tree(frequency)
+            self.build_codes(root)
+            table = HuffmanTable(self.codes, self.reverse_codes, root)
+            TABLE_CACHE.put(key, table)
+
+        self.codes = table.codes
+        self.reverse_codes = table.reverse_codes
+        return table.root
+
+    @PROFILER.timed('huffman.table')
+    def load_canonical_table(self, code_lengths: dict):
+        """Строит канонические коды и дерево по длинам кодов через кэш."""
+        key = ('lengths', tuple(sorted(code_lengths.items())))
+        table = TABLE_CACHE.get(key)
+        if table is None:
+            self.build_canonical_codes(code_lengths)
+            table = HuffmanTable(self.codes, self.reverse_codes, self.build_tree_from_codes())
+            TABLE_CACHE.put(key, table)
+
+        self.codes = table.codes
+        self.reverse_codes = table.reverse_codes
+        return table.root
+
+    @PROFILER.timed('huffman.encode')
+    def encode_symbols(self, bit_writer, data, eof=True) -> int:
+        """Кодирует данные текущими кодами и дописывает маркер EOF, возвращает число бит."""
+        # Коды всего буфера пакуются блоками, без цикла по битам
+        total_bits = write_codes(bit_writer, data, self.codes)
+
+        if eof:
+            eof_code = self.codes[256]
+            bit_writer.write_bits(eof_code)
+            total_bits += len(eof_code)
+
+        PROFILER.count('huffman.symbols_encoded', len(data) + eof)
+        PROFILER.count('huffman.bits_written', total_bits)
+        return total_bits
+
+    @PROFILER.timed('huffman.decode')
+    def decode_symbols(self, bit_reader, root, max_symbols=None) -> bytearray:
+        """Декодирует символы до маркера EOF, конца потока или max_symbols."""
+        decoded_data = bytearray()
+        current_node = root
+
+        while max_symbols is None or len(decoded_data) < max_symbols:
+            bit = bit_reader.read_bit()
+            if bit == -1:
+                break
+
+            if bit == 0:
+                current_node = current_node.left
+            else:
+                current_node = current_node.right
+
+            if current_node is None:
+                raise ValueError("Неверный код Хаффмана в потоке")
+
+            if current_node.symbol is not None:
+                if current_node.symbol == 256:  # EOF маркер
+                    break
+                decoded_data.append(current_node.symbol)
+                current_node = root
+
+        PROFILER.count('huffman.symbols_decoded', len(decoded_data))
+        PROFILER.count('huffman.bits_read', bit_reader.get_total_bits_read())
+        return decoded_data
+
     def serialize_tree(self, root):
         frequency = {}
         stack = [root]
@@ -66,137 +236,242 @@ class HuffmanCompressor:
 
     def compress(self, input_path, output_path):
         try:
-            with open(input_path, 'rb') as f:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
                 original_data = f.read()
 
-            original_size = len(original_data)
+            if original_data:
+                log(f"Прочитано {len(original_data)} байтов из {input_path}")
 
-            if original_size == 0:
-                with open(output_path, 'wb') as f:
-                    f.write(b"HUFFMAN")  # Магическое число
-                    f.write(b"\0")  # Версия формата
-                    f.write((0).to_bytes(4, 'big'))
-                    f.write((0).to_bytes(4, 'big'))
-                print("Сжатие пустого файла завершено")
-                return
+            compressed_data = self.compress_bytes(original_data)
 
-            print(f"Прочитано {original_size} байтов из {input_path}")
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
 
-            frequency = self.build_frequency_table(original_data)
-            print(f"Таблица частоты построенная из {len(frequency)} символов")
-
-            root = self.build_huffman_tree(frequency)
-            if not root:
-                raise ValueError("Ошибка построения дерева Хаффмана")
-
-            self.build_codes(root)
-            max_code_length = max(len(code) for code in self.codes.values())
-            print(f"Таблица кодов построена. Максимальная длина кода: {max_code_length}")
-
-            with open(output_path, 'wb') as f:
-                f.write(b"HUFFMAN")  # Магическое число
-                f.write(b"\0")  # Версия формата
-
-                f.write(original_size.to_bytes(4, 'big'))
-
-                tree_data = pickle.dumps(frequency)
-                tree_size = len(tree_data)
-                f.write(tree_size.to_bytes(4, 'big'))
-                f.write(tree_data)
-
-                bit_writer = BitWriter(f)
-                total_bits = 0
-
-                for byte in original_data:
-                    code = self.codes[byte]
-                    bit_writer.write_bits(code)
-                    total_bits += len(code)
-
-                eof_code = self.codes[256]
-                bit_writer.write_bits(eof_code)
-                total_bits += len(eof_code)
-
-                padding_bits = bit_writer.flush()
-
-                print(f"Биты заполнения: {padding_bits}")
+            if not original_data:
+                log("Сжатие пустого файла завершено")
 
         except Exception as e:
-            print(f"Ошибка сжатия: {e}")
+            log(f"Ошибка сжатия: {e}")
             raise
 
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        output = io.BytesIO()
+        original_size = len(original_data)
+
+        output.write(b"HUFFMAN")  # Магическое число
+
+        if original_size == 0:
+            output.write(b"\0")  # Версия формата
+            output.write((0).to_bytes(4, 'big'))
+            output.write((0).to_bytes(4, 'big'))
+            return output.getvalue()
+
+        if self.dictionary is not None:
+            # Версия 1: статические коды словаря, таблица не хранится
+            output.write(b"\1")
+            output.write(original_size.to_bytes(4, 'big'))
+            output.write(self.dictionary.dict_id.to_bytes(4, 'big'))
+
+            self.load_canonical_table(self.dictionary.literal_code_lengths)
+            bit_writer = BitWriter(output)
+            self.encode_symbols(bit_writer, original_data)
+            bit_writer.flush()
+            return output.getvalue()
+
+        frequency = self.build_frequency_table(original_data)
+        log(f"Таблица частоты построенная из {len(frequency)} символов")
+
+        root = self.load_table(frequency)
+        if not root:
+            raise ValueError("Ошибка построения дерева Хаффмана")
+
+        max_code_length = max(len(code) for code in self.codes.values())
+        log(f"Таблица кодов построена. Максимальная длина кода: {max_code_length}")
+
+        tree_data = pickle.dumps(frequency)
+        if self.reuse_tables:
+            if self._should_repeat_table(frequency, len(tree_data)):
+                return self._compress_repeated(output, original_data)
+            output.write(VERSION_REUSABLE)
+            self.previous_frequency = frequency
+            self.previous_lengths = {symbol: len(code) for symbol, code in self.codes.items()}
+        else:
+            output.write(b"\2" if self.streams == STREAM_COUNT else b"\0")  # Версия формата
+
+        output.write(original_size.to_bytes(4, 'big'))
+
+        tree_size = len(tree_data)
+        output.write(tree_size.to_bytes(4, 'big'))
+        output.write(tree_data)
+
+        if self.streams == STREAM_COUNT:
+            self._write_streams(output, original_data)
+            return output.getvalue()
+
+        bit_writer = BitWriter(output)
+        total_bits = self.encode_symbols(bit_writer, original_data)
+        padding_bits = bit_writer.flush()
+
+        log(f"Биты заполнения: {padding_bits}")
+        return output.getvalue()
+
+    def _should_repeat_table(self, frequency: dict, tree_size: int) -> bool:
+        """
+        Сравнивает размер блока в битах с таблицей прошлого блока и с новой
+        таблицей вместе с ее заголовком. Прошлая таблица не подходит, если в
+        ней нет какого-то символа блока.
+        """
+        if self.previous_lengths is None:
+            return False
+        if any(symbol not in self.previous_lengths for symbol in frequency):
+            return False
+
+        repeat_bits = sum(count * self.previous_lengths[symbol] for symbol, count in frequency.items())
+        new_bits = (tree_size + 4) * 8 + sum(count * len(self.codes[symbol]) for symbol, count in frequency.items())
+        return repeat_bits < new_bits
+
+    def _compress_repeated(self, output, original_data: bytes) -> bytes:
+        """Версия 4: данные кодируются таблицей прошлого блока, таблица не хранится."""
+        output.write(VERSION_REPEAT)
+        output.write(len(original_data).to_bytes(4, 'big'))
+
+        self.load_table(self.previous_frequency)
+        bit_writer = BitWriter(output)
+        self.encode_symbols(bit_writer, original_data)
+        bit_writer.flush()
+
+        PROFILER.count('huffman.tables_repeated')
+        log("Повторена таблица Хаффмана предыдущего блока")
+        return output.getvalue()
+
+    def _write_streams(self, output, original_data: bytes):
+        """
+        Версия 2: данные делятся на 4 равных отрезка, каждый кодируется в свой
+        поток бит без маркера EOF. Таблица переходов из размеров первых трех
+        потоков позволяет начать декодирование всех четырех сразу.
+        """
+        streams = []
+        position = 0
+        for size in _stream_sizes(len(original_data)):
+            stream = io.BytesIO()
+            bit_writer = BitWriter(stream)
+            self.encode_symbols(bit_writer, original_data[position:position + size], eof=False)
+            bit_writer.flush()
+            streams.append(stream.getvalue())
+            position += size
+
+        for stream in streams[:-1]:
+            output.write(len(stream).to_bytes(4, 'big'))
+        for stream in streams:
+            output.write(stream)
+        log(f"Записано {STREAM_COUNT} потока: {', '.join(str(len(stream)) for stream in streams)} байтов")
+
+    @PROFILER.timed('huffman.decode_streams')
+    def _read_streams(self, f, frequency: dict, original_size: int) -> bytes:
+        jump_table = [int.from_bytes(f.read(4), 'big') for _ in range(STREAM_COUNT - 1)]
+        data = f.read()
+        if sum(jump_table) > len(data):
+            raise ValueError("Неверная таблица переходов потоков Хаффмана")
+
+        streams = []
+        position = 0
+        for size in jump_table + [len(data) - sum(jump_table)]:
+            streams.append(data[position:position + size])
+            position += size
+
+        frequency_items = tuple(frequency.items())
+        tasks = [(frequency_items, stream, count) for stream, count in zip(streams, _stream_sizes(original_size))]
+
+        workers = min(STREAM_COUNT, os.cpu_count() or 1)
+        if original_size < self.parallel_min_size or workers <= 1:
+            return b"".join(_decode_stream(*task) for task in tasks)
+
+        # Потоки независимы: декодируем их одновременно, по процессу на поток
+        from concurrent.futures import ProcessPoolExecutor
+        from src.utils.console import is_quiet, set_quiet
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_quiet, initargs=(is_quiet(),)) as executor:
+            return b"".join(executor.map(_decode_stream, *zip(*tasks)))
+
     def deserialize_tree(self, frequency):
         return self.build_huffman_tree(frequency)
 
     def decompress(self, input_path, output_path):
         try:
             with open(input_path, 'rb') as f:
-                magic = f.read(7)
-                if magic != b"HUFFMAN":
-                    raise ValueError("Не валидный файл")
+                decoded_data = self._read_compressed(f)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as out_file:
+                out_file.write(decoded_data)
 
-                version = f.read(1)  # Пропускаем версию
+            if decoded_data:
+                log(f"Распаковка завершена. Получено {len(decoded_data)} байтов")
 
-                original_size_data = f.read(4)
-                if len(original_size_data) != 4:
-                    raise ValueError("Неверный формат файла")
-                original_size = int.from_bytes(original_size_data, 'big')
+        except Exception as e:
+            log(f"Ошибка распаковки: {e}")
+            raise
 
-                if original_size == 0:
-                    print("Пустой файл")
-                    with open(output_path, 'wb') as out_file:
-                        out_file.write(b"")
-                    return
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
 
-                tree_size_data = f.read(4)
-                if len(tree_size_data) != 4:
-                    raise ValueError("Неверный формат файла")
-                tree_size = int.from_bytes(tree_size_data, 'big')
+    def _read_compressed(self, f) -> bytes:
+        magic = f.read(7)
+        if magic != b"HUFFMAN":
+            raise ValueError("Не валидный файл")
 
-                tree_data = f.read(tree_size)
-                if len(tree_data) != tree_size:
-                    raise ValueError("Неверный формат файла")
+        version = f.read(1)
 
-                frequency = pickle.loads(tree_data)
+        original_size_data = f.read(4)
+        if len(original_size_data) != 4:
+            raise ValueError("Неверный формат файла")
+        original_size = int.from_bytes(original_size_data, 'big')
 
-                root = self.deserialize_tree(frequency)
-                self.build_codes(root)
+        if original_size == 0:
+            log("Пустой файл")
+            return b""
 
-                print(f"Оригинальный размер: {original_size} байтов")
-                print(f"Дерево восстановлено {len(frequency)} символов")
+        if version == b"\1":
+            dictionary = self._require_dictionary(f)
+            root = self.load_canonical_table(dictionary.literal_code_lengths)
+        elif version == VERSION_REPEAT:
+            if self.previous_frequency is None:
+                raise ValueError("Блок Хаффмана повторяет таблицу предыдущего блока, но такого блока не было")
+            root = self.load_table(self.previous_frequency)
+        else:
+            tree_size_data = f.read(4)
+            if len(tree_size_data) != 4:
+                raise ValueError("Неверный формат файла")
+            tree_size = int.from_bytes(tree_size_data, 'big')
 
-                bit_reader = BitReader(f)
-                decoded_data = bytearray()
-                current_node = root
-                bits_decoded = 0
+            tree_data = f.read(tree_size)
+            if len(tree_data) != tree_size:
+                raise ValueError("Неверный формат файла")
 
-                while len(decoded_data) < original_size:
-                    bit = bit_reader.read_bit()
-                    if bit == -1:
-                        if len(decoded_data) < original_size:
-                            print(f"Предупреждение: EOF достигнуто но только {len(decoded_data)} байтов декодировано")
-                        break
+            frequency = pickle.loads(tree_data)
 
-                    bits_decoded += 1
+            root = self.load_table(frequency)
+            if version == VERSION_REUSABLE:
+                self.previous_frequency = frequency
 
-                    if bit == 0:
-                        current_node = current_node.left
-                    else:
-                        current_node = current_node.right
+            log(f"Оригинальный размер: {original_size} байтов")
+            log(f"Дерево восстановлено {len(frequency)} символов")
 
-                    if current_node and current_node.symbol is not None:
-                        if current_node.symbol == 256:  # EOF маркер
-                            break
-                        decoded_data.append(current_node.symbol)
-                        current_node = root
+            if version == b"\2":
+                return self._read_streams(f, frequency, original_size)
 
-                if len(decoded_data) != original_size:
-                    print(f"Предупреждение: декодировано {len(decoded_data)} байтов, ожидалось {original_size}")
+        bit_reader = BitReader(f)
+        decoded_data = self.decode_symbols(bit_reader, root, original_size)
 
-                with open(output_path, 'wb') as out_file:
-                    out_file.write(decoded_data)
+        if len(decoded_data) != original_size:
+            log(f"Предупреждение: декодировано {len(decoded_data)} байтов, ожидалось {original_size}")
 
-                print(f"Распаковка завершена. Получено {len(decoded_data)} байтов")
+        return bytes(decoded_data)
 
-        except Exception as e:
-            print(f"Ошибка распаковки: {e}")
-            raise
\ No newline at end of file
+    def _require_dictionary(self, f):
+        dict_id = int.from_bytes(f.read(4), 'big')
+        if self.dictionary is None:
+            raise ValueError(f"Файл сжат со словарем {dict_id:08x}, укажите его через --dict")
+        if self.dictionary.dict_id != dict_id:
+            raise ValueError(f"Файл сжат со словарем {dict_id:08x}, "
+                             f"а передан словарь {self.dictionary.dict_id:08x}")
+        return self.dictionary
@@ -0,0 +1,157 @@
+"""
+Поиск дальних совпадений перед обычным сжатием.
+
+Окно LZ77 ограничено window_size байтами (не больше 65535 из-за 2-байтового
+поля), а длина совпадения - упреждающим буфером. Этот проход индексирует
+все входные данные: хеш каждого LONG_CHUNK_SIZE-го фрагмента попадает в
+словарь, а каждая позиция ищется в нем, так что повторы находятся на любом
+расстоянии. Совпадения от LONG_MIN_MATCH байтов становятся командами
+копирования, остальное сжимается выбранным алгоритмом как обычно.
+
+Формат: LONG_MAGIC, размер данных (8), число команд (4), длина сжатых
+команд (4), сжатые команды (длина литералов (4), расстояние (8) и длина (8)
+копии) и сжатые литералы.
+"""
+import io
+from typing import List, Tuple
+from src.core.registry import create_compressor, DEFAULT_CODEC
+from src.core.patch import encode_command_data, decode_command_data, decompress_part
+from src.utils.match_finder import match_length
+from src.utils.profiler import PROFILER
+from src.utils.console import log
+
+LONG_MAGIC = b"LDM\0"  # Магическое число + версия
+
+LONG_CHUNK_SIZE = 32
+LONG_MIN_MATCH = 64  # Не меньше 2 x LONG_CHUNK_SIZE - 1, чтобы такие совпадения находились всегда
+
+
+@PROFILER.timed('long.match')
+def find_long_matches(data: bytes) -> Tuple[List[Tuple[int, int, int]], bytes]:
+    """Возвращает команды (длина литералов, расстояние, длина копии) и оставшиеся литералы."""
+    data = bytes(data)  # hash() берется только от неизменяемого буфера
+    view = memoryview(data)
+    index = {}
+    next_indexed = 0
+    commands = []
+    literals = bytearray()
+    literal_start = 0
+    position = 0
+    last = len(data) - LONG_CHUNK_SIZE
+
+    while position <= last:
+        # В индексе только фрагменты, начинающиеся до текущей позиции
+        while next_indexed < position:
+            index[hash(view[next_indexed:next_indexed + LONG_CHUNK_SIZE])] = next_indexed
+            next_indexed += LONG_CHUNK_SIZE
+
+        source = index.get(hash(view[position:position + LONG_CHUNK_SIZE]))
+        if source is None:
+            position += 1
+            continue
+
+        # Совпадение начинается не раньше чем за фрагмент до найденной позиции,
+        # иначе его нашли бы на предыдущем выровненном фрагменте
+        start = position
+        min_start = max(literal_start, position - LONG_CHUNK_SIZE)
+        while start > min_start and source > 0 and data[start - 1] == data[source - 1]:
+            start -= 1
+            source -= 1
+        # Хеш может совпасть случайно, match_length проверяет сами данные.
+        # Копия может перекрывать сама себя - тогда она повторяет период start - source
+        length = match_length(view, source, view, start)
+        if length < LONG_MIN_MATCH:
+            position += 1
+            continue
+
+        literals += view[literal_start:start]
+        commands.append((start - literal_start, start - source, length))
+        position = literal_start = start + length
+
+    if literal_start < len(data) or not commands:
+        literals += view[literal_start:]
+        commands.append((len(data) - literal_start, 0, 0))
+    return commands, bytes(literals)
+
+
+class LongRangeCompressor:
+    def __init__(self, algorithm=DEFAULT_CODEC):
+        self.algorithm = algorithm
+
+    def compress(self, input_path: str, output_path: str):
+        try:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
+
+            compressed_data = self.compress_bytes(original_data)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
+
+        except Exception as e:
+            log(f"Дальние совпадения: Ошибка сжатия: {e}")
+            raise
+
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        commands, literals = find_long_matches(original_data)
+        log(f"Дальние совпадения: {len(commands) - 1} копий, {len(original_data) - len(literals)} байтов "
+            f"из {len(original_data)}")
+
+        compressor = create_compressor(self.algorithm)
+        compressed_commands = compressor.compress_bytes(encode_command_data(commands))
+
+        output = io.BytesIO()
+        output.write(LONG_MAGIC)
+        output.write(len(original_data).to_bytes(8, 'big'))
+        output.write(len(commands).to_bytes(4, 'big'))
+        output.write(len(compressed_commands).to_bytes(4, 'big'))
+        output.write(compressed_commands)
+        output.write(compressor.compress_bytes(literals))
+        return output.getvalue()
+
+    def decompress(self, input_path: str, output_path: str):
+        try:
+            with open(input_path, 'rb') as f:
+                decoded_data = self.decompress_bytes(f.read())
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
+
+            log(f"Дальние совпадения: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+
+        except Exception as e:
+            log(f"Дальние совпадения: Ошибка распаковки: {e}")
+            raise
+
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        if not compressed_data.startswith(LONG_MAGIC):
+            raise ValueError("Не валидный файл с дальними совпадениями")
+
+        f = io.BytesIO(compressed_data)
+        f.seek(len(LONG_MAGIC))
+        original_size = int.from_bytes(f.read(8), 'big')
+        command_count = int.from_bytes(f.read(4), 'big')
+        command_data = decompress_part(f.read(int.from_bytes(f.read(4), 'big')))
+        commands = decode_command_data(command_data, command_count)
+        literals = decompress_part(f.read())
+
+        with PROFILER.stage('long.apply'):
+            output = bytearray()
+            literal_pos = 0
+            for literal_length, distance, length in commands:
+                output += literals[literal_pos:literal_pos + literal_length]
+                literal_pos += literal_length
+                if length:
+                    start = len(output) - distance
+                    if start < 0 or distance == 0:
+                        raise ValueError("Данные повреждены: неверная копия")
+                    if distance >= length:
+                        # Копия не перекрывает сама себя: берется только нужный отрезок, а не весь хвост
+                        output += output[start:start + length]
+                    else:
+                        period = output[start:]
+                        output += period * (length // distance) + period[:length % distance]
+
+        if len(output) != original_size:
+            raise ValueError(f"Данные повреждены: распаковано {len(output)} байтов, ожидалось {original_size}")
+        return bytes(output)
@@ -1,11 +1,16 @@
+import io
 from typing import Tuple
 from src.models.lz77_models import LZ77Token, SlidingWindow
+from src.utils.profiler import PROFILER
+from src.utils.console import log
 
 
 class LZ77Compressor:
-    def __init__(self, window_size=4096, lookahead_size=18):
+    def __init__(self, window_size=4096, lookahead_size=18, max_chain=None):
         self.window_size = window_size
         self.lookahead_size = lookahead_size
+        # Глубина поиска: сколько кандидатов проверять (None - все в окне); формат не меняется
+        self.max_chain = max_chain
 
     def find_longest_match(self, search_buffer: bytes, lookahead_buffer: bytes) -> Tuple[int, int]:
 
@@ -18,138 +23,183 @@ class LZ77Compressor:
         best_offset = 0
         best_length = 0
 
-        for offset in range(1, min(search_len, self.window_size) + 1):
-            search_start = search_len - offset
+        # Кандидаты - только позиции с совпадающим первым байтом, их ищет rfind,
+        # обход идет от ближних смещений к дальним, как и при полном переборе
+        window_start = max(0, search_len - self.window_size)
+        first_byte = lookahead_buffer[0]
+        search_start = search_buffer.rfind(first_byte, window_start)
+        candidates = self.max_chain
+
+        while search_start >= 0:
+            offset = search_len - search_start
             current_length = 0
 
             while (current_length < lookahead_len and
                    current_length < offset and
-                   search_start + current_length < search_len and
                    search_buffer[search_start + current_length] == lookahead_buffer[current_length]):
                 current_length += 1
 
             if current_length > best_length:
                 best_length = current_length
                 best_offset = offset
+                if best_length == lookahead_len:
+                    break
+
+            if candidates is not None:
+                candidates -= 1
+                if not candidates:
+                    break
+            search_start = search_buffer.rfind(first_byte, window_start, search_start)
 
         return best_offset, best_length
 
     def compress(self, input_path: str, output_path: str):
         try:
-            with open(input_path, 'rb') as f:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
                 original_data = f.read()
 
-            original_size = len(original_data)
-            if original_size == 0:
-                self._write_empty_file(output_path)
-                return
+            if original_data:
+                log(f"LZ77: Чтение {len(original_data)} байтов из {input_path}")
 
-            print(f"LZ77: Чтение {original_size} байтов из {input_path}")
+            compressed_data = self.compress_bytes(original_data)
 
-            window = SlidingWindow(self.window_size, self.lookahead_size)
-            window.add_data(original_data)
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
 
-            tokens = []
-            total_compressed_size = 0
+        except Exception as e:
+            log(f"LZ77 Ошибка сжатия: {e}")
+            raise
 
-            while window.has_more_data():
-                search_buffer = window.get_search_buffer()
-                lookahead_buffer = window.get_lookahead_buffer()
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        output = io.BytesIO()
+        original_size = len(original_data)
+        if original_size == 0:
+            self._write_empty_file(output)
+            return output.getvalue()
 
-                if not lookahead_buffer:
-                    break
+        tokens = self.encode_tokens(original_data)
+        self._write_compressed_data(output, tokens, original_size)
 
-                offset, length = self.find_longest_match(search_buffer, lookahead_buffer)
+        log(f"LZ77: Сжатие завершено. Токенов: {len(tokens)}")
+        return output.getvalue()
 
-                if length < len(lookahead_buffer):
-                    next_char = lookahead_buffer[length]
-                    advance_by = length + 1
-                else:
-                    next_char = 0
-                    advance_by = length
+    @PROFILER.timed('lz77.match')
+    def encode_tokens(self, original_data: bytes, history: bytes = b"") -> list:
+        """Кодирует данные в токены; history - предустановленная история окна (словарь)."""
+        window = SlidingWindow(self.window_size, self.lookahead_size)
+        window.add_data(history[-self.window_size:] if history else b"")
+        window.advance(len(window.data))
+        window.add_data(original_data)
 
-                token = LZ77Token(offset, length, next_char)
-                tokens.append(token)
+        tokens = []
 
-                window.advance(advance_by)
+        while window.has_more_data():
+            search_buffer = window.get_search_buffer()
+            lookahead_buffer = window.get_lookahead_buffer()
 
-                token_size = 2 + 1 + 1  # offset (2 байта) + length (1 байт) + char (1 байт)
-                total_compressed_size += token_size
+            if not lookahead_buffer:
+                break
 
-            self._write_compressed_data(output_path, tokens, original_size)
+            offset, length = self.find_longest_match(search_buffer, lookahead_buffer)
 
-            print(f"LZ77: Сжатие завершено. Токенов: {len(tokens)}")
+            if length < len(lookahead_buffer):
+                next_char = lookahead_buffer[length]
+                advance_by = length + 1
+            else:
+                next_char = 0
+                advance_by = length
 
-        except Exception as e:
-            print(f"LZ77 Ошибка сжатия: {e}")
-            raise
+            tokens.append(LZ77Token(offset, length, next_char))
+            window.advance(advance_by)
+
+        if PROFILER.enabled:
+            PROFILER.count('lz77.tokens', len(tokens))
+            PROFILER.observe('lz77.match_length', (token.length for token in tokens))
+        return tokens
 
     def decompress(self, input_path: str, output_path: str):
         try:
             with open(input_path, 'rb') as f:
-                magic = f.read(6)
-                if magic != b"LZ77\0\0":
-                    raise ValueError("Не валидный LZ77 сжатый файл")
-
-                window_size = int.from_bytes(f.read(2), 'big')
-                lookahead_size = int.from_bytes(f.read(1), 'big')
-                original_size = int.from_bytes(f.read(4), 'big')
-
-                if original_size == 0:
-                    with open(output_path, 'wb') as out_f:
-                        out_f.write(b"")
-                    return
-
-                tokens = []
-                while True:
-                    token_data = f.read(4)
-                    if not token_data or len(token_data) < 4:
-                        break
-
-                    offset = int.from_bytes(token_data[0:2], 'big')
-                    length = token_data[2]
-                    next_char = token_data[3]
-
-                    tokens.append(LZ77Token(offset, length, next_char))
-
-            decoded_data = bytearray()
-
-            for token in tokens:
-                if token.offset > 0:
-                    start_pos = len(decoded_data) - token.offset
-                    for i in range(token.length):
-                        decoded_data.append(decoded_data[start_pos + i])
-
-                if token.next_char != 0:
-                    decoded_data.append(token.next_char)
-
-            if len(decoded_data) != original_size:
-                print(f"LZ77 Предупреждение: декодированы {len(decoded_data)} байтов, ожидалось {original_size}")
+                decoded_data = self._read_compressed(f)
 
-            with open(output_path, 'wb') as f:
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
                 f.write(decoded_data)
 
-            print(f"LZ77: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+            if decoded_data:
+                log(f"LZ77: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
 
         except Exception as e:
-            print(f"LZ77 Ошибка распаковки: {e}")
+            log(f"LZ77 Ошибка распаковки: {e}")
             raise
 
-    def _write_empty_file(self, output_path: str):
-        with open(output_path, 'wb') as f:
-            f.write(b"LZ77\0\0")  # Магическое число + версия
-            f.write((0).to_bytes(2, 'big'))  # window_size
-            f.write((0).to_bytes(1, 'big'))  # lookahead_size
-            f.write((0).to_bytes(4, 'big'))  # original_size
-
-    def _write_compressed_data(self, output_path: str, tokens: list, original_size: int):
-        with open(output_path, 'wb') as f:
-            f.write(b"LZ77\0\0")  # Магическое число + версия
-            f.write(self.window_size.to_bytes(2, 'big'))
-            f.write(self.lookahead_size.to_bytes(1, 'big'))
-            f.write(original_size.to_bytes(4, 'big'))
-
-            for token in tokens:
-                f.write(token.offset.to_bytes(2, 'big'))
-                f.write(token.length.to_bytes(1, 'big'))
-                f.write(token.next_char.to_bytes(1, 'big'))
\ No newline at end of file
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
+
+    def _read_compressed(self, f) -> bytes:
+        magic = f.read(6)
+        if magic != b"LZ77\0\0":
+            raise ValueError("Не валидный LZ77 сжатый файл")
+
+        window_size = int.from_bytes(f.read(2), 'big')
+        lookahead_size = int.from_bytes(f.read(1), 'big')
+        original_size = int.from_bytes(f.read(4), 'big')
+
+        if original_size == 0:
+            return b""
+
+        tokens = []
+        while True:
+            token_data = f.read(4)
+            if not token_data or len(token_data) < 4:
+                break
+
+            offset = int.from_bytes(token_data[0:2], 'big')
+            length = token_data[2]
+            next_char = token_data[3]
+
+            tokens.append(LZ77Token(offset, length, next_char))
+
+        decoded_data = self.decode_tokens(tokens, lookahead_size)
+
+        if len(decoded_data) < original_size:
+            log(f"LZ77 Предупреждение: декодированы {len(decoded_data)} байтов, ожидалось {original_size}")
+
+        return bytes(decoded_data[:original_size])
+
+    @staticmethod
+    @PROFILER.timed('lz77.decode')
+    def decode_tokens(tokens: list, lookahead_size: int, history: bytes = b"") -> bytearray:
+        decoded_data = bytearray(history)
+
+        for token in tokens:
+            if token.offset > 0:
+                start_pos = len(decoded_data) - token.offset
+                for i in range(token.length):
+                    decoded_data.append(decoded_data[start_pos + i])
+
+            # Совпадение на всю длину упреждающего буфера не несет символа,
+            # иначе next_char - настоящий байт (в том числе нулевой).
+            # Лишний символ-заполнитель последнего токена отсекается по original_size
+            if token.length < lookahead_size:
+                decoded_data.append(token.next_char)
+
+        if history:
+            del decoded_data[:len(history)]
+        return decoded_data
+
+    def _write_empty_file(self, f):
+        f.write(b"LZ77\0\0")  # Магическое число + версия
+        f.write((0).to_bytes(2, 'big'))  # window_size
+        f.write((0).to_bytes(1, 'big'))  # lookahead_size
+        f.write((0).to_bytes(4, 'big'))  # original_size
+
+    def _write_compressed_data(self, f, tokens: list, original_size: int):
+        f.write(b"LZ77\0\0")  # Магическое число + версия
+        f.write(self.window_size.to_bytes(2, 'big'))
+        f.write(self.lookahead_size.to_bytes(1, 'big'))
+        f.write(original_size.to_bytes(4, 'big'))
+
+        for token in tokens:
+            f.write(token.offset.to_bytes(2, 'big'))
+            f.write(token.length.to_bytes(1, 'big'))
+            f.write(token.next_char.to_bytes(1, 'big'))
@@ -0,0 +1,188 @@
+"""
+Сжатие относительно опорного файла (предыдущей версии).
+
+Опорный файл индексируется целиком: каждые PATCH_CHUNK_SIZE байтов
+попадают в словарь по содержимому, так что совпадение находится на любом
+расстоянии, а не только в окне LZ77. Новый файл кодируется командами
+"вставить литералы, затем скопировать диапазон опорного файла"; литералы
+и команды сжимаются выбранным алгоритмом. Неизмененные участки
+сравниваются срезами по MATCH_STEP байтов, поэтому время сжатия
+растет с объемом изменений, а не с размером файла.
+
+Формат: PATCH_MAGIC, размер (8) и CRC32 (4) опорного файла, размер
+данных (8), число команд (4), длина сжатых команд (4), сжатые команды
+(длина литералов (4), смещение (8) и длина (8) копии) и сжатые литералы.
+"""
+import io
+import zlib
+from typing import List, Tuple
+from src.core.registry import create_compressor, detect_codec, DEFAULT_CODEC
+from src.utils.match_finder import match_length
+from src.utils.profiler import PROFILER
+from src.utils.console import log
+
+PATCH_MAGIC = b"PATCH\0"  # Магическое число + версия
+
+PATCH_CHUNK_SIZE = 32  # Совпадения короче 2 x PATCH_CHUNK_SIZE могут не найтись
+COMMAND_SIZE = 20
+
+
+def encode_command_data(commands: List[Tuple[int, int, int]]) -> bytes:
+    """Команды (длина литералов (4), смещение (8), длина копии (8)) в байты."""
+    command_data = bytearray()
+    for literal_length, offset, length in commands:
+        command_data += literal_length.to_bytes(4, 'big')
+        command_data += offset.to_bytes(8, 'big')
+        command_data += length.to_bytes(8, 'big')
+    return bytes(command_data)
+
+
+def decode_command_data(command_data: bytes, command_count: int) -> List[Tuple[int, int, int]]:
+    if len(command_data) != command_count * COMMAND_SIZE:
+        raise ValueError("Данные повреждены: неверное число команд")
+    return [(int.from_bytes(command_data[position:position + 4], 'big'),
+             int.from_bytes(command_data[position + 4:position + 12], 'big'),
+             int.from_bytes(command_data[position + 12:position + 20], 'big'))
+            for position in range(0, len(command_data), COMMAND_SIZE)]
+
+
+def decompress_part(data: bytes) -> bytes:
+    """Распаковывает сжатые команды или литералы любым алгоритмом по заголовку."""
+    algorithm = detect_codec(data[:8])
+    if algorithm is None:
+        raise ValueError("Формат сжатых команд или литералов не определен")
+    return create_compressor(algorithm).decompress_bytes(data)
+
+
+class PatchCompressor:
+    def __init__(self, reference: bytes = b"", algorithm=DEFAULT_CODEC):
+        self.reference = reference
+        self.algorithm = algorithm
+        self.reference_crc = zlib.crc32(reference)
+        self._index = None
+
+    def _reference_index(self) -> dict:
+        # Индекс строится один раз и переиспользуется для всех файлов с этим опорным
+        if self._index is None:
+            with PROFILER.stage('patch.index'):
+                reference = self.reference
+                index = {}
+                for position in range(0, len(reference) - PATCH_CHUNK_SIZE + 1, PATCH_CHUNK_SIZE):
+                    index.setdefault(reference[position:position + PATCH_CHUNK_SIZE], position)
+                self._index = index
+            log(f"Патч: Проиндексировано {len(self._index)} фрагментов опорного файла")
+        return self._index
+
+    @PROFILER.timed('patch.match')
+    def encode_commands(self, data: bytes) -> Tuple[List[Tuple[int, int, int]], bytes]:
+        """Возвращает команды (длина литералов, смещение копии, длина копии) и литералы."""
+        index = self._reference_index()
+        reference = memoryview(self.reference)
+        view = memoryview(data)
+
+        commands = []
+        literals = bytearray()
+        literal_start = 0
+        position = 0
+        last = len(data) - PATCH_CHUNK_SIZE
+
+        while position <= last:
+            ref_pos = index.get(data[position:position + PATCH_CHUNK_SIZE])
+            if ref_pos is None:
+                position += 1
+                continue
+
+            # Совпадение может начинаться раньше выровненного фрагмента
+            while position > literal_start and ref_pos > 0 and data[position - 1] == self.reference[ref_pos - 1]:
+                position -= 1
+                ref_pos -= 1
+
+            length = match_length(reference, ref_pos, view, position)
+            literals += view[literal_start:position]
+            commands.append((position - literal_start, ref_pos, length))
+            position += length
+            literal_start = position
+
+        if literal_start < len(data) or not commands:
+            literals += view[literal_start:]
+            commands.append((len(data) - literal_start, 0, 0))
+        return commands, bytes(literals)
+
+    def compress(self, input_path: str, output_path: str):
+        try:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
+                original_data = f.read()
+
+            compressed_data = self.compress_bytes(original_data)
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
+
+        except Exception as e:
+            log(f"Патч: Ошибка сжатия: {e}")
+            raise
+
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        commands, literals = self.encode_commands(original_data)
+        log(f"Патч: {len(commands)} команд, {len(literals)} байтов литералов "
+            f"из {len(original_data)}")
+
+        compressor = create_compressor(self.algorithm)
+        compressed_commands = compressor.compress_bytes(encode_command_data(commands))
+
+        output = io.BytesIO()
+        output.write(PATCH_MAGIC)
+        output.write(len(self.reference).to_bytes(8, 'big'))
+        output.write(self.reference_crc.to_bytes(4, 'big'))
+        output.write(len(original_data).to_bytes(8, 'big'))
+        output.write(len(commands).to_bytes(4, 'big'))
+        output.write(len(compressed_commands).to_bytes(4, 'big'))
+        output.write(compressed_commands)
+        output.write(compressor.compress_bytes(literals))
+        return output.getvalue()
+
+    def decompress(self, input_path: str, output_path: str):
+        try:
+            with open(input_path, 'rb') as f:
+                decoded_data = self.decompress_bytes(f.read())
+
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
+
+            log(f"Патч: Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+
+        except Exception as e:
+            log(f"Патч: Ошибка распаковки: {e}")
+            raise
+
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        if not compressed_data.startswith(PATCH_MAGIC):
+            raise ValueError("Не валидный файл патча")
+
+        f = io.BytesIO(compressed_data)
+        f.seek(len(PATCH_MAGIC))
+        reference_size = int.from_bytes(f.read(8), 'big')
+        reference_crc = int.from_bytes(f.read(4), 'big')
+        if (reference_size, reference_crc) != (len(self.reference), self.reference_crc):
+            raise ValueError("Опорный файл не совпадает с использованным при сжатии (укажите его через --ref)")
+
+        original_size = int.from_bytes(f.read(8), 'big')
+        command_count = int.from_bytes(f.read(4), 'big')
+        command_data = decompress_part(f.read(int.from_bytes(f.read(4), 'big')))
+        commands = decode_command_data(command_data, command_count)
+        literals = decompress_part(f.read())
+
+        with PROFILER.stage('patch.apply'):
+            output = bytearray()
+            literal_pos = 0
+            for literal_length, offset, length in commands:
+                if offset + length > len(self.reference):
+                    raise ValueError("Патч поврежден: копия за пределами опорного файла")
+
+                output += literals[literal_pos:literal_pos + literal_length]
+                literal_pos += literal_length
+                output += self.reference[offset:offset + length]
+
+        if len(output) != original_size:
+            raise ValueError(f"Патч поврежден: распаковано {len(output)} байтов, ожидалось {original_size}")
+        return bytes(output)
@@ -0,0 +1,94 @@
+"""
+Реестр алгоритмов сжатия.
+
+Сопоставляет имена алгоритмов и магические числа форматов с классами
+компрессоров. Модуль компрессора импортируется только при первом
+обращении, поэтому запуск CLI не платит за неиспользуемые алгоритмы.
+"""
+from typing import List, Optional
+from src.models.codec_models import CodecInfo
+
+CODECS = {
+    'rle': CodecInfo('rle', 'RLE', 'src.core.rle', 'RLECompressor',
+                     (b'RLE\0',), '.rle', speed=5, ratio=1, memory_factor=100),
+    'huffman': CodecInfo('huffman', 'Huffman', 'src.core.huffman', 'HuffmanCompressor',
+                         (b'HUFFMAN',), '.huff', speed=4, ratio=2, supports_dictionary=True,
+                         memory_factor=8),
+    'huffman4': CodecInfo('huffman4', 'Huffman x4', 'src.core.huffman', 'HuffmanCompressor',
+                          (), '.huff4', speed=4, ratio=2, supports_dictionary=True,
+                          memory_factor=6, options=(('streams', 4),)),
+    'lz77': CodecInfo('lz77', 'LZ77', 'src.core.lz77', 'LZ77Compressor',
+                      (b'LZ77\0\0',), '.lz77', speed=2, ratio=2, memory_factor=60),
+    'combined': CodecInfo('combined', 'Combined', 'src.core.combined', 'CombinedCompressor',
+                          (b'COMBI', b'NOCOMPR'), '.combi', speed=1, ratio=4, supports_dictionary=True,
+                          memory_factor=20),
+    'bwt': CodecInfo('bwt', 'BWT', 'src.core.bwt', 'BWTCompressor',
+                     (b'BWT\0',), '.bwt', speed=1, ratio=5, memory_factor=170),
+    'filter': CodecInfo('filter', 'Filter', 'src.core.filters', 'FilterCompressor',
+                        (b'FLT\0',), '.flt', speed=1, ratio=4, supports_dictionary=True,
+                        memory_factor=24, container=True),
+    'fse': CodecInfo('fse', 'FSE', 'src.core.fse', 'FSECompressor',
+                     (b'FSE\0',), '.fse', speed=4, ratio=2, memory_factor=21),
+    'combined-fse': CodecInfo('combined-fse', 'LZ77+FSE', 'src.core.combined', 'CombinedCompressor',
+                              (), '.cfse', speed=1, ratio=4, supports_dictionary=True,
+                              memory_factor=26, options=(('entropy', 'fse'),)),
+    'long': CodecInfo('long', 'Long-range + Combined', 'src.core.long_range', 'LongRangeCompressor',
+                      (b'LDM\0',), '.ldm', speed=1, ratio=5, memory_factor=21, container=True),
+}
+
+DEFAULT_CODEC = 'combined'
+
+
+def codec_names(containers: bool = False) -> List[str]:
+    """Имена алгоритмов; обертки --filter и --long - только с containers."""
+    return [name for name, codec in CODECS.items() if containers or not codec.container]
+
+
+def get_codec(name: str) -> CodecInfo:
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Неизвестный алгоритм: {name}")
+    return codec
+
+
+def load_codec_class(name: str):
+    codec = get_codec(name)
+    # __import__ идет через тот же путь, что и оператор import, и учитывается -X importtime
+    module = __import__(codec.module, fromlist=[codec.class_name])
+    return getattr(module, codec.class_name)
+
+
+def create_compressor(name: str, dictionary=None):
+    codec = get_codec(name)
+    compressor_class = load_codec_class(name)
+    options = dict(codec.options)
+    if dictionary is not None:
+        if not codec.supports_dictionary:
+            raise ValueError(f"Словарь не поддерживается алгоритмом {name}")
+        return compressor_class(dictionary, **options)
+    return compressor_class(**options)
+
+
+def detect_codec(header: bytes) -> Optional[str]:
+    for codec in CODECS.values():
+        if any(header.startswith(magic) for magic in codec.magics):
+            return codec.name
+    return None
+
+
+def codec_for_extension(path: str) -> Optional[str]:
+    for codec in CODECS.values():
+        if path.endswith(codec.extension):
+            return base_codec(codec.name)
+    return None
+
+
+def base_codec(name: str) -> str:
+    """Алгоритм, который распаковывает формат name (для вариантов без своих магических чисел)."""
+    codec = get_codec(name)
+    if codec.magics:
+        return name
+    for other in CODECS.values():
+        if other.magics and (other.module, other.class_name) == (codec.module, codec.class_name):
+            return other.name
+    raise ValueError(f"Нет алгоритма распаковки для {name}")
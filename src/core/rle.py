@@ -1,5 +1,8 @@
+import io
 from dataclasses import dataclass
 from typing import List, Tuple
+from src.utils.profiler import PROFILER
+from src.utils.console import log
 
 
 @dataclass
@@ -17,62 +20,77 @@ class RLECompressor:
 
     def compress(self, input_path: str, output_path: str):
         try:
-            with open(input_path, 'rb') as f:
+            with PROFILER.stage('io.read'), open(input_path, 'rb') as f:
                 original_data = f.read()
 
-            original_size = len(original_data)
-            if original_size == 0:
-                self._write_empty_file(output_path)
-                return
-
-            print(f"RLE: Прочитано {original_size} байт из {input_path}")
-
-            encoded_pairs = self._encode_rle(original_data)
+            if original_data:
+                log(f"RLE: Прочитано {len(original_data)} байт из {input_path}")
 
-            self._write_compressed_data(output_path, encoded_pairs, original_size)
+            compressed_data = self.compress_bytes(original_data)
 
-            print(f"RLE: Сжатие завершено. Кол-во пар: {len(encoded_pairs)}")
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(compressed_data)
 
         except Exception as e:
-            print(f"RLE: Ошибка сжатия: {e}")
+            log(f"RLE: Ошибка сжатия: {e}")
             raise
 
+    def compress_bytes(self, original_data: bytes) -> bytes:
+        output = io.BytesIO()
+        original_size = len(original_data)
+        if original_size == 0:
+            self._write_empty_file(output)
+            return output.getvalue()
+
+        encoded_pairs = self._encode_rle(original_data)
+
+        self._write_compressed_data(output, encoded_pairs, original_size)
+
+        log(f"RLE: Сжатие завершено. Кол-во пар: {len(encoded_pairs)}")
+        return output.getvalue()
+
     def decompress(self, input_path: str, output_path: str):
         try:
             with open(input_path, 'rb') as f:
-                magic = f.read(4)
-                if magic != b"RLE\0":
-                    raise ValueError("Не валидный RLE сжатый файл")
+                decoded_data = self._read_compressed(f)
 
-                max_run_length = int.from_bytes(f.read(1), 'big')
-                original_size = int.from_bytes(f.read(4), 'big')
+            with PROFILER.stage('io.write'), open(output_path, 'wb') as f:
+                f.write(decoded_data)
 
-                if original_size == 0:
-                    with open(output_path, 'wb') as out_f:
-                        out_f.write(b"")
-                    return
+            if decoded_data:
+                log(f"Распаковка завершена. Декодировано {len(decoded_data)} байтов")
 
-                pairs = []
-                while True:
-                    pair_data = f.read(2)  # Каждая пара - 2 байта
-                    if not pair_data or len(pair_data) < 2:
-                        break
+        except Exception as e:
+            log(f"Ошибка распаковки: {e}")
+            raise
 
-                    count = pair_data[0]
-                    value = pair_data[1]
-                    pairs.append(RLEPair(count, value))
+    def decompress_bytes(self, compressed_data: bytes) -> bytes:
+        return self._read_compressed(io.BytesIO(compressed_data))
 
-            decoded_data = self._decode_rle(pairs, original_size)
+    def _read_compressed(self, f) -> bytes:
+        magic = f.read(4)
+        if magic != b"RLE\0":
+            raise ValueError("Не валидный RLE сжатый файл")
 
-            with open(output_path, 'wb') as f:
-                f.write(decoded_data)
+        max_run_length = int.from_bytes(f.read(1), 'big')
+        original_size = int.from_bytes(f.read(4), 'big')
 
-            print(f"Распаковка завершена. Декодировано {len(decoded_data)} байтов")
+        if original_size == 0:
+            return b""
 
-        except Exception as e:
-            print(f"Ошибка распаковки: {e}")
-            raise
+        pairs = []
+        while True:
+            pair_data = f.read(2)  # Каждая пара - 2 байта
+            if not pair_data or len(pair_data) < 2:
+                break
+
+            count = pair_data[0]
+            value = pair_data[1]
+            pairs.append(RLEPair(count, value))
 
+        return self._decode_rle(pairs, original_size)
+
+    @PROFILER.timed('rle.encode')
     def _encode_rle(self, data: bytes) -> List[RLEPair]:
 
         if not data:
@@ -94,8 +112,10 @@ class RLECompressor:
             pairs.append(RLEPair(run_length, current_byte))
             i += run_length
 
+        PROFILER.count('rle.pairs', len(pairs))
         return pairs
 
+    @PROFILER.timed('rle.decode')
     def _decode_rle(self, pairs: List[RLEPair], original_size: int) -> bytes:
         decoded_data = bytearray()
 
@@ -104,21 +124,19 @@ class RLECompressor:
 
         return bytes(decoded_data[:original_size])
 
-    def _write_empty_file(self, output_path: str):
-        with open(output_path, 'wb') as f:
-            f.write(b"RLE\0")  # Магическое число + версия
-            f.write((0).to_bytes(1, 'big'))  # max_run_length
-            f.write((0).to_bytes(4, 'big'))  # original_size
-
-    def _write_compressed_data(self, output_path: str, pairs: List[RLEPair], original_size: int):
-        with open(output_path, 'wb') as f:
-            f.write(b"RLE\0")  # Магическое число + версия
-            f.write(self.max_run_length.to_bytes(1, 'big'))
-            f.write(original_size.to_bytes(4, 'big'))
-
-            for pair in pairs:
-                f.write(pair.count.to_bytes(1, 'big'))
-                f.write(pair.value.to_bytes(1, 'big'))
+    def _write_empty_file(self, f):
+        f.write(b"RLE\0")  # Магическое число + версия
+        f.write((0).to_bytes(1, 'big'))  # max_run_length
+        f.write((0).to_bytes(4, 'big'))  # original_size
+
+    def _write_compressed_data(self, f, pairs: List[RLEPair], original_size: int):
+        f.write(b"RLE\0")  # Магическое число + версия
+        f.write(self.max_run_length.to_bytes(1, 'big'))
+        f.write(original_size.to_bytes(4, 'big'))
+
+        for pair in pairs:
+            f.write(pair.count.to_bytes(1, 'big'))
+            f.write(pair.value.to_bytes(1, 'big'))
 
     def analyze_efficiency(self, data: bytes) -> dict:
         original_size = len(data)
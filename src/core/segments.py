@@ -0,0 +1,155 @@
+"""
+Дописывание в сжатый файл независимыми сегментами.
+
+Каждый сегмент - самостоятельный сжатый файл любого алгоритма. Первый
+сегмент - исходный файл как есть, поэтому дописывать можно в любой
+одноблочный файл без его перепаковки. В конце файла лежит индекс:
+
+    (смещение (8), размер (8)) на каждый сегмент, число сегментов (4),
+    смещение индекса (8), SEGMENTS_MAGIC
+
+При дописывании новый сегмент пишется поверх старого индекса, после него -
+новый индекс, так что стоимость дописывания зависит только от новых данных.
+"""
+import io
+import os
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from src.core.registry import create_compressor, get_codec
+from src.models.segment_models import Segment
+from src.utils.format_detector import detect_format_from_header
+from src.utils.checksum import decompress_verified
+from src.utils.console import log
+from src.utils.io_pipeline import prefetch
+
+SEGMENTS_MAGIC = b"SEGMENT\0"
+TRAILER_SIZE = 4 + 8 + len(SEGMENTS_MAGIC)
+SEGMENT_ENTRY_SIZE = 16
+
+
+def read_segments(f: BinaryIO) -> Optional[List[Segment]]:
+    """Возвращает индекс сегментов или None, если в файл ничего не дописывалось."""
+    file_size = f.seek(0, os.SEEK_END)
+    if file_size < TRAILER_SIZE:
+        return None
+
+    f.seek(file_size - TRAILER_SIZE)
+    trailer = f.read(TRAILER_SIZE)
+    if trailer[-len(SEGMENTS_MAGIC):] != SEGMENTS_MAGIC:
+        return None
+
+    count = int.from_bytes(trailer[:4], 'big')
+    index_offset = int.from_bytes(trailer[4:12], 'big')
+    if index_offset + count * SEGMENT_ENTRY_SIZE + TRAILER_SIZE != file_size:
+        raise ValueError("Файл поврежден: неверный индекс сегментов")
+
+    f.seek(index_offset)
+    index = f.read(count * SEGMENT_ENTRY_SIZE)
+    segments = []
+    for position in range(0, len(index), SEGMENT_ENTRY_SIZE):
+        offset = int.from_bytes(index[position:position + 8], 'big')
+        size = int.from_bytes(index[position + 8:position + 16], 'big')
+        if offset + size > index_offset:
+            raise ValueError("Файл поврежден: сегмент за пределами данных")
+        segments.append(Segment(offset, size))
+    return segments
+
+
+def append_segment(path: str, data: bytes) -> Segment:
+    """Дописывает сжатые данные новым сегментом и обновляет индекс на месте."""
+    with open(path, 'r+b') as f:
+        segments = read_segments(f)
+        if segments is None:
+            # Исходный файл целиком становится первым сегментом
+            data_end = f.seek(0, os.SEEK_END)
+            segments = [Segment(0, data_end)]
+        else:
+            last = segments[-1]
+            data_end = last.offset + last.size
+
+        segment = Segment(data_end, len(data))
+        segments.append(segment)
+
+        f.seek(data_end)
+        f.write(data)
+        index_offset = f.tell()
+        for item in segments:
+            f.write(item.offset.to_bytes(8, 'big'))
+            f.write(item.size.to_bytes(8, 'big'))
+        f.write(len(segments).to_bytes(4, 'big'))
+        f.write(index_offset.to_bytes(8, 'big'))
+        f.write(SEGMENTS_MAGIC)
+        f.truncate()
+
+    log(f"Сегменты: Дописан сегмент {len(segments)} ({len(data)} байтов)")
+    return segment
+
+
+def _segment_compressor(data: bytes, compressors: dict, dictionary=None):
+    algorithm = detect_format_from_header(data[:8])
+    if algorithm is None or algorithm in ('archive', 'stream', 'patch'):
+        raise ValueError("Неизвестный формат сегмента")
+    compressor = compressors.get(algorithm)
+    if compressor is None:
+        # Сегменты дописываются разными алгоритмами: словарь получают только те, что его поддерживают
+        if not get_codec(algorithm).supports_dictionary:
+            dictionary = None
+        compressor = compressors[algorithm] = create_compressor(algorithm, dictionary)
+    return compressor
+
+
+def _read_segment_data(in_f: BinaryIO, segments: List[Segment]) -> Iterator[bytes]:
+    for segment in segments:
+        in_f.seek(segment.offset)
+        data = in_f.read(segment.size)
+        if len(data) != segment.size:
+            raise ValueError("Файл поврежден: сегмент обрезан")
+        yield data
+
+
+def _check_segment(data: bytes, dictionary=None) -> Tuple[int, Optional[str]]:
+    """Размер распакованного сегмента, сверенного с его записью контрольной суммы, или текст ошибки."""
+    try:
+        return len(decompress_verified(_segment_compressor(data, {}, dictionary), data)), None
+    except Exception as e:
+        return 0, str(e) or type(e).__name__
+
+
+def verify_segments(in_f: BinaryIO, segments: List[Segment], workers: int = 1, dictionary=None) -> int:
+    """
+    Распаковывает сегменты в пуле процессов без записи. Возвращает размер
+    данных, при первой ошибке бросает ValueError с номером сегмента.
+    """
+    from src.utils.parallel import parallel_map
+
+    tasks = ((data, dictionary) for data in _read_segment_data(in_f, segments))
+    total = 0
+    for index, (size, error) in enumerate(parallel_map(_check_segment, prefetch(tasks), workers)):
+        if error is not None:
+            raise ValueError(f"Сегмент {index + 1} поврежден: {error}")
+        total += size
+    return total
+
+
+def decompress_segments(in_f: BinaryIO, out_f: BinaryIO, segments: List[Segment], dictionary=None) -> int:
+    """Распаковывает сегменты по порядку, возвращает число записанных байтов."""
+    compressors = {}
+    total = 0
+    for index, data in enumerate(_read_segment_data(in_f, segments)):
+        compressor = _segment_compressor(data, compressors, dictionary)
+        decoded_data = decompress_verified(compressor, data, f"Сегмент {index + 1}")
+        out_f.write(decoded_data)
+        total += len(decoded_data)
+
+    log(f"Сегменты: Распаковано {total} байтов из {len(segments)} сегментов")
+    return total
+
+
+def decompress_segments_bytes(data: bytes, dictionary=None) -> Optional[bytes]:
+    """Распаковывает файл с сегментами из памяти, None - если сегментов нет."""
+    in_f = io.BytesIO(data)
+    segments = read_segments(in_f)
+    if segments is None:
+        return None
+    out_f = io.BytesIO()
+    decompress_segments(in_f, out_f, segments, dictionary)
+    return out_f.getvalue()
@@ -0,0 +1,341 @@
+import os
+import zlib
+from collections import deque
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+from src.core.registry import create_compressor, detect_codec, get_codec
+from src.core.combined import CombinedCompressor
+from src.core.huffman import VERSION_REPEAT, VERSION_REUSABLE
+from src.models.archive_models import StoredRange
+from src.utils.checksum import crc32_combine
+from src.utils.console import log
+from src.utils.io_pipeline import WriteBehind, prefetch, read_blocks
+from src.utils.zero_copy import copy_range, read_range, file_descriptor
+
+STREAM_MAGIC = b"STREAM\0"  # Магическое число + версия
+# Версия 1: CRC32 исходных данных в каждом кадре и в завершающей записи
+STREAM_CHECKSUM_MAGIC = b"STREAM\1"
+STREAM_MAGICS = (STREAM_MAGIC, STREAM_CHECKSUM_MAGIC)
+
+
+# Кадров в одной задаче проверки: кадр, повторяющий таблицу Хаффмана, проверяется
+# после кадра с этой таблицей, и она декодируется заново раз на задачу, а не на кадр
+VERIFY_FRAMES = 8
+HUFFMAN_REUSABLE = b"HUFFMAN" + VERSION_REUSABLE
+HUFFMAN_REPEAT = b"HUFFMAN" + VERSION_REPEAT
+
+
+def _end_size(magic: bytes) -> int:
+    # Кадр нулевой длины, общий размер и для версии 1 - CRC32 всех данных
+    return 16 if magic == STREAM_CHECKSUM_MAGIC else 12
+
+
+def _check_frames(table_frame: Optional[bytes], payloads: list, dictionary=None) -> List[
+        Tuple[int, Union[int, StoredRange, None], Optional[str]]]:
+    """
+    Размер и CRC32 распакованных кадров или текст ошибки, как _checksum_block
+    архива. table_frame - предыдущий кадр с таблицей Хаффмана, которую
+    повторяют кадры задачи; он декодируется только ради таблицы.
+    """
+    stream = StreamCompressor(dictionary=dictionary)
+    if table_frame is not None:
+        try:
+            stream._decompress_block(table_frame)
+        except Exception:
+            pass  # Ошибка кадра с таблицей сообщается при его собственной проверке
+
+    results = []
+    for payload in payloads:
+        if isinstance(payload, StoredRange):
+            results.append((payload.size, payload, None))
+            continue
+        try:
+            decoded_data = stream._decompress_block(payload)
+        except Exception as e:
+            results.append((0, None, str(e) or type(e).__name__))
+            continue
+        results.append((len(decoded_data), zlib.crc32(decoded_data), None))
+    return results
+
+
+class StreamCompressor:
+    """
+    Потоковый формат для каналов: последовательность независимых кадров.
+
+    Кадр - длина сжатых данных (4 байта), размер исходного блока (4 байта),
+    CRC32 исходного блока (4 байта, с версии 1) и сам блок в формате
+    выбранного алгоритма. Кадр нулевой длины завершает поток, за ним идут
+    общий размер данных (8 байтов) и CRC32 всех данных (4 байта) для проверки.
+    Размер всего файла заранее не нужен, поэтому сжатие читает stdin по блокам,
+    а распаковка отдает каждый блок сразу после декодирования - память и
+    время до первого байта не зависят от размера потока. Чтение следующих
+    кадров и запись готовых идут в фоновых потоках параллельно с кодированием.
+    Кадр Хаффмана может повторять таблицу предыдущего кадра Хаффмана, поэтому
+    кадры распаковываются только по порядку.
+    """
+
+    def __init__(self, algorithm='combined', block_size=1 << 16, dictionary=None, filters=None, controller=None):
+        self.algorithm = algorithm
+        self.block_size = block_size
+        self.dictionary = dictionary
+        self.filters = filters  # Цепочка фильтров или 'auto' - подбирается для каждого блока
+        self.controller = controller  # LevelController: уровень сжатия выбирается для каждого блока
+        self._compressors = {}
+        self.block_count = 0
+
+    def _compressor(self, algorithm: str):
+        compressor = self._compressors.get(algorithm)
+        if compressor is None:
+            # В потоке бывают кадры разных алгоритмов: словарь получают только те, что его поддерживают
+            dictionary = self.dictionary if get_codec(algorithm).supports_dictionary else None
+            compressor = create_compressor(algorithm, dictionary)
+            self._compressors[algorithm] = compressor
+        return compressor
+
+    def _stream_compressor(self, first_block: bytes):
+        # Для auto алгоритм выбирается по выборке из первого блока
+        from src.core.estimator import resolve_algorithm
+        self.algorithm = resolve_algorithm(self.algorithm, first_block)
+
+        if self.filters:
+            from src.core.filters import FilterCompressor
+            return FilterCompressor(self.dictionary, self.algorithm, self.filters)
+        compressor = create_compressor(self.algorithm, self.dictionary)
+        if self.algorithm == 'huffman' and self.dictionary is None:
+            # Кадры кодируются по порядку: похожий блок повторяет таблицу предыдущего
+            compressor.reuse_tables = True
+        return compressor
+
+    def compress_stream(self, in_f: BinaryIO, out_f: BinaryIO) -> Tuple[int, int]:
+        """Возвращает число прочитанных и записанных байтов."""
+        out_f.write(STREAM_CHECKSUM_MAGIC)
+        total_in, total_out, crc = self._write_frames(in_f, out_f, STREAM_CHECKSUM_MAGIC)
+        self._write_end(out_f, STREAM_CHECKSUM_MAGIC, total_in, crc)
+
+        log(f"Поток: Сжато {total_in} байтов в {self.block_count} блоков")
+        return total_in, len(STREAM_CHECKSUM_MAGIC) + total_out + _end_size(STREAM_CHECKSUM_MAGIC)
+
+    def append_stream(self, in_f: BinaryIO, out_f: BinaryIO) -> Tuple[int, int]:
+        """
+        Дописывает кадры в конец существующего потока, открытого на чтение
+        и запись: завершающий кадр и общий размер перезаписываются новыми.
+        """
+        magic = self._read_exact(out_f, len(STREAM_MAGIC))
+        if magic not in STREAM_MAGICS:
+            raise ValueError("Не валидный поток")
+        out_f.seek(-_end_size(magic), os.SEEK_END)
+        end = self._read_exact(out_f, _end_size(magic))
+        if end[:4] != bytes(4):
+            raise ValueError("Поток поврежден: нет завершающего кадра")
+
+        # Новые кадры пишутся в версии существующего потока, CRC32 продолжается с прежнего значения
+        out_f.seek(-_end_size(magic), os.SEEK_END)
+        total_in, total_out, crc = self._write_frames(in_f, out_f, magic, int.from_bytes(end[12:], 'big'))
+        self._write_end(out_f, magic, int.from_bytes(end[4:12], 'big') + total_in, crc)
+        out_f.truncate()
+
+        log(f"Поток: Дописано {total_in} байтов в {self.block_count} блоков")
+        return total_in, total_out
+
+    def _write_frames(self, in_f: BinaryIO, out_f: BinaryIO, magic: bytes, crc: int = 0) -> Tuple[int, int, int]:
+        checksums = magic == STREAM_CHECKSUM_MAGIC
+        total_in = 0
+        total_out = 0
+        self.block_count = 0
+        compressor = None
+
+        with WriteBehind(out_f) as writer:
+            for data in prefetch(read_blocks(in_f, self.block_size)):
+                if self.controller is not None:
+                    compressed_data = self.controller.compress_block(data)
+                else:
+                    if compressor is None:
+                        compressor = self._stream_compressor(data)
+                    compressed_data = compressor.compress_bytes(data)
+                header = len(compressed_data).to_bytes(4, 'big') + len(data).to_bytes(4, 'big')
+                if checksums:
+                    header += zlib.crc32(data).to_bytes(4, 'big')
+                writer.write(header + compressed_data, flush=True)
+
+                crc = zlib.crc32(data, crc)
+                total_in += len(data)
+                total_out += len(header) + len(compressed_data)
+                self.block_count += 1
+
+        return total_in, total_out, crc
+
+    def _write_end(self, out_f: BinaryIO, magic: bytes, total_in: int, crc: int):
+        out_f.write((0).to_bytes(4, 'big'))
+        out_f.write(total_in.to_bytes(8, 'big'))
+        if magic == STREAM_CHECKSUM_MAGIC:
+            out_f.write(crc.to_bytes(4, 'big'))
+        out_f.flush()
+
+    def decompress_stream(self, in_f: BinaryIO, out_f: BinaryIO, magic: bytes = None) -> Tuple[int, int]:
+        """
+        Распаковывает поток кадр за кадром. magic - уже прочитанное из in_f
+        начало потока, если формат определялся по заголовку.
+        """
+        if magic is None:
+            magic = in_f.read(len(STREAM_MAGIC))
+        if magic not in STREAM_MAGICS:
+            raise ValueError("Не валидный поток")
+
+        total_in = len(magic)
+        total_out = 0
+        crc = 0
+        self.block_count = 0
+        # Таблицы Хаффмана предыдущих кадров не переходят из потока в поток
+        self._compressors = {}
+
+        with WriteBehind(out_f) as writer:
+            for compressed_size, original_size, block_crc, payload in prefetch(self._read_frames(in_f, magic)):
+                if isinstance(payload, StoredRange):
+                    # Несжатый блок из файла копируется напрямую, минуя Python
+                    writer.submit(copy_range, in_f, out_f, payload.offset, payload.size)
+                    size = payload.size
+                    # Для проверки суммы данные читаются кусками через pread, память не растет
+                    actual_crc = 0
+                    for chunk in read_range(in_f, payload.offset, payload.size):
+                        actual_crc = zlib.crc32(chunk, actual_crc)
+                        crc = zlib.crc32(chunk, crc)
+                    writer.submit(out_f.flush)
+                else:
+                    data = self._decompress_block(payload)
+                    size = len(data)
+                    actual_crc = zlib.crc32(data)
+                    crc = zlib.crc32(data, crc)
+                    writer.write(data, flush=True)
+
+                self._check_block(self.block_count, size, actual_crc, original_size, block_crc)
+                total_in += compressed_size + (12 if block_crc is not None else 8)
+                total_out += size
+                self.block_count += 1
+
+        self.check_end(in_f, magic, total_out, crc)
+        total_in += _end_size(magic)
+
+        log(f"Поток: Распаковано {total_out} байтов из {self.block_count} блоков")
+        return total_in, total_out
+
+    def verify(self, in_f: BinaryIO, workers: int = 1, magic: bytes = None) -> int:
+        """
+        Распаковывает кадры в пуле процессов без записи и сверяет размеры и
+        контрольные суммы. Возвращает размер данных, при первой ошибке бросает
+        ValueError с номером блока.
+        """
+        from src.utils.parallel import parallel_map
+
+        if magic is None:
+            magic = in_f.read(len(STREAM_MAGIC))
+        if magic not in STREAM_MAGICS:
+            raise ValueError("Не валидный поток")
+
+        frames = deque()
+        total_out = 0
+        crc = 0
+        self.block_count = 0
+        tasks = self._verify_tasks(prefetch(self._read_frames(in_f, magic)), frames)
+        for results in parallel_map(_check_frames, tasks, workers):
+            for size, block_crc, error in results:
+                original_size, expected_crc = frames.popleft()
+                if isinstance(block_crc, StoredRange):
+                    stored, block_crc = block_crc, 0
+                    for chunk in read_range(in_f, stored.offset, stored.size):
+                        block_crc = zlib.crc32(chunk, block_crc)
+                if error is None and size != original_size:
+                    error = f"распакован в {size} байтов, ожидалось {original_size}"
+                elif error is None and expected_crc is not None and block_crc != expected_crc:
+                    error = "контрольная сумма не совпадает"
+                if error is not None:
+                    raise ValueError(f"Поток поврежден: блок {self.block_count}: {error}")
+
+                crc = crc32_combine(crc, block_crc, size)
+                total_out += size
+                self.block_count += 1
+
+        self.check_end(in_f, magic, total_out, crc)
+        return total_out
+
+    def _verify_tasks(self, frames: Iterator, metadata: deque) -> Iterator[tuple]:
+        """Группирует кадры в задачи _check_frames, размеры и CRC32 кадров складывает в metadata."""
+        table_frame = None  # Последний кадр, таблицу которого могут повторять следующие
+        task_table_frame = None
+        payloads = []
+        for _, original_size, block_crc, payload in frames:
+            metadata.append((original_size, block_crc))
+            header = payload[:len(HUFFMAN_REPEAT)] if isinstance(payload, bytes) else b""
+            if header == HUFFMAN_REPEAT and task_table_frame is None and not any(
+                    isinstance(item, bytes) and item.startswith(HUFFMAN_REUSABLE) for item in payloads):
+                task_table_frame = table_frame
+            elif header == HUFFMAN_REUSABLE:
+                table_frame = payload
+
+            payloads.append(payload)
+            if len(payloads) == VERIFY_FRAMES:
+                yield task_table_frame, payloads, self.dictionary
+                task_table_frame = None
+                payloads = []
+        if payloads:
+            yield task_table_frame, payloads, self.dictionary
+
+    def _read_frames(self, in_f: BinaryIO, magic: bytes) -> Iterator[
+            Tuple[int, int, Optional[int], Union[bytes, StoredRange]]]:
+        """
+        Кадры до завершающего: длина, размер, CRC32 и сжатые данные. Несжатый
+        блок файла с дескриптором не читается, вместо данных - его StoredRange.
+        """
+        zero_copy = in_f.seekable() and file_descriptor(in_f) is not None
+        while True:
+            frame = self.read_frame_header(in_f, magic)
+            if frame is None:
+                return
+            compressed_size, original_size, block_crc = frame
+
+            header = self._read_exact(in_f, min(compressed_size, CombinedCompressor.STORED_HEADER_SIZE))
+            if zero_copy and header.startswith(CombinedCompressor.STORED_MAGIC):
+                payload = StoredRange(in_f.tell(), compressed_size - len(header))
+                in_f.seek(payload.offset + payload.size)
+            else:
+                payload = header + self._read_exact(in_f, compressed_size - len(header))
+            yield compressed_size, original_size, block_crc, payload
+
+    def read_frame_header(self, in_f: BinaryIO, magic: bytes) -> Optional[Tuple[int, int, Optional[int]]]:
+        """Длина сжатых данных, размер и CRC32 блока (None для версии 0); None - конец потока."""
+        compressed_size = int.from_bytes(self._read_exact(in_f, 4), 'big')
+        if compressed_size == 0:
+            return None
+        original_size = int.from_bytes(self._read_exact(in_f, 4), 'big')
+        block_crc = None
+        if magic == STREAM_CHECKSUM_MAGIC:
+            block_crc = int.from_bytes(self._read_exact(in_f, 4), 'big')
+        return compressed_size, original_size, block_crc
+
+    def check_end(self, in_f: BinaryIO, magic: bytes, total_out: int, crc: int):
+        expected_size = int.from_bytes(self._read_exact(in_f, 8), 'big')
+        if expected_size != total_out:
+            raise ValueError(f"Поток поврежден: распаковано {total_out} байтов, ожидалось {expected_size}")
+        if magic == STREAM_CHECKSUM_MAGIC and int.from_bytes(self._read_exact(in_f, 4), 'big') != crc:
+            raise ValueError("Поток поврежден: контрольная сумма всех данных не совпадает")
+        # Склеенные потоки и мусор в конце не отбрасываются молча
+        if in_f.read(1):
+            raise ValueError("Поток поврежден: данные после конца потока")
+
+    @staticmethod
+    def _check_block(index: int, size: int, crc: int, original_size: int, block_crc: Optional[int]):
+        if size != original_size:
+            raise ValueError(f"Поток поврежден: блок {index} распакован в {size} байтов, "
+                             f"ожидалось {original_size}")
+        if block_crc is not None and crc != block_crc:
+            raise ValueError(f"Поток поврежден: контрольная сумма блока {index} не совпадает")
+
+    def _decompress_block(self, data: bytes) -> bytes:
+        algorithm = detect_codec(data[:8])
+        if algorithm is None:
+            raise ValueError("Неизвестный формат блока потока")
+        return self._compressor(algorithm).decompress_bytes(data)
+
+    def _read_exact(self, f: BinaryIO, size: int) -> bytes:
+        data = f.read(size)
+        if len(data) != size:
+            raise ValueError("Поток поврежден: данные обрезаны")
+        return data
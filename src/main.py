@@ -3,25 +3,161 @@
 """
 import argparse
 import os
-from src.core.huffman import HuffmanCompressor
-from src.core.lz77 import LZ77Compressor
-from src.core.combined import CombinedCompressor
-from src.core.rle import RLECompressor
-from src.utils.format_detector import detect_compression_format
+import sys
+from src.core.registry import DEFAULT_CODEC, codec_names, get_codec, create_compressor, codec_for_extension
+from src.utils.format_detector import detect_compression_format, detect_format_from_header
+from src.utils.profiler import PROFILER
+from src.utils.console import log, set_quiet, set_log_to_stderr
+from src.utils.job_stats import (JobTimer, build_job_record, format_json_record, format_text_record,
+                                 peak_memory_bytes, write_prometheus_textfile)
+from src.utils.memory_budget import MEMORY_SAMPLER, parse_size
 
 def main():
     parser = argparse.ArgumentParser(description='Архиватор данных')
-    parser.add_argument('action', choices=['compress', 'decompress', 'compare', 'analyze'])
-    parser.add_argument('input_file')
-    parser.add_argument('output_file', nargs='?', help='Выходной файл (Опционально)')
-    parser.add_argument('--algorithm', '-a', choices=['huffman', 'lz77', 'combined', 'rle'],
-                       default='combined', help='Алгоритм сжатия')
+    parser.add_argument('action', choices=['compress', 'decompress', 'compare', 'analyze', 'pack', 'unpack', 'train',
+                                           'batch', 'serve', 'test'])
+    parser.add_argument('input_file', nargs='?',
+                        help='Входной файл, - для stdin (для serve - путь Unix сокета)')
+    parser.add_argument('output_file', nargs='?', help='Выходной файл, - для stdout (Опционально)')
+    parser.add_argument('--algorithm', '-a', choices=codec_names() + ['auto'],
+                       default=DEFAULT_CODEC, help='Алгоритм сжатия (auto - выбор по выборке из данных)')
     parser.add_argument('--stats', '-s', action='store_true',
                        help='Показать статистику сжатия')
+    parser.add_argument('--stats-format', choices=['text', 'json'], default='text',
+                       help='Формат статистики: json - одна запись на задание, включает --stats')
+    parser.add_argument('--prometheus-file', default=None,
+                       help='Записать метрики заданий в textfile для node_exporter')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='Не выводить сообщения о ходе работы')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                       help='Число процессов для pack/unpack/test (по умолчанию - число ядер)')
+    parser.add_argument('--block-size', type=int, default=1 << 16,
+                       help='Размер блока архива и потока в байтах')
+    parser.add_argument('--filter', default=None,
+                       help='Фильтры перед сжатием: auto или цепочка вида delta:4,shuffle:4 '
+                            '(delta, xor, shuffle, bitshuffle; ширина 1, 2, 4, 8)')
+    parser.add_argument('--long', action='store_true',
+                       help='Искать дальние совпадения по всему файлу перед сжатием алгоритмом -a')
+    parser.add_argument('--dedup', action='store_true',
+                       help='pack: резать файлы по содержимому и хранить повторяющиеся фрагменты один раз')
+    parser.add_argument('--stream', action='store_true',
+                       help='Сжимать в потоковый формат по блокам (включается сам при вводе/выводе через -)')
+    parser.add_argument('--append', action='store_true',
+                       help='Дописать сжатые данные в конец существующего выходного файла')
+    parser.add_argument('--ref', default=None,
+                       help='Опорный файл (предыдущая версия): сохраняются только отличия от него')
+    parser.add_argument('--cache', default=None,
+                       help='Каталог кэша результатов сжатия (compress и batch): неизмененные файлы не сжимаются заново')
+    parser.add_argument('--cache-size', type=int, default=None,
+                       help='Предельный размер кэша в байтах, старые записи вытесняются (по умолчанию 1 ГиБ)')
+    parser.add_argument('--target-mbps', type=float, default=None,
+                       help='Целевая скорость сжатия в МБ/с: уровень подбирается для каждого блока потока')
+    parser.add_argument('--deadline', type=float, default=None,
+                       help='Срок сжатия файла в секундах: уровень подбирается для каждого блока потока')
+    parser.add_argument('--max-memory', type=parse_size, default=None,
+                       help='Бюджет памяти (например 2G): размер блоков, число процессов и кэши подбираются под него, '
+                            'большие файлы сжимаются потоком')
+    parser.add_argument('--dict', '-D', dest='dictionary', default=None,
+                       help='Файл словаря, обученного действием train (для huffman и combined)')
+    parser.add_argument('--from-list', default=None,
+                       help='Список заданий для batch: строки "<compress|decompress> <вход> [выход]"')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help='Число одновременных заданий batch/serve (по умолчанию - 2 x workers)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Замерить время этапов и вывести счетчики движков')
+    parser.add_argument('--profile-output', default=None,
+                       help='Сохранить статистику cProfile (pstats) в файл, включает --profile')
+    parser.add_argument('--profile-folded', default=None,
+                       help='Сохранить этапы в формате свернутых стеков для flamegraph, включает --profile')
 
     args = parser.parse_args()
 
+    if args.input_file is None and not (args.action == 'batch' and args.from_list):
+        parser.error("не указан входной файл")
+
+    if args.profile or args.profile_output or args.profile_folded:
+        PROFILER.enable()
+
+    if args.stats_format == 'json':
+        args.stats = True
+    if args.algorithm == 'auto' and args.dictionary:
+        parser.error("--algorithm auto не сочетается со словарем")
+    if args.filter and args.filter != 'auto':
+        from src.core.filters import parse_filters
+        try:
+            parse_filters(args.filter)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.action == 'test' and args.input_file == STDIO_PATH:
+        parser.error("test проверяет только файлы")
+    if args.append and args.output_file == STDIO_PATH:
+        parser.error("--append требует выходного файла")
+    if args.ref and (args.append or args.stream or args.filter or args.dictionary):
+        parser.error("--ref не сочетается с --append, --stream, --filter и словарем")
+    if args.long and (args.ref or args.stream or args.filter or args.dictionary
+                      or STDIO_PATH in (args.input_file, args.output_file)):
+        parser.error("--long работает только для сжатия файла целиком, без --ref, --filter и словаря")
+    if args.target_mbps is not None and args.deadline is not None:
+        parser.error("--target-mbps и --deadline взаимоисключающие")
+    if (args.target_mbps is not None or args.deadline is not None) and (
+            args.ref or args.long or args.filter or args.dictionary or args.append):
+        parser.error("--target-mbps и --deadline сами выбирают сжатие блоков, без --ref, --long, --filter, "
+                     "словаря и --append")
+    if args.deadline is not None and args.input_file == STDIO_PATH:
+        parser.error("--deadline требует входного файла известного размера")
+    set_quiet(args.quiet)
+    # Без выходного файла данные из stdin уходят в stdout
+    if args.action in ('compress', 'decompress') and args.input_file == STDIO_PATH and not args.output_file:
+        args.output_file = STDIO_PATH
+    # При выводе данных в stdout сообщения и статистика уходят в stderr
+    set_log_to_stderr(args.output_file == STDIO_PATH)
+
+    # Опрос RSS нужен только для бюджета; без него пик берется из getrusage
+    if args.max_memory:
+        MEMORY_SAMPLER.max_memory = args.max_memory
+        # tracemalloc замедляет выделение памяти, поэтому включается только при профилировании
+        MEMORY_SAMPLER.trace_python = PROFILER.enabled
+        MEMORY_SAMPLER.start()
+
     try:
+        if args.profile_output:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.runcall(run_action, args)
+            finally:
+                profile.dump_stats(args.profile_output)
+        else:
+            run_action(args)
+
+    except BrokenPipeError:
+        # Читатель канала закрылся раньше (например, head) - это не ошибка сжатия
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 141
+
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    finally:
+        if MEMORY_SAMPLER.running:
+            MEMORY_SAMPLER.stop()
+            if MEMORY_SAMPLER.over_budget:
+                log(f"Бюджет памяти превышен: пик {MEMORY_SAMPLER.peak} из {args.max_memory} байтов")
+            if MEMORY_SAMPLER.python_peak is not None:
+                PROFILER.count('python_peak_bytes', MEMORY_SAMPLER.python_peak)
+        if PROFILER.enabled:
+            # Отчет идет в stderr: stdout может быть занят сжатыми данными (-o -)
+            print(file=sys.stderr)
+            print(PROFILER.report(), file=sys.stderr)
+            if args.profile_folded:
+                PROFILER.write_folded(args.profile_folded)
+
+    return 0
+
+
+def run_action(args):
+    with PROFILER.stage(args.action):
         if args.action == 'compress':
             handle_compress(args)
 
@@ -34,126 +170,610 @@ def main():
         elif args.action == 'analyze':
             analyze_file(args.input_file)
 
-    except Exception as e:
-        print(f"Error: {e}")
-        return 1
+        elif args.action == 'pack':
+            handle_pack(args)
 
-    return 0
+        elif args.action == 'unpack':
+            handle_unpack(args)
 
+        elif args.action == 'train':
+            handle_train(args)
 
-def handle_compress(args):
-    if args.algorithm == 'huffman':
-        compressor = HuffmanCompressor()
-    elif args.algorithm == 'lz77':
-        compressor = LZ77Compressor()
-    elif args.algorithm == 'rle':
-        compressor = RLECompressor()
-    else:
-        compressor = CombinedCompressor()
+        elif args.action == 'batch':
+            handle_batch(args)
 
-    if not args.output_file:
-        args.output_file = args.input_file + '.compressed'
+        elif args.action == 'serve':
+            handle_serve(args)
+
+        elif args.action == 'test':
+            handle_test(args)
+
+    if args.action in ('compress', 'decompress', 'pack') and PROFILER.enabled \
+            and STDIO_PATH not in (args.input_file, args.output_file):
+        PROFILER.count('bytes_in', _path_size(args.input_file))
+        PROFILER.count('bytes_out', _path_size(args.output_file))
+
+
+STDIO_PATH = '-'
+
+
+def _open_input(path: str):
+    if path == STDIO_PATH:
+        return open(sys.stdin.fileno(), 'rb', closefd=False)
+    return open(path, 'rb')
+
+
+def _open_output(path: str):
+    if path == STDIO_PATH:
+        return open(sys.stdout.fileno(), 'wb', closefd=False)
+    return open(path, 'wb')
 
-    compressor.compress(args.input_file, args.output_file)
 
-    # Статистика
+def _path_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    total = 0
+    for root, dirs, names in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    return total
+
+
+def default_decompress_path(input_path: str) -> str:
+    if input_path.endswith('.compressed'):
+        return input_path[:-11] + '.decompressed'
+    return input_path + '.decompressed'
+
+
+def load_args_dictionary(args, container: bool = False):
+    """
+    Словарь из --dict. Для контейнеров (поток, сегменты) алгоритм блоков
+    заранее не известен, поэтому поддержка словаря не проверяется: его
+    получат только блоки алгоритмов, которые умеют им пользоваться.
+    """
+    if not args.dictionary:
+        return None
+    if not container and not get_codec(args.algorithm).supports_dictionary:
+        supported = ', '.join(name for name in codec_names() if get_codec(name).supports_dictionary)
+        raise ValueError(f"Словарь поддерживается только алгоритмами {supported}")
+
+    from src.core.dictionary import load_dictionary
+    return load_dictionary(args.dictionary)
+
+
+def report_job_stats(args, records: list):
+    stats_file = sys.stderr if args.output_file == STDIO_PATH else sys.stdout
     if args.stats:
-        original_size = os.path.getsize(args.input_file)
-        compressed_size = os.path.getsize(args.output_file)
-        ratio = (1 - compressed_size / original_size) * 100
-        print(f"\nСтатистика сжатия:")
-        print(f"Оригинальный размер: {original_size} bytes")
-        print(f"Сжатый размер: {compressed_size} bytes")
-        print(f"Коэффициент сжатия: {ratio:.2f}%")
+        for record in records:
+            if args.stats_format == 'json':
+                print(format_json_record(record), file=stats_file)
+            else:
+                print(format_text_record(record), file=stats_file)
+
+    if args.prometheus_file:
+        write_prometheus_textfile(args.prometheus_file, records)
+
+
+def handle_compress(args):
+    if not args.output_file:
+        args.output_file = args.input_file + '.compressed'
+
+    if args.append and os.path.isfile(args.output_file) and os.path.getsize(args.output_file):
+        handle_compress_append(args)
+        return
+
+    if args.target_mbps is not None or args.deadline is not None:
+        # Уровень меняется от блока к блоку, это умеет только потоковый формат
+        args.stream = True
+
+    whole_file = not (args.stream or STDIO_PATH in (args.input_file, args.output_file))
+    plan = apply_memory_budget(args, os.path.getsize(args.input_file) if whole_file else None)
+    if plan is not None and whole_file and not plan.whole_file:
+        if args.ref:
+            raise ValueError("--ref читает входной и опорный файлы целиком, они не помещаются в --max-memory")
+        if args.long:
+            log("Бюджет памяти: --long отключен, поток сжимается по блокам")
+            args.long = False
+        args.stream = True
+
+    if args.ref:
+        handle_compress_patch(args)
+        return
+
+    if args.stream or STDIO_PATH in (args.input_file, args.output_file):
+        handle_compress_stream(args)
+        return
+
+    if args.algorithm == 'auto':
+        from src.core.estimator import estimate_file, choose_algorithm
+        args.algorithm = choose_algorithm(estimate_file(args.input_file))
+        log(f"Выбран алгоритм: {args.algorithm}")
+
+    cache = open_args_cache(args)
+    with JobTimer() as timer:
+        if cache is None:
+            compress_file(args)
+        else:
+            compress_with_cache(args, cache)
+            report_cache(cache)
+
+    report_job_stats(args, [build_job_record(
+        'compress', args.input_file, args.output_file, args.algorithm,
+        os.path.getsize(args.input_file), os.path.getsize(args.output_file),
+        timer.wall_time, timer.cpu_time, peak_memory=peak_memory_bytes())])
+
+
+def apply_memory_budget(args, input_size=None, block_size=None, min_block_size=None):
+    """Подгоняет --block-size и --workers под --max-memory; без бюджета возвращает None."""
+    if not args.max_memory:
+        return None
+    from src.utils.memory_budget import plan_memory, limit_table_caches, MIN_BLOCK_SIZE
+
+    plan = plan_memory(args.max_memory, args.algorithm, block_size or args.block_size,
+                       args.workers or os.cpu_count() or 1, input_size, args.filter, args.long,
+                       min_block_size or MIN_BLOCK_SIZE)
+    for degradation in plan.degradations:
+        log(f"Бюджет памяти: {degradation}")
+    log(f"Бюджет памяти: оценка пика {plan.estimated_peak} из {args.max_memory} байтов")
+    limit_table_caches(plan.table_cache_size)
+    if block_size is None:
+        args.block_size = plan.block_size
+    args.workers = plan.workers
+    return plan
+
+
+def open_args_cache(args):
+    if not args.cache:
+        return None
+    from src.utils.result_cache import ResultCache, DEFAULT_CACHE_SIZE
+    return ResultCache(args.cache, args.cache_size or DEFAULT_CACHE_SIZE)
+
+
+def compress_with_cache(args, cache):
+    import shutil
+    from src.utils.result_cache import hash_file, compression_params
+
+    params = compression_params(args.algorithm, args.filter, args.long,
+                                hash_file(args.dictionary) if args.dictionary else None)
+    key = cache.key(hash_file(args.input_file), params)
+    cached_path = cache.lookup(key, os.path.getsize(args.input_file))
+    if cached_path is not None:
+        log("Результат взят из кэша")
+        shutil.copyfile(cached_path, args.output_file)
+        return
+
+    compress_file(args)
+    cache.put_file(key, args.output_file)
+
+
+def compress_file(args):
+    from src.utils.checksum import append_file_checksum
+
+    create_args_compressor(args).compress(args.input_file, args.output_file)
+    append_file_checksum(args.input_file, args.output_file)
+
+
+def report_cache(cache):
+    totals = cache.save_stats()
+    lookups = totals['hits'] + totals['misses']
+    log(cache.report())
+    log(f"Кэш за все запуски: попаданий {totals['hits']} из {lookups} "
+        f"({totals['hits'] / lookups * 100 if lookups else 0.0:.1f}%), "
+        f"не сжимались повторно {totals['bytes_saved']} байтов")
+
+
+def create_args_compressor(args):
+    if args.long:
+        from src.core.long_range import LongRangeCompressor
+        return LongRangeCompressor(args.algorithm)
+    if args.filter:
+        from src.core.filters import FilterCompressor
+        return FilterCompressor(load_args_dictionary(args), args.algorithm, args.filter)
+    return create_compressor(args.algorithm, load_args_dictionary(args))
+
+
+def handle_compress_append(args):
+    from src.core.segments import append_segment
+    from src.core.stream import StreamCompressor
+    from src.utils.checksum import add_checksum
+
+    detected_format = detect_compression_format(args.output_file)
+    if detected_format == 'archive':
+        raise ValueError("Дописывание в архив не поддерживается")
+    log(f"Дописывание в {args.output_file}...")
+
+    with JobTimer() as timer:
+        if detected_format == 'stream':
+            # В поток дописываются кадры, формат файла не меняется
+            stream = StreamCompressor(args.algorithm, args.block_size, load_args_dictionary(args), args.filter)
+            with _open_input(args.input_file) as in_f, open(args.output_file, 'r+b') as out_f:
+                original_size, compressed_size = stream.append_stream(in_f, out_f)
+            blocks = stream.block_count
+        else:
+            if args.input_file != STDIO_PATH:
+                plan = apply_memory_budget(args, os.path.getsize(args.input_file))
+                if plan is not None and not plan.whole_file:
+                    raise ValueError("Дописываемый файл не помещается в --max-memory целиком; "
+                                     "дописывайте в потоковый файл (--stream)")
+            with _open_input(args.input_file) as in_f:
+                data = in_f.read()
+            if args.algorithm == 'auto':
+                from src.core.estimator import resolve_algorithm
+                args.algorithm = resolve_algorithm(args.algorithm, data)
+                log(f"Выбран алгоритм: {args.algorithm}")
+
+            compressed_data = add_checksum(create_args_compressor(args).compress_bytes(data), data)
+            append_segment(args.output_file, compressed_data)
+            original_size, compressed_size, blocks = len(data), len(compressed_data), 1
+
+    report_job_stats(args, [build_job_record(
+        'compress', args.input_file, args.output_file, args.algorithm, original_size, compressed_size,
+        timer.wall_time, timer.cpu_time, blocks=blocks, peak_memory=peak_memory_bytes())])
+
+
+def load_args_reference(args) -> bytes:
+    if not args.ref:
+        raise ValueError("Файл сжат относительно опорного файла, укажите его через --ref")
+    with open(args.ref, 'rb') as f:
+        return f.read()
+
+
+def handle_compress_patch(args):
+    from src.core.patch import PatchCompressor
+    from src.utils.checksum import add_checksum
+
+    with JobTimer() as timer:
+        with _open_input(args.input_file) as in_f:
+            data = in_f.read()
+        if args.algorithm == 'auto':
+            from src.core.estimator import resolve_algorithm
+            args.algorithm = resolve_algorithm(args.algorithm, data)
+            log(f"Выбран алгоритм: {args.algorithm}")
+
+        compressed_data = PatchCompressor(load_args_reference(args), args.algorithm).compress_bytes(data)
+        compressed_data = add_checksum(compressed_data, data)
+        with _open_output(args.output_file) as out_f:
+            out_f.write(compressed_data)
+
+    report_job_stats(args, [build_job_record(
+        'compress', args.input_file, args.output_file, args.algorithm, len(data), len(compressed_data),
+        timer.wall_time, timer.cpu_time, peak_memory=peak_memory_bytes())])
+
+
+def create_format_compressor(args, detected_format: str):
+    if detected_format == 'patch':
+        from src.core.patch import PatchCompressor
+        return PatchCompressor(load_args_reference(args))
+    return create_compressor(detected_format, load_args_dictionary(args))
+
+
+def handle_compress_stream(args):
+    from src.core.stream import StreamCompressor
+
+    controller = create_args_controller(args)
+    stream = StreamCompressor(args.algorithm, args.block_size, load_args_dictionary(args), args.filter, controller)
+    with JobTimer() as timer, _open_input(args.input_file) as in_f, _open_output(args.output_file) as out_f:
+        original_size, compressed_size = stream.compress_stream(in_f, out_f)
+    if controller is not None:
+        log(controller.report())
+
+    report_job_stats(args, [build_job_record(
+        'compress', args.input_file, args.output_file, args.algorithm, original_size, compressed_size,
+        timer.wall_time, timer.cpu_time, level=controller.dominant_level() if controller is not None else None,
+        blocks=stream.block_count, peak_memory=peak_memory_bytes())])
+
+
+def create_args_controller(args):
+    if args.target_mbps is None and args.deadline is None:
+        return None
+    from src.core.auto_level import LevelController
+
+    args.algorithm = 'adaptive'
+    if args.deadline is not None:
+        return LevelController(deadline=args.deadline, total_size=os.path.getsize(args.input_file))
+    return LevelController(target_rate=args.target_mbps * 1e6)
+
+
+def handle_decompress_stream(args):
+    from src.core.stream import StreamCompressor, STREAM_MAGIC, STREAM_MAGICS
+
+    with JobTimer() as timer, _open_input(args.input_file) as in_f, _open_output(args.output_file) as out_f:
+        magic = in_f.read(len(STREAM_MAGIC))
+        if magic in STREAM_MAGICS:
+            args.algorithm = 'stream'
+            stream = StreamCompressor(dictionary=load_args_dictionary(args, container=True))
+            compressed_size, original_size = stream.decompress_stream(in_f, out_f, magic)
+            blocks = stream.block_count
+        else:
+            from src.core.segments import decompress_segments_bytes
+            from src.utils.checksum import decompress_verified
+
+            # Одноблочные форматы требуют всех данных целиком
+            compressed_data = magic + in_f.read()
+            detected_format = detect_format_from_header(compressed_data[:8])
+            if detected_format is None or detected_format == 'archive':
+                raise ValueError("Формат не определен")
+            args.algorithm = detected_format
+            data = decompress_segments_bytes(compressed_data, load_args_dictionary(args, container=True))
+            if data is None:
+                data = decompress_verified(create_format_compressor(args, detected_format), compressed_data)
+            out_f.write(data)
+            compressed_size, original_size, blocks = len(compressed_data), len(data), 1
+
+    report_job_stats(args, [build_job_record(
+        'decompress', args.input_file, args.output_file, args.algorithm, original_size, compressed_size,
+        timer.wall_time, timer.cpu_time, blocks=blocks, peak_memory=peak_memory_bytes())])
 
 
 def handle_decompress(args):
+    if STDIO_PATH in (args.input_file, args.output_file):
+        handle_decompress_stream(args)
+        return
+
     detected_format = detect_compression_format(args.input_file)
+    if detected_format == 'stream':
+        handle_decompress_stream(args)
+        return
+    if detected_format == 'archive':
+        raise ValueError("Файл является архивом, используйте действие unpack")
+    if handle_decompress_segments(args):
+        return
     if detected_format:
-        print(f"Определен формат: {detected_format}")
+        log(f"Определен формат: {detected_format}")
         args.algorithm = detected_format
     else:
-        if args.input_file.endswith('.huff'):
-            args.algorithm = 'huffman'
-        elif args.input_file.endswith('.lz77'):
-            args.algorithm = 'lz77'
-        elif args.input_file.endswith('.combi'):
-            args.algorithm = 'combined'
-        elif args.input_file.endswith('.rle'):
-            args.algorithm = 'rle'
+        args.algorithm = codec_for_extension(args.input_file)
+        if args.algorithm is None:
+            args.algorithm = DEFAULT_CODEC
+            log("Формат не определен, используем комбинированный...")
+
+    from src.utils.checksum import read_file_checksum, verify_file_checksum
+
+    compressor = create_format_compressor(args, args.algorithm)
+
+    if not args.output_file:
+        args.output_file = default_decompress_path(args.input_file)
+
+    log(f"Распаковка используя {args.algorithm} алгоритм...")
+    with JobTimer() as timer:
+        # Декодеры останавливаются по размеру или маркеру конца и не читают запись
+        # контрольной суммы, поэтому файл распаковывается обычным путем (в том числе
+        # копированием несжатых данных без Python), а результат сверяется кусками
+        crc, size = read_file_checksum(args.input_file)
+        compressor.decompress(args.input_file, args.output_file)
+        if crc is not None:
+            verify_file_checksum(args.output_file, crc, size)
+
+    report_job_stats(args, [build_job_record(
+        'decompress', args.input_file, args.output_file, args.algorithm,
+        os.path.getsize(args.output_file), os.path.getsize(args.input_file),
+        timer.wall_time, timer.cpu_time, peak_memory=peak_memory_bytes())])
+
+
+def handle_decompress_segments(args) -> bool:
+    """Распаковывает файл с дописанными сегментами, False - если дописываний не было."""
+    from src.core.segments import read_segments, decompress_segments
+
+    with open(args.input_file, 'rb') as in_f:
+        segments = read_segments(in_f)
+        if segments is None:
+            return False
+
+        if not args.output_file:
+            args.output_file = default_decompress_path(args.input_file)
+        args.algorithm = 'segments'
+        log(f"Распаковка {len(segments)} сегментов...")
+        with JobTimer() as timer, open(args.output_file, 'wb') as out_f:
+            original_size = decompress_segments(in_f, out_f, segments, load_args_dictionary(args, container=True))
+
+    report_job_stats(args, [build_job_record(
+        'decompress', args.input_file, args.output_file, args.algorithm,
+        original_size, os.path.getsize(args.input_file),
+        timer.wall_time, timer.cpu_time, blocks=len(segments), peak_memory=peak_memory_bytes())])
+    return True
+
+
+def handle_pack(args):
+    from src.core.archive import ArchiveCompressor
+
+    if not args.output_file:
+        args.output_file = args.input_file.rstrip('/\\') + '.archive'
+
+    apply_memory_budget(args)
+    archive = ArchiveCompressor(args.algorithm, args.block_size, args.workers, args.filter, args.dedup)
+    with JobTimer() as timer:
+        archive.pack(args.input_file, args.output_file)
+
+    report_job_stats(args, [build_job_record(
+        'pack', args.input_file, args.output_file, args.algorithm,
+        _path_size(args.input_file), os.path.getsize(args.output_file),
+        timer.wall_time, timer.cpu_time, blocks=archive.block_count, peak_memory=peak_memory_bytes())])
+
+
+def handle_unpack(args):
+    from src.core.archive import ArchiveCompressor
+
+    if not args.output_file:
+        if args.input_file.endswith('.archive'):
+            args.output_file = args.input_file[:-8]
         else:
-            args.algorithm = 'combined'
-            print("Формат не определен, используем комбинированный...")
-
-    if args.algorithm == 'huffman':
-        compressor = HuffmanCompressor()
-    elif args.algorithm == 'lz77':
-        compressor = LZ77Compressor()
-    elif args.algorithm == 'rle':
-        compressor = RLECompressor()
-    else:
-        compressor = CombinedCompressor()
+            args.output_file = args.input_file + '.unpacked'
+
+    apply_memory_budget(args)
+    archive = ArchiveCompressor(workers=args.workers)
+    with JobTimer() as timer:
+        archive.unpack(args.input_file, args.output_file)
+
+    report_job_stats(args, [build_job_record(
+        'unpack', args.input_file, args.output_file, 'archive',
+        _path_size(args.output_file), os.path.getsize(args.input_file),
+        timer.wall_time, timer.cpu_time, blocks=archive.block_count, peak_memory=peak_memory_bytes())])
+
+
+def handle_test(args):
+    """Проверяет сжатый файл распаковкой в никуда; при первой ошибке бросает ValueError с номером блока."""
+    detected_format = detect_compression_format(args.input_file)
+    if detected_format is None:
+        raise ValueError("Формат не определен")
+    log(f"Проверка {args.input_file} ({detected_format})...")
+    apply_memory_budget(args)
+
+    if detected_format == 'archive':
+        from src.core.archive import ArchiveCompressor
+
+        archive = ArchiveCompressor(workers=args.workers)
+        original_size = archive.verify(args.input_file)
+        log(f"OK: {archive.block_count} блоков, {original_size} байтов")
+        return
+
+    from src.core.segments import read_segments, verify_segments
+    from src.core.stream import StreamCompressor, STREAM_MAGIC
+    from src.utils.checksum import has_checksum, decompress_verified
+
+    workers = args.workers or os.cpu_count() or 1
+    with open(args.input_file, 'rb') as in_f:
+        if detected_format == 'stream':
+            stream = StreamCompressor(dictionary=load_args_dictionary(args, container=True))
+            original_size = stream.verify(in_f, workers, in_f.read(len(STREAM_MAGIC)))
+            blocks = stream.block_count
+        else:
+            segments = read_segments(in_f)
+            if segments is not None:
+                original_size = verify_segments(in_f, segments, workers,
+                                                load_args_dictionary(args, container=True))
+                blocks = len(segments)
+            else:
+                if not has_checksum(args.input_file):
+                    log("Контрольной суммы нет (файл старого формата), проверяется только распаковка")
+                in_f.seek(0)
+                try:
+                    data = decompress_verified(create_format_compressor(args, detected_format), in_f.read())
+                except Exception as e:
+                    # Исключение декодера на испорченных данных - тоже повреждение блока
+                    raise ValueError(f"Файл поврежден: блок 0: {str(e) or type(e).__name__}") from e
+                original_size, blocks = len(data), 1
+
+    log(f"OK: {blocks} блоков, {original_size} байтов")
+
+
+def handle_train(args):
+    from src.core.dictionary import DictionaryTrainer, save_dictionary, load_samples
 
     if not args.output_file:
-        if args.input_file.endswith('.compressed'):
-            args.output_file = args.input_file[:-11] + '.decompressed'
+        args.output_file = args.input_file.rstrip('/\\') + '.dict'
+
+    samples = load_samples(args.input_file)
+    dictionary = DictionaryTrainer().train(samples)
+    save_dictionary(dictionary, args.output_file)
+
+    log(f"Словарь {dictionary.dict_id:08x} сохранен в {args.output_file}")
+
+
+def handle_batch(args):
+    import asyncio
+    from src.core.batch import BatchService, load_job_list
+
+    jobs = load_job_list(args.from_list or args.input_file)
+    if args.max_memory:
+        # Задание читает файл целиком: блок - самый большой входной файл, уменьшать его нельзя
+        largest = max((os.path.getsize(job.input_path) for job in jobs if os.path.isfile(job.input_path)),
+                      default=args.block_size)
+        apply_memory_budget(args, block_size=largest, min_block_size=largest)
+        args.concurrency = min(args.concurrency or args.workers * 2, args.workers * 2)
+
+    records = []
+
+    def report(result):
+        if result.ok:
+            record = result.to_record(args.algorithm)
+            records.append(record)
+            if args.stats_format == 'json':
+                print(format_json_record(record))
+            else:
+                log(f"OK    {result.job.input_path} -> {result.output_path} "
+                    f"({result.input_size} -> {result.output_size} байт{', кэш' if result.cached else ''})")
         else:
-            args.output_file = args.input_file + '.decompressed'
+            print(f"ОШИБКА {result.job.input_path}: {result.error}")
 
-    print(f"Распаковка используя {args.algorithm} алгоритм...")
-    compressor.decompress(args.input_file, args.output_file)
+    cache = open_args_cache(args)
+
+    async def run():
+        async with BatchService(args.algorithm, args.workers, args.concurrency, cache) as service:
+            return await service.run_batch(jobs, report)
+
+    results = asyncio.run(run())
+    failed = sum(1 for result in results if not result.ok)
+    log(f"\nОбработано заданий: {len(results)}, ошибок: {failed}")
+    if cache is not None:
+        report_cache(cache)
+    if args.prometheus_file:
+        write_prometheus_textfile(args.prometheus_file, records)
+    if failed:
+        raise ValueError(f"{failed} заданий завершились с ошибкой")
+
+
+def handle_serve(args):
+    import asyncio
+    from src.core.batch import BatchService
+
+    async def run():
+        async with BatchService(args.algorithm, args.workers, args.concurrency,
+                                open_args_cache(args)) as service:
+            await service.serve(args.input_file)
+
+    asyncio.run(run())
 
 
 def compare_algorithms(input_file):
     print(f"Сравнение алгоритмов сжатия для: {input_file}")
     print("-" * 60)
 
-    algorithms = [
-        ('RLE', RLECompressor()),
-        ('Huffman', HuffmanCompressor()),
-        ('LZ77', LZ77Compressor()),
-        ('Combined', CombinedCompressor())
-    ]
+    with open(input_file, 'rb') as f:
+        original_data = f.read()
 
-    original_size = os.path.getsize(input_file)
+    original_size = len(original_data)
     print(f"Оригинальный размер: {original_size} байт\n")
 
-    for name, compressor in algorithms:
-        output_file = f"temp_{name.lower()}.compressed"
-        try:
-            compressor.compress(input_file, output_file)
-            compressed_size = os.path.getsize(output_file)
-            ratio = (1 - compressed_size / original_size) * 100
+    # Сначала быстрые алгоритмы
+    codecs = sorted((get_codec(name) for name in codec_names()), key=lambda codec: codec.speed, reverse=True)
 
-            print(f"{name:8} | {compressed_size:8} байт | {ratio:6.2f}%")
+    for codec in codecs:
+        name = codec.display_name
+        try:
+            compressed_size = len(create_compressor(codec.name).compress_bytes(original_data))
+            ratio = (1 - compressed_size / original_size) * 100 if original_size else 0.0
 
-            # Очистка
-            if os.path.exists(output_file):
-                os.remove(output_file)
+            print(f"{name:8} | {compressed_size:8} байт | {ratio:6.2f}% | "
+                  f"скорость {codec.speed}/5, сжатие {codec.ratio}/5")
 
         except Exception as e:
             print(f"{name:8} | ОШИБКА: {e}")
 
 
 def analyze_file(input_file):
-    print(f"RLE Анализ для: {input_file}")
-    print("-" * 40)
+    from src.core.estimator import sample_file, estimate, choose_algorithm
+
+    print(f"Анализ для: {input_file}")
+    print("-" * 78)
 
     try:
-        with open(input_file, 'rb') as f:
-            data = f.read()
+        input_size = os.path.getsize(input_file)
+        sample = sample_file(input_file)
+        estimates = estimate(sample, input_size)
 
-        rle = RLECompressor()
-        analysis = rle.analyze_efficiency(data)
+        print(f"Размер файла: {input_size:,} байт, выборка: {len(sample):,} байт\n")
+        print(f"{'Алгоритм':12} | {'Сжатие':>8} | {'Прогноз размера':>16} | {'Сжатие, с':>10} | {'Распаковка, с':>13}")
+        for item in estimates:
+            if item.error:
+                print(f"{item.algorithm:12} | ОШИБКА: {item.error}")
+                continue
+            print(f"{item.algorithm:12} | {item.ratio:7.2f}% | {item.predicted_size:16,} | "
+                  f"{item.compress_seconds:10.2f} | {item.decompress_seconds:13.2f}")
 
-        print(f"Размер файла: {analysis['original_size']:,} байт")
-        print(f"Предполагаемый RLE размер: {analysis['compressed_size']:,} байт")
-        print(f"Предполагаемый коэффициент сжатия: {analysis['compression_ratio']:.2f}%")
-        print(f"Кол-во RLE пар: {analysis['num_pairs']:,}")
-        print(f"Эффективность: {analysis['efficiency']}")
+        print(f"\nРекомендуемый алгоритм: {choose_algorithm(estimates)}")
 
     except Exception as e:
-        print(f"Ошибка анализа RLE: {e}")
+        print(f"Ошибка анализа: {e}")
 
 
 if __name__ == "__main__":
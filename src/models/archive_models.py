@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ArchiveEntry:
+    path: str  # Относительный путь с разделителем '/'
+    offset: int  # Смещение в общем несжатом потоке архива
+    size: int  # Размер файла
+
+
+@dataclass
+class ArchiveBlock:
+    offset: int  # Смещение сжатого блока в файле архива
+    compressed_size: int
+    original_size: int
+    crc: Optional[int] = None  # CRC32 исходных данных блока (с версии 2)
+
+
+@dataclass
+class StoredRange:
+    offset: int  # Смещение несжатых данных блока в файле архива
+    size: int
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class BatchJob:
+    action: str  # compress или decompress
+    input_path: str
+    output_path: Optional[str] = None
+    algorithm: Optional[str] = None  # None - алгоритм сервиса по умолчанию
+    job_id: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    job: BatchJob
+    ok: bool
+    output_path: Optional[str] = None
+    input_size: int = 0
+    output_size: int = 0
+    error: Optional[str] = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0  # Процессорное время в процессе пула
+    cached: bool = False  # Результат взят из кэша без сжатия
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.job.job_id,
+            'action': self.job.action,
+            'input': self.job.input_path,
+            'output': self.output_path,
+            'ok': self.ok,
+            'input_size': self.input_size,
+            'output_size': self.output_size,
+            'error': self.error,
+            'wall_time': round(self.wall_time, 6),
+            'cpu_time': round(self.cpu_time, 6),
+            'cached': self.cached,
+        }
+
+    def to_record(self, default_algorithm: str) -> dict:
+        from src.utils.job_stats import build_job_record
+
+        if self.job.action == 'compress':
+            original_size, compressed_size = self.input_size, self.output_size
+        else:
+            original_size, compressed_size = self.output_size, self.input_size
+        return build_job_record(self.job.action, self.job.input_path, self.output_path,
+                                self.job.algorithm or default_algorithm, original_size, compressed_size,
+                                self.wall_time, self.cpu_time)
@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+from typing import Any, Tuple
+
+
+@dataclass(frozen=True)
+class CodecInfo:
+    name: str  # Имя алгоритма в командной строке
+    display_name: str
+    module: str  # Модуль импортируется только при первом использовании
+    class_name: str
+    magics: Tuple[bytes, ...]  # Магические числа форматов этого алгоритма
+    extension: str
+    speed: int  # Относительная скорость сжатия, 1 - медленно, 5 - быстро
+    ratio: int  # Относительная степень сжатия, 1 - слабо, 5 - сильно
+    supports_dictionary: bool = False
+    memory_factor: int = 32  # Пиковая память при сжатии в байтах на байт входных данных
+    # Параметры конструктора компрессора; вариант без своих магических чисел
+    # распаковывается базовым алгоритмом того же класса
+    options: Tuple[Tuple[str, Any], ...] = ()
+    # Обертка над другим алгоритмом (--filter, --long): ее формат распознается
+    # и распаковывается, но в -a, сравнении и выборе auto она не участвует
+    container: bool = False
@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class CompressionDictionary:
+    dict_id: int  # Идентификатор, записывается в заголовок сжатых файлов
+    history: bytes  # Предустановленная история окна LZ77
+    literal_code_lengths: Dict[int, int] = field(default_factory=dict)  # Для huffman
+    token_code_lengths: Dict[int, int] = field(default_factory=dict)  # Для токенов combined
+    window_size: int = 4096
+    lookahead_size: int = 18
+
+    def __repr__(self):
+        return f"CompressionDictionary(id={self.dict_id:08x}, history={len(self.history)} bytes)"
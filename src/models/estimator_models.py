@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class AlgorithmEstimate:
+    algorithm: str
+    sample_size: int
+    sample_compressed_size: int
+    input_size: int  # Размер всего файла, на который экстраполируется выборка
+    compress_seconds: float  # Прогноз процессорного времени на весь файл
+    decompress_seconds: float
+    error: Optional[str] = None
+
+    @property
+    def ratio(self) -> float:
+        """Доля сэкономленного места в процентах, как в статистике сжатия."""
+        if not self.sample_size:
+            return 0.0
+        return (1 - self.sample_compressed_size / self.sample_size) * 100
+
+    @property
+    def predicted_size(self) -> int:
+        if not self.sample_size:
+            return 0
+        return round(self.input_size * self.sample_compressed_size / self.sample_size)
+
+    @property
+    def compress_throughput(self) -> float:
+        """Прогноз скорости сжатия, байтов в секунду."""
+        return self.input_size / self.compress_seconds if self.compress_seconds > 0 else float('inf')
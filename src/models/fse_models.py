@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import List, Tuple
+
+
+@dataclass(frozen=True)
+class FSETable:
+    table_log: int
+    normalized: Tuple[Tuple[int, int], ...]  # (символ, нормированная частота), в сумме 2^table_log
+    # Декодирование: состояние -> (символ, число бит, база следующего состояния)
+    decode: List[Tuple[int, int, int]]
+    # Кодирование: символ -> (частота, макс. число бит, порог, состояния по счетчику)
+    encode: dict
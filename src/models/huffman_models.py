@@ -31,4 +31,10 @@ class MinHeap:
         return len(self.heap)
 
     def is_empty(self):
-        return len(self.heap) == 0
\ No newline at end of file
+        return len(self.heap) == 0
+
+@dataclass(frozen=True)
+class HuffmanTable:
+    codes: dict  # Таблица кодирования: символ -> строка бит
+    reverse_codes: dict  # Строка бит -> символ
+    root: Node  # Дерево для декодирования
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CompressionLevel:
+    name: str
+    algorithm: str  # Алгоритм из реестра; None - блок хранится без сжатия
+    max_chain: Optional[int] = None  # Глубина поиска совпадений LZ77, None - все кандидаты окна
+    speed: float = 0.0  # Ожидаемая скорость сжатия до первых замеров, байтов в секунду
+    ratio: float = 1.0  # Ожидаемая доля сжатого размера до первых замеров
+
+
+@dataclass
+class LevelMeasurement:
+    """Скользящие средние по блокам, сжатым уровнем."""
+    speed: float
+    ratio: float
+    blocks: int = 0
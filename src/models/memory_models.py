@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class MemoryPlan:
+    block_size: int
+    workers: int
+    whole_file: bool  # Файл целиком помещается в бюджет, иначе сжатие потоком по блокам
+    table_cache_size: int  # Число таблиц в кэшах Хаффмана и FSE
+    estimated_peak: int  # Оценка пиковой памяти со всеми процессами пула
+    degradations: List[str] = field(default_factory=list)  # Что пришлось ухудшить ради бюджета
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Segment:
+    offset: int  # Смещение сегмента в файле
+    size: int  # Размер сжатых данных сегмента
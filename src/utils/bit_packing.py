@@ -0,0 +1,33 @@
+"""
+Пакетная запись кодов переменной длины через BitWriter.
+
+Коды блока склеиваются в одну строку бит и переводятся в байты через
+int(..., 2): обе операции выполняются на C, цикл по отдельным битам не нужен.
+Данные обрабатываются блоками по BLOCK_SYMBOLS символов, чтобы строка бит
+не росла с размером входа.
+"""
+BLOCK_SYMBOLS = 1 << 16
+
+
+def write_codes(bit_writer, data: bytes, codes: dict) -> int:
+    """Записывает коды codes[byte] для всех байтов data, возвращает число бит."""
+    total_bits = 0
+    get_code = codes.__getitem__
+
+    for start in range(0, len(data), BLOCK_SYMBOLS):
+        bit_string = ''.join(map(get_code, data[start:start + BLOCK_SYMBOLS]))
+        total_bits += len(bit_string)
+
+        # Дописываем к незаконченному байту BitWriter
+        if bit_writer.bit_count:
+            bit_string = format(bit_writer.current_byte, f'0{bit_writer.bit_count}b') + bit_string
+
+        full_bits = len(bit_string) & ~7
+        if full_bits:
+            bit_writer.file.write(int(bit_string[:full_bits], 2).to_bytes(full_bits // 8, 'big'))
+
+        rest = bit_string[full_bits:]
+        bit_writer.current_byte = int(rest, 2) if rest else 0
+        bit_writer.bit_count = len(rest)
+
+    return total_bits
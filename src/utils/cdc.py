@@ -0,0 +1,66 @@
+"""
+Разбиение данных на фрагменты по содержимому (FastCDC).
+
+Граница ставится там, где gear-хеш последних байтов имеет нулевые
+старшие биты, поэтому вставка в начало файла сдвигает только соседние
+границы, а одинаковые участки разных файлов режутся на одинаковые
+фрагменты. До avg_size действует более строгая маска, после - более
+мягкая (нормализованное разбиение FastCDC): размеры фрагментов
+собираются около avg_size, а хеш до min_size не считается вовсе.
+"""
+import random
+from typing import Iterator
+
+_MASK_64 = (1 << 64) - 1
+
+# Таблица gear фиксирована: одинаковые данные всегда режутся одинаково
+_gear_random = random.Random(0x43444321)
+GEAR = tuple(_gear_random.getrandbits(64) for _ in range(256))
+
+
+def _top_bits_mask(bits: int) -> int:
+    bits = max(bits, 1)
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+def chunk_limits(avg_size: int):
+    """Минимальный и максимальный размер фрагмента для среднего avg_size."""
+    return max(avg_size // 4, 1), avg_size * 4
+
+
+def cut_point(data, avg_size: int) -> int:
+    """Длина первого фрагмента data (весь data, если граница не найдена до максимума)."""
+    min_size, max_size = chunk_limits(avg_size)
+    size = len(data)
+    if size <= min_size:
+        return size
+
+    bits = avg_size.bit_length() - 1
+    strict_mask = _top_bits_mask(bits + 2)
+    loose_mask = _top_bits_mask(bits - 2)
+    normal_size = min(avg_size, size)
+    end = min(max_size, size)
+
+    gear = GEAR
+    h = 0
+    position = min_size
+    for byte in data[min_size:normal_size]:
+        h = ((h << 1) + gear[byte]) & _MASK_64
+        position += 1
+        if not h & strict_mask:
+            return position
+    for byte in data[normal_size:end]:
+        h = ((h << 1) + gear[byte]) & _MASK_64
+        position += 1
+        if not h & loose_mask:
+            return position
+    return end
+
+
+def iter_chunks(data: bytes, avg_size: int) -> Iterator[bytes]:
+    view = memoryview(data)
+    position = 0
+    while position < len(data):
+        length = cut_point(view[position:], avg_size)
+        yield bytes(view[position:position + length])
+        position += length
@@ -0,0 +1,139 @@
+"""
+Контрольные суммы CRC32 для сжатых данных.
+
+Одноблочные форматы (HUFFMAN, LZ77, RLE, COMBI и другие) получают в конце
+файла запись CHECKSUM_MAGIC: CRC32 (4) и размер (8) исходных данных, затем
+магическое число. Запись читается с конца, поэтому заголовки форматов не
+меняются, а файлы без нее распаковываются как раньше.
+"""
+import os
+import zlib
+from typing import Optional, Tuple
+
+CHECKSUM_MAGIC = b"CRC32\0\0\0"
+CHECKSUM_TRAILER_SIZE = 4 + 8 + len(CHECKSUM_MAGIC)
+CRC_CHUNK_SIZE = 1 << 20
+
+
+def crc32_file(path: str) -> int:
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CRC_CHUNK_SIZE)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def _gf2_times(matrix, vector: int) -> int:
+    result = 0
+    row = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[row]
+        vector >>= 1
+        row += 1
+    return result
+
+
+def _gf2_square(matrix):
+    return [_gf2_times(matrix, matrix[row]) for row in range(32)]
+
+
+def crc32_combine(crc1: int, crc2: int, size2: int) -> int:
+    """CRC32 склейки двух фрагментов по их CRC32 и длине второго (как crc32_combine из zlib)."""
+    if size2 <= 0:
+        return crc1
+    # Матрица сдвига CRC на один нулевой бит, затем возведение в квадрат до байтов
+    odd = [0xEDB88320] + [1 << row for row in range(31)]
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    while True:
+        even = _gf2_square(odd)
+        if size2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        size2 >>= 1
+        if not size2:
+            break
+        odd = _gf2_square(even)
+        if size2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        size2 >>= 1
+        if not size2:
+            break
+    return crc1 ^ crc2
+
+
+def checksum_trailer(crc: int, size: int) -> bytes:
+    return crc.to_bytes(4, 'big') + size.to_bytes(8, 'big') + CHECKSUM_MAGIC
+
+
+def add_checksum(compressed_data: bytes, original_data: bytes) -> bytes:
+    return compressed_data + checksum_trailer(zlib.crc32(original_data), len(original_data))
+
+
+def split_checksum(data: bytes) -> Tuple[bytes, Optional[int], Optional[int]]:
+    """Отделяет запись контрольной суммы: сжатые данные, CRC32 и размер (None, если записи нет)."""
+    if len(data) < CHECKSUM_TRAILER_SIZE or not data.endswith(CHECKSUM_MAGIC):
+        return data, None, None
+    trailer = data[-CHECKSUM_TRAILER_SIZE:]
+    return (data[:-CHECKSUM_TRAILER_SIZE], int.from_bytes(trailer[:4], 'big'),
+            int.from_bytes(trailer[4:12], 'big'))
+
+
+def verify_checksum(data: bytes, crc: Optional[int], size: Optional[int], what: str = "Данные"):
+    if size is not None and len(data) != size:
+        raise ValueError(f"{what} повреждены: распаковано {len(data)} байтов, ожидалось {size}")
+    if crc is not None and zlib.crc32(data) != crc:
+        raise ValueError(f"{what} повреждены: контрольная сумма не совпадает")
+
+
+def append_file_checksum(input_path: str, output_path: str):
+    """Дописывает запись контрольной суммы исходного файла в конец сжатого."""
+    trailer = checksum_trailer(crc32_file(input_path), os.path.getsize(input_path))
+    with open(output_path, 'ab') as f:
+        f.write(trailer)
+
+
+def has_checksum(path: str) -> bool:
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) < CHECKSUM_TRAILER_SIZE:
+            return False
+        f.seek(-len(CHECKSUM_MAGIC), os.SEEK_END)
+        return f.read() == CHECKSUM_MAGIC
+
+
+def read_file_checksum(path: str) -> Tuple[Optional[int], Optional[int]]:
+    """CRC32 и размер из записи в конце сжатого файла, (None, None) - если записи нет."""
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) < CHECKSUM_TRAILER_SIZE:
+            return None, None
+        f.seek(-CHECKSUM_TRAILER_SIZE, os.SEEK_END)
+        _, crc, size = split_checksum(f.read())
+    return crc, size
+
+
+def verify_file_checksum(path: str, crc: Optional[int], size: Optional[int], what: str = "Данные"):
+    """Сверяет распакованный файл с записью контрольной суммы, читая его кусками через read_range."""
+    from src.utils.zero_copy import read_range
+
+    with open(path, 'rb') as f:
+        actual_size = f.seek(0, os.SEEK_END)
+        if size is not None and actual_size != size:
+            raise ValueError(f"{what} повреждены: распаковано {actual_size} байтов, ожидалось {size}")
+        if crc is None:
+            return
+        actual_crc = 0
+        for chunk in read_range(f, 0, actual_size):
+            actual_crc = zlib.crc32(chunk, actual_crc)
+    if actual_crc != crc:
+        raise ValueError(f"{what} повреждены: контрольная сумма не совпадает")
+
+
+def decompress_verified(compressor, data: bytes, what: str = "Данные") -> bytes:
+    """Распаковывает одноблочный файл, проверяя запись контрольной суммы, если она есть."""
+    payload, crc, size = split_checksum(data)
+    decoded_data = compressor.decompress_bytes(payload)
+    verify_checksum(decoded_data, crc, size, what)
+    return decoded_data
@@ -0,0 +1,29 @@
+"""
+Вывод сообщений о ходе работы движков.
+
+Все движки пишут прогресс через log(), а не print(), чтобы режим --quiet
+мог отключить его целиком, в том числе в процессах пула.
+"""
+import sys
+
+_quiet = False
+_to_stderr = False  # stdout занят данными при выводе в канал
+
+
+def set_quiet(quiet: bool):
+    global _quiet
+    _quiet = quiet
+
+
+def is_quiet() -> bool:
+    return _quiet
+
+
+def set_log_to_stderr(enabled: bool):
+    global _to_stderr
+    _to_stderr = enabled
+
+
+def log(message: str = ""):
+    if not _quiet:
+        print(message, file=sys.stderr if _to_stderr else sys.stdout)
@@ -1,19 +1,28 @@
+from src.core.registry import detect_codec
+from src.utils.console import log
+
+ARCHIVE_MAGIC_PREFIX = b'ARCHIVE'
+STREAM_MAGIC_PREFIX = b'STREAM'
+PATCH_MAGIC_PREFIX = b'PATCH'
+
+
+def detect_format_from_header(magic: bytes) -> str | None:
+    if magic.startswith(ARCHIVE_MAGIC_PREFIX):
+        return 'archive'
+    if magic.startswith(STREAM_MAGIC_PREFIX):
+        return 'stream'
+    if magic.startswith(PATCH_MAGIC_PREFIX):
+        return 'patch'  # Распаковывается только вместе с опорным файлом
+    return detect_codec(magic)
+
+
 def detect_compression_format(file_path: str) -> str | None:
     try:
         with open(file_path, 'rb') as f:
             magic = f.read(8)
 
-            if magic.startswith(b'HUFFMAN'):
-                return 'huffman'
-            elif magic.startswith(b'LZ77\0\0'):
-                return 'lz77'
-            elif magic.startswith(b'COMBI'):
-                return 'combined'
-            elif magic.startswith(b'RLE\0'):
-                return 'rle'
-            else:
-                return None
+            return detect_format_from_header(magic)
 
     except Exception as e:
-        print(f"Ошибки определения формата: {e}")
-        return None
\ No newline at end of file
+        log(f"Ошибки определения формата: {e}")
+        return None
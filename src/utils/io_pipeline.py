@@ -0,0 +1,133 @@
+"""
+Упреждающее чтение и отложенная запись в фоновых потоках.
+
+Движки читают блок, сжимают его и пишут результат по очереди, так что диск
+простаивает во время вычислений, а процессор - во время ввода-вывода.
+prefetch выполняет итератор чтения в отдельном потоке, WriteBehind - операции
+записи. Между потоками лежат очереди на PIPELINE_DEPTH элементов (двойная
+буферизация): пока движок обрабатывает блок, следующий уже читается, а
+предыдущий пишется, и время работы приближается к max(ввод-вывод, вычисления)
+вместо их суммы. Операции с файлами освобождают GIL, поэтому потоков хватает.
+"""
+import queue
+import threading
+from typing import Iterable, Iterator
+
+PIPELINE_DEPTH = 2
+_POLL_INTERVAL = 0.1
+_DONE = object()
+
+
+def read_blocks(in_f, block_size: int) -> Iterator[bytes]:
+    while True:
+        data = in_f.read(block_size)
+        if not data:
+            break
+        yield data
+
+
+def _put(items: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def prefetch(iterable: Iterable, depth: int = PIPELINE_DEPTH) -> Iterator:
+    """
+    Выдает элементы iterable, который выполняется в фоновом потоке не дальше
+    чем на depth элементов вперед. Ошибка итератора пробрасывается потребителю.
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(items, (item, None), stop):
+                    return
+            _put(items, (_DONE, None), stop)
+        except BaseException as e:
+            _put(items, (_DONE, e), stop)
+
+    thread = threading.Thread(target=produce, name='read-ahead', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                # Поток чтения завершен, файл снова принадлежит вызывающему
+                thread.join()
+                return
+            yield item
+    finally:
+        # Потребитель остановился раньше - поток чтения завершится на следующем элементе
+        stop.set()
+
+
+class WriteBehind:
+    """
+    Выполняет операции записи по порядку в фоновом потоке. Пока запись идет,
+    в очереди ждут не больше depth операций; ошибка записи бросается из
+    следующего submit или при закрытии.
+    """
+
+    def __init__(self, out_f=None, depth: int = PIPELINE_DEPTH, position: int = 0):
+        self.out_f = out_f
+        self.position = position  # Позиция out_f после всех поставленных в очередь write
+        self._operations = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            function, args = self._operations.get()
+            if function is None:
+                return
+            # После ошибки очередь только опустошается, чтобы submit не блокировался
+            if self._error is None:
+                try:
+                    function(*args)
+                except BaseException as e:
+                    self._error = e
+
+    def submit(self, function, *args):
+        if self._error is not None:
+            raise self._error
+        self._operations.put((function, args))
+
+    def write(self, data: bytes, flush: bool = False):
+        self.position += len(data)
+        self.submit(self._write, data, flush)
+
+    def _write(self, data: bytes, flush: bool):
+        self.out_f.write(data)
+        if flush:
+            self.out_f.flush()
+
+    def tell(self) -> int:
+        return self.position
+
+    def close(self):
+        """Дожидается выполнения всех операций."""
+        if self._thread.is_alive():
+            self._operations.put((None, ()))
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
@@ -0,0 +1,139 @@
+"""
+Статистика заданий: одна структурированная запись на задание в JSON
+и экспорт в textfile для node_exporter (Prometheus).
+"""
+import json
+import os
+import sys
+import time
+from src.utils.lru_cache import cache_stats
+from src.utils.memory_budget import MEMORY_SAMPLER
+
+try:
+    import resource
+except ImportError:  # Нет на Windows - пиковая память не сообщается
+    resource = None
+
+
+def peak_memory_bytes():
+    # При опросе RSS (только с --max-memory) пик считается за задание вместе с процессами пула
+    if MEMORY_SAMPLER.running and MEMORY_SAMPLER.peak is not None:
+        return MEMORY_SAMPLER.peak
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class JobTimer:
+    """Замеряет время по часам и процессорное время блока with."""
+
+    def __enter__(self):
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time = time.perf_counter() - self._wall_start
+        self.cpu_time = time.process_time() - self._cpu_start
+        return False
+
+
+def build_job_record(action: str, input_path: str, output_path: str, algorithm: str,
+                     original_size: int, compressed_size: int, wall_time: float, cpu_time: float,
+                     level=None, blocks: int = 1, peak_memory=None) -> dict:
+    """level - уровень подбора по скорости (--target-mbps, --deadline); без него поля нет."""
+    ratio = (1 - compressed_size / original_size) * 100 if original_size else 0.0
+    throughput = original_size / wall_time if wall_time > 0 else 0.0
+    record = {
+        'action': action,
+        'input': input_path,
+        'output': output_path,
+        'algorithm': algorithm,
+        'level': level,
+        'original_size': original_size,
+        'compressed_size': compressed_size,
+        'ratio': round(ratio, 4),
+        'wall_time': round(wall_time, 6),
+        'cpu_time': round(cpu_time, 6),
+        'throughput_bytes_per_sec': round(throughput, 1),
+        'peak_memory_bytes': peak_memory,
+        'blocks': blocks,
+        # Попадания и промахи кэшей таблиц главного процесса
+        'table_caches': {name: {'hits': stats['hits'], 'misses': stats['misses']}
+                         for name, stats in cache_stats().items()},
+    }
+    if level is None:
+        del record['level']
+    return record
+
+
+def format_json_record(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, sort_keys=True)
+
+
+def format_text_record(record: dict) -> str:
+    return '\n'.join([
+        "",
+        "Статистика сжатия:",
+        f"Оригинальный размер: {record['original_size']} bytes",
+        f"Сжатый размер: {record['compressed_size']} bytes",
+        f"Коэффициент сжатия: {record['ratio']:.2f}%",
+    ])
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus_textfile(path: str, records: list):
+    """
+    Пишет метрики заданий в формате textfile collector.
+
+    Файл заменяется атомарно через rename, чтобы node_exporter
+    никогда не прочитал его наполовину записанным.
+    """
+    metrics = [
+        ('archiver_jobs_total', 'counter', 'Число заданий', lambda record: 1),
+        ('archiver_original_bytes_total', 'counter', 'Байтов несжатых данных', lambda record: record['original_size']),
+        ('archiver_compressed_bytes_total', 'counter', 'Байтов сжатых данных', lambda record: record['compressed_size']),
+        ('archiver_wall_seconds_total', 'counter', 'Время заданий по часам', lambda record: record['wall_time']),
+        ('archiver_cpu_seconds_total', 'counter', 'Процессорное время заданий', lambda record: record['cpu_time']),
+        ('archiver_blocks_total', 'counter', 'Число обработанных блоков', lambda record: record['blocks']),
+    ]
+
+    totals = {}
+    for record in records:
+        labels = (record['action'], record['algorithm'])
+        for name, _, _, value in metrics:
+            key = (name, labels)
+            totals[key] = totals.get(key, 0) + value(record)
+
+    lines = []
+    for name, metric_type, help_text, _ in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for (metric_name, (action, algorithm)), value in sorted(totals.items()):
+            if metric_name == name:
+                lines.append(f'{name}{{action="{_escape_label(action)}",'
+                             f'algorithm="{_escape_label(algorithm)}"}} {value}')
+
+    wall_time = sum(record['wall_time'] for record in records)
+    original_size = sum(record['original_size'] for record in records)
+    lines.append("# HELP archiver_throughput_bytes_per_second Пропускная способность последнего запуска")
+    lines.append("# TYPE archiver_throughput_bytes_per_second gauge")
+    lines.append(f"archiver_throughput_bytes_per_second {original_size / wall_time if wall_time > 0 else 0.0}")
+
+    peaks = [record['peak_memory_bytes'] for record in records if record['peak_memory_bytes'] is not None]
+    if peaks:
+        lines.append("# HELP archiver_peak_memory_bytes Пиковая память процесса")
+        lines.append("# TYPE archiver_peak_memory_bytes gauge")
+        lines.append(f"archiver_peak_memory_bytes {max(peaks)}")
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.replace(temp_path, path)
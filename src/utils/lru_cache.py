@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+# Именованные кэши процесса: их счетчики попадают в --profile и статистику заданий
+_NAMED_CACHES = {}
+
+
+def cache_stats() -> dict:
+    """Счетчики именованных кэшей текущего процесса (процессы пула ведут свои)."""
+    return {name: cache.stats() for name, cache in sorted(_NAMED_CACHES.items())}
+
+
+class LRUCache:
+    """Ограниченный по размеру LRU кэш со счетчиками попаданий и промахов."""
+
+    def __init__(self, maxsize=128, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        if name is not None:
+            _NAMED_CACHES[name] = self
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._items),
+                'maxsize': self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._items)
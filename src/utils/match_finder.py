@@ -0,0 +1,19 @@
+"""
+Продление найденных совпадений срезами вместо побайтового сравнения.
+"""
+
+MATCH_STEP = 4096
+
+
+def match_length(source: memoryview, source_pos: int, data: memoryview, pos: int) -> int:
+    """Длина общего префикса source[source_pos:] и data[pos:]."""
+    limit = min(len(source) - source_pos, len(data) - pos)
+    length = 0
+    step = MATCH_STEP
+    # Сначала шаги по MATCH_STEP байтов, затем вдвое меньшие - до одного байта
+    while step:
+        while (length + step <= limit and
+               source[source_pos + length:source_pos + length + step] == data[pos + length:pos + length + step]):
+            length += step
+        step >>= 1
+    return length
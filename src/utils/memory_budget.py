@@ -0,0 +1,202 @@
+"""
+Бюджет памяти (--max-memory) и учет пиковой памяти задания.
+
+plan_memory подбирает параметры так, чтобы оценка пика уложилась в бюджет.
+Оценка строится по memory_factor алгоритма из реестра (пиковая память на
+байт входных данных), числу процессов пула и блоков в очередях. При нехватке
+параметры ухудшаются по порядку: файл сжимается потоком по блокам вместо
+чтения целиком, уменьшается число процессов, затем размер блока. Только если
+не помещается даже один процесс с минимальным блоком, бросается ValueError.
+
+MemorySampler в фоновом потоке опрашивает RSS процесса вместе с процессами
+пула, а при профилировании - еще и пик кучи Python через tracemalloc.
+"""
+import glob
+import os
+import threading
+import tracemalloc
+from typing import Optional
+from src.core.registry import get_codec, DEFAULT_CODEC
+from src.models.memory_models import MemoryPlan
+
+PROCESS_OVERHEAD = 32 << 20  # Интерпретатор и модули одного процесса
+MIN_BLOCK_SIZE = 1 << 12
+# Блоки, которые главный процесс держит сверх пула: упреждающее чтение и отложенная запись
+PIPELINE_BLOCKS = 4
+MAX_TABLE_CACHE_SIZE = 256
+TABLE_CACHE_ENTRY_SIZE = 64 << 10  # С запасом: таблица декодирования и ее ключ
+
+_SIZE_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """Размер в байтах: 1048576, 512K, 256M, 2G."""
+    value = text.strip().upper().removesuffix('B').removesuffix('I')
+    multiplier = _SIZE_UNITS.get(value[-1:], 1)
+    if multiplier != 1:
+        value = value[:-1]
+    try:
+        size = int(float(value) * multiplier)
+    except ValueError:
+        raise ValueError(f"Неверный размер: {text}") from None
+    if size <= 0:
+        raise ValueError(f"Размер должен быть положительным: {text}")
+    return size
+
+
+def memory_factor(algorithm: str, filters=None, long=False) -> int:
+    """Пиковая память сжатия в байтах на байт входных данных."""
+    if algorithm == 'auto':
+        algorithm = DEFAULT_CODEC
+    factor = get_codec(algorithm).memory_factor
+    if filters:
+        factor += 4  # Копия блока после фильтров
+    if long:
+        factor += get_codec('long').memory_factor
+    return factor
+
+
+def _pool_peak(block_size: int, workers: int, factor: int) -> int:
+    if workers <= 1:
+        return PROCESS_OVERHEAD + block_size * (factor + PIPELINE_BLOCKS)
+    # Главный процесс держит по 2 задачи на процесс пула (данные и результат) и очереди ввода-вывода
+    main_process = PROCESS_OVERHEAD + block_size * (4 * workers + PIPELINE_BLOCKS)
+    return main_process + workers * (PROCESS_OVERHEAD + block_size * factor)
+
+
+def plan_memory(max_memory: int, algorithm: str, block_size: int, workers: int,
+                input_size: Optional[int] = None, filters=None, long=False,
+                min_block_size: int = MIN_BLOCK_SIZE) -> MemoryPlan:
+    """
+    Параметры под бюджет max_memory. input_size - размер файла, который
+    движок читает целиком (None - работа идет только блоками); блок не
+    уменьшается ниже min_block_size.
+    """
+    factor = memory_factor(algorithm, filters, long)
+    available = max_memory - PROCESS_OVERHEAD
+    if available <= 0:
+        raise ValueError(f"Бюджет памяти {max_memory} байтов меньше минимума {PROCESS_OVERHEAD + 1}")
+
+    table_cache_size = max(1, min(MAX_TABLE_CACHE_SIZE, available // 16 // TABLE_CACHE_ENTRY_SIZE))
+    plan = MemoryPlan(block_size, max(workers, 1), False, table_cache_size, 0)
+    if table_cache_size < MAX_TABLE_CACHE_SIZE:
+        plan.degradations.append(f"кэши таблиц уменьшены до {table_cache_size}")
+
+    if input_size is not None:
+        whole_file_peak = PROCESS_OVERHEAD + input_size * (factor + 1)
+        if whole_file_peak <= max_memory:
+            plan.whole_file = True
+            plan.estimated_peak = whole_file_peak
+            return plan
+        plan.degradations.append(f"файл целиком требует около {whole_file_peak} байтов: сжатие потоком по блокам")
+        plan.workers = 1  # Поток кодируется в одном процессе
+
+    while _pool_peak(plan.block_size, plan.workers, factor) > max_memory and plan.workers > 1:
+        plan.workers -= 1
+    if plan.workers < max(workers, 1) and input_size is None:
+        plan.degradations.append(f"процессов пула: {plan.workers} вместо {workers}")
+
+    original_block_size = plan.block_size
+    while _pool_peak(plan.block_size, plan.workers, factor) > max_memory and plan.block_size > min_block_size:
+        plan.block_size = max(plan.block_size // 2, min_block_size)
+    if plan.block_size < original_block_size:
+        plan.degradations.append(f"размер блока {plan.block_size} вместо {original_block_size}")
+
+    plan.estimated_peak = _pool_peak(plan.block_size, plan.workers, factor)
+    if plan.estimated_peak > max_memory:
+        raise ValueError(f"Бюджет памяти {max_memory} байтов слишком мал для {algorithm}: "
+                         f"нужно не меньше {plan.estimated_peak}")
+    return plan
+
+
+def limit_table_caches(maxsize: int):
+    """Ограничивает кэши таблиц Хаффмана и FSE (процессы пула наследуют их при fork)."""
+    from src.core.huffman import TABLE_CACHE
+    from src.core.fse import FSE_TABLE_CACHE
+    for cache in (TABLE_CACHE, FSE_TABLE_CACHE):
+        cache.maxsize = maxsize
+
+
+def current_rss_bytes() -> Optional[int]:
+    """RSS процесса и его дочерних процессов (процессов пула); None, если /proc нет."""
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+
+    for children_path in glob.glob('/proc/self/task/*/children'):
+        try:
+            with open(children_path) as f:
+                pids = f.read().split()
+        except OSError:
+            continue
+        for pid in pids:
+            try:
+                with open(f'/proc/{pid}/statm') as f:
+                    pages += int(f.read().split()[1])
+            except (OSError, ValueError, IndexError):
+                continue  # Процесс уже завершился
+    return pages * page_size
+
+
+class MemorySampler:
+    """Фоновый опрос RSS с шагом interval секунд; peak - максимум за время работы."""
+
+    def __init__(self, interval: float = 0.02, max_memory: Optional[int] = None, trace_python: bool = False):
+        self.interval = interval
+        self.max_memory = max_memory
+        self.trace_python = trace_python
+        self.peak = None
+        self.python_peak = None  # Пик кучи Python по tracemalloc
+        self.over_budget = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.trace_python:
+            tracemalloc.start()
+        self._stop.clear()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._sample()
+        if self.trace_python:
+            _, self.python_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is None:
+            return
+        if self.peak is None or rss > self.peak:
+            self.peak = rss
+        if self.max_memory and rss > self.max_memory and not self.over_budget:
+            self.over_budget = True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+
+MEMORY_SAMPLER = MemorySampler()
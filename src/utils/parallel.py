@@ -0,0 +1,28 @@
+"""
+Упорядоченное применение функции к задачам в пуле процессов.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+from src.utils.console import is_quiet, set_quiet
+
+
+def parallel_map(function, tasks, workers: int) -> Iterator:
+    """Применяет function к задачам в пуле процессов, сохраняя порядок результатов."""
+    if workers <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+
+    # Ограничиваем число задач в полете, чтобы не держать в памяти все данные
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=set_quiet,
+                             initargs=(is_quiet(),)) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, *task))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
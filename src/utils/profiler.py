@@ -0,0 +1,140 @@
+"""
+Инструментирование этапов сжатия: именованные таймеры, счетчики и гистограммы.
+
+Пока профилирование выключено, stage() возвращает общий пустой контекст,
+а count()/observe() сразу выходят, поэтому в рабочих запусках стоимость
+сводится к одному вызову метода на этап. Счетчики внутри горячих циклов
+не вызываются - движки считают их после цикла и только при PROFILER.enabled.
+"""
+import functools
+import threading
+import time
+from src.utils.lru_cache import cache_stats
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        stack.append(self.name)
+        self.path = ';'.join(stack)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.profiler._stack().pop()
+        timer = self.profiler.timers.setdefault(self.path, [0.0, 0])
+        timer[0] += elapsed
+        timer[1] += 1
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.timers = {}  # путь этапов через ';' -> [секунды, вызовы]
+        self.counters = {}
+        self.histograms = {}
+        self._local = threading.local()
+
+    def enable(self):
+        self.enabled = True
+
+    def reset(self):
+        self.timers = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name: str):
+        """Декоратор: замеряет каждый вызов функции как этап name."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Stage(self, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, values):
+        """Добавляет значения в гистограмму name (по одному бакету на значение)."""
+        if not self.enabled:
+            return
+        histogram = self.histograms.setdefault(name, {})
+        for value in values:
+            histogram[value] = histogram.get(value, 0) + 1
+
+    def self_times(self) -> dict:
+        """Собственное время этапов без вложенных - формат свернутых стеков flamegraph."""
+        result = {path: total for path, (total, _) in self.timers.items()}
+        for path, (total, _) in self.timers.items():
+            parent = path.rpartition(';')[0]
+            if parent in result:
+                result[parent] -= total
+        return result
+
+    def write_folded(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, seconds in sorted(self.self_times().items()):
+                f.write(f"{stack} {max(0, round(seconds * 1_000_000))}\n")
+
+    def report(self) -> str:
+        lines = ["Профиль выполнения:", f"{'Этап':40} {'Время, мс':>12} {'Вызовы':>8}"]
+        for path, (total, calls) in sorted(self.timers.items()):
+            depth = path.count(';')
+            name = '  ' * depth + path.rpartition(';')[2]
+            lines.append(f"{name:40} {total * 1000:12.2f} {calls:8}")
+
+        if self.counters:
+            lines.append("Счетчики:")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"  {name:38} {value:12}")
+
+        caches = cache_stats()
+        if caches:
+            lines.append(f"{'Кэши:':40} {'Попадания':>12} {'Промахи':>8} {'Доля':>7}")
+            for name, stats in caches.items():
+                lines.append(f"  {name:38} {stats['hits']:12} {stats['misses']:8} {stats['hit_rate'] * 100:6.1f}%")
+
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f"Гистограмма {name}:")
+            total = sum(histogram.values())
+            for value, count in sorted(histogram.items()):
+                lines.append(f"  {value:6} {count:10} {count / total * 100:6.2f}%")
+
+        return '\n'.join(lines)
+
+
+# Общий профилировщик процесса, включается флагом --profile
+PROFILER = Profiler()
@@ -0,0 +1,172 @@
+"""
+Дисковый кэш результатов сжатия.
+
+Ключ - BLAKE2b от параметров сжатия и содержимого входных данных, значение -
+готовый сжатый файл. При попадании результат копируется из кэша без
+повторного кодирования. Время последнего использования записи хранится в
+mtime файла: попадание обновляет его, а при превышении max_size удаляются
+самые давно использованные записи (LRU).
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Optional
+
+DEFAULT_CACHE_SIZE = 1 << 30
+HASH_CHUNK_SIZE = 1 << 20
+STATS_FILE = 'stats.json'
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def compression_params(algorithm: str, filters=None, long=False, dictionary_hash=None) -> str:
+    """Параметры, от которых зависит результат сжатия, для ключа кэша."""
+    return f"{algorithm}|filter={filters}|long={long}|dict={dictionary_hash}"
+
+
+def hash_file(path: str) -> str:
+    content_hash = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_size: int = DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0  # Входные байты, которые не пришлось сжимать
+        self._lock = threading.Lock()  # batch обращается к кэшу из потоков asyncio.to_thread
+        self._total_size = None  # Размер кэша считается обходом каталога один раз
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(content_hash: str, params: str) -> str:
+        return hashlib.blake2b(f"{params}\0{content_hash}".encode('utf-8'), digest_size=20).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def lookup(self, key: str, input_size: int) -> Optional[str]:
+        """Путь к записи при попадании (с обновлением времени использования) или None."""
+        path = self._entry_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._count(misses=1)
+            return None
+        self._count(hits=1, bytes_saved=input_size)
+        return path
+
+    def _count(self, hits=0, misses=0, bytes_saved=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.bytes_saved += bytes_saved
+
+    def get(self, key: str, input_size: int) -> Optional[bytes]:
+        path = self.lookup(key, input_size)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:  # Запись вытеснена другим процессом между проверкой и чтением
+            self._count(hits=-1, misses=1, bytes_saved=-input_size)
+            return None
+
+    def put(self, key: str, data: bytes):
+        self._store(key, lambda temp_path: self._write(temp_path, data))
+
+    def put_file(self, key: str, source_path: str):
+        self._store(key, lambda temp_path: shutil.copyfile(source_path, temp_path))
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def _store(self, key: str, write):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запись появляется атомарно: параллельный читатель не увидит ее наполовину записанной
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._total_size is None:
+                self.evict()
+            else:
+                self._total_size += size
+                if self._total_size > self.max_size:
+                    self.evict()
+
+    def evict(self):
+        """Удаляет самые давно использованные записи, пока кэш больше max_size."""
+        entries = []
+        total = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name == STATS_FILE or name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_size = total
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups * 100 if lookups else 0.0
+
+    def report(self) -> str:
+        return (f"Кэш: попаданий {self.hits} из {self.hits + self.misses} ({self.hit_rate:.1f}%), "
+                f"не сжимались повторно {self.bytes_saved} байтов")
+
+    def save_stats(self):
+        """Добавляет счетчики запуска к накопленной статистике каталога кэша."""
+        path = os.path.join(self.directory, STATS_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                totals = json.load(f)
+        except (FileNotFoundError, ValueError):
+            totals = {}
+
+        for name in ('hits', 'misses', 'bytes_saved'):
+            totals[name] = totals.get(name, 0) + getattr(self, name)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(totals, f)
+        os.replace(temp_path, path)
+        return totals
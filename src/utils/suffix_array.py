@@ -0,0 +1,108 @@
+"""
+Построение суффиксного массива за линейное время (SA-IS, Nong-Zhang-Chan).
+
+Суффиксы делятся на S- и L-типы, LMS-подстроки сортируются индуцированной
+сортировкой, а если среди них есть одинаковые - задача решается рекурсивно
+на сжатой строке их рангов.
+"""
+from typing import List, Sequence
+
+
+def suffix_array(s: Sequence[int], upper: int) -> List[int]:
+    """Суффиксный массив строки s из символов 0..upper."""
+    n = len(s)
+    if n == 0:
+        return []
+    if n == 1:
+        return [0]
+    if n == 2:
+        return [0, 1] if s[0] < s[1] else [1, 0]
+
+    sa = [0] * n
+    ls = [False] * n  # True - суффикс S-типа
+    for i in range(n - 2, -1, -1):
+        ls[i] = ls[i + 1] if s[i] == s[i + 1] else s[i] < s[i + 1]
+
+    # Начала L- и S-корзин каждого символа
+    sum_l = [0] * (upper + 1)
+    sum_s = [0] * (upper + 1)
+    for i in range(n):
+        if not ls[i]:
+            sum_s[s[i]] += 1
+        else:
+            sum_l[s[i] + 1] += 1
+    for i in range(upper + 1):
+        sum_s[i] += sum_l[i]
+        if i < upper:
+            sum_l[i + 1] += sum_s[i]
+
+    def induce(lms: List[int]):
+        for i in range(n):
+            sa[i] = -1
+
+        buckets = sum_s[:]
+        for d in lms:
+            if d == n:
+                continue
+            sa[buckets[s[d]]] = d
+            buckets[s[d]] += 1
+
+        buckets = sum_l[:]
+        sa[buckets[s[n - 1]]] = n - 1
+        buckets[s[n - 1]] += 1
+        for i in range(n):
+            v = sa[i]
+            if v >= 1 and not ls[v - 1]:
+                sa[buckets[s[v - 1]]] = v - 1
+                buckets[s[v - 1]] += 1
+
+        buckets = sum_l[:]
+        for i in range(n - 1, -1, -1):
+            v = sa[i]
+            if v >= 1 and ls[v - 1]:
+                buckets[s[v - 1] + 1] -= 1
+                sa[buckets[s[v - 1] + 1]] = v - 1
+
+    lms_map = [-1] * (n + 1)
+    lms = []
+    for i in range(1, n):
+        if not ls[i - 1] and ls[i]:
+            lms_map[i] = len(lms)
+            lms.append(i)
+    m = len(lms)
+
+    induce(lms)
+
+    if m:
+        sorted_lms = [v for v in sa if lms_map[v] != -1]
+        reduced = [0] * m
+        rank = 0
+        reduced[lms_map[sorted_lms[0]]] = 0
+        for i in range(1, m):
+            left = sorted_lms[i - 1]
+            right = sorted_lms[i]
+            end_left = lms[lms_map[left] + 1] if lms_map[left] + 1 < m else n
+            end_right = lms[lms_map[right] + 1] if lms_map[right] + 1 < m else n
+
+            same = True
+            if end_left - left != end_right - right:
+                same = False
+            else:
+                while left < end_left:
+                    if s[left] != s[right]:
+                        break
+                    left += 1
+                    right += 1
+                if left == n or s[left] != s[right]:
+                    same = False
+
+            if not same:
+                rank += 1
+            reduced[lms_map[sorted_lms[i]]] = rank
+
+        reduced_sa = suffix_array(reduced, rank)
+        for i in range(m):
+            sorted_lms[i] = lms[reduced_sa[i]]
+        induce(sorted_lms)
+
+    return sa
@@ -0,0 +1,107 @@
+"""
+Копирование диапазона файла без прохода данных через Python.
+
+Сначала пробуем os.copy_file_range (копирование внутри ядра, на части ФС -
+без копирования вовсе), затем os.sendfile, и только если оба недоступны
+(другая ОС, канал на входе, BytesIO) - чтение и запись кусками по
+COPY_CHUNK_SIZE. Память в любом случае не зависит от размера диапазона.
+"""
+import errno
+import os
+
+COPY_CHUNK_SIZE = 1 << 20
+
+# Ошибки, после которых стоит попробовать следующий способ копирования
+_UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF, errno.ESPIPE}
+
+
+def file_descriptor(f):
+    try:
+        return f.fileno()
+    except (AttributeError, OSError, ValueError):  # io.BytesIO и подобные
+        return None
+
+
+def copy_range(in_f, out_f, offset: int, count: int):
+    """
+    Дописывает count байтов из in_f начиная с offset в текущую позицию out_f.
+    Позиция in_f не меняется.
+    """
+    out_f.flush()
+    in_fd = file_descriptor(in_f)
+    out_fd = file_descriptor(out_f)
+
+    copied = 0
+    if in_fd is not None and out_fd is not None:
+        for copy in (_copy_file_range, _sendfile):
+            try:
+                copied = copy(in_fd, out_fd, offset, count)
+                break
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+
+    if copied < count:
+        _copy_chunks(in_f, out_f, offset + copied, count - copied)
+    elif out_fd is not None and out_f.seekable():
+        # Буферизованный объект не знает о записи мимо него - синхронизируем позицию
+        out_f.seek(os.lseek(out_fd, 0, os.SEEK_CUR))
+
+
+def _copy_file_range(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, "copy_file_range недоступен")
+    copied = 0
+    while copied < count:
+        written = os.copy_file_range(in_fd, out_fd, count - copied, offset + copied)
+        if written == 0:
+            raise ValueError("Данные обрезаны: файл короче заголовка")
+        copied += written
+    return copied
+
+
+def _sendfile(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    if not hasattr(os, 'sendfile'):
+        raise OSError(errno.ENOSYS, "sendfile недоступен")
+    copied = 0
+    while copied < count:
+        written = os.sendfile(out_fd, in_fd, offset + copied, count - copied)
+        if written == 0:
+            raise ValueError("Данные обрезаны: файл короче заголовка")
+        copied += written
+    return copied
+
+
+def read_range(in_f, offset: int, count: int):
+    """
+    Выдает диапазон файла кусками по COPY_CHUNK_SIZE, позиция in_f не меняется.
+    У файла с дескриптором чтение идет через os.pread, поэтому безопасно
+    параллельно с потоком упреждающего чтения того же файла.
+    """
+    in_fd = file_descriptor(in_f)
+    if in_fd is not None and hasattr(os, 'pread'):
+        while count:
+            chunk = os.pread(in_fd, min(COPY_CHUNK_SIZE, count), offset)
+            if not chunk:
+                raise ValueError("Данные обрезаны: файл короче заголовка")
+            yield chunk
+            offset += len(chunk)
+            count -= len(chunk)
+        return
+
+    position = in_f.tell()
+    try:
+        in_f.seek(offset)
+        while count:
+            chunk = in_f.read(min(COPY_CHUNK_SIZE, count))
+            if not chunk:
+                raise ValueError("Данные обрезаны: файл короче заголовка")
+            yield chunk
+            count -= len(chunk)
+    finally:
+        in_f.seek(position)
+
+
+def _copy_chunks(in_f, out_f, offset: int, count: int):
+    for chunk in read_range(in_f, offset, count):
+        out_f.write(chunk)
@@ -0,0 +1,91 @@
+"""
+Тесты для многофайлового архива
+"""
+import unittest
+import os
+import random
+import tempfile
+from src.core.archive import ArchiveCompressor
+from src.utils.console import set_quiet
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, "input")
+        self.files = {
+            "a.txt": b"this is a test text for archive " * 20,
+            "sub/b.txt": b"another small text file",
+            "sub/deep/c.bin": bytes(range(256)) * 4,
+            "sub/empty": b"",
+            "zeros.bin": b"\0\0\0abc\0",
+        }
+        for path, data in self.files.items():
+            full_path = os.path.join(self.input_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _pack_unpack(self, archive):
+        archive_path = os.path.join(self.temp_dir.name, "data.archive")
+        output_dir = os.path.join(self.temp_dir.name, "output")
+
+        archive.pack(self.input_dir, archive_path)
+        archive.unpack(archive_path, output_dir)
+
+        for path, data in self.files.items():
+            with open(os.path.join(output_dir, path), 'rb') as f:
+                self.assertEqual(data, f.read(), f"Данные повреждены: {path}")
+
+    def test_pack_unpack_cycle(self):
+        for algorithm in ['huffman', 'lz77', 'rle', 'combined']:
+            with self.subTest(algorithm=algorithm):
+                self._pack_unpack(ArchiveCompressor(algorithm, block_size=300, workers=1))
+
+    def test_parallel_workers(self):
+        self._pack_unpack(ArchiveCompressor('huffman', block_size=100, workers=2))
+
+    def test_small_files_share_block(self):
+        archive = ArchiveCompressor('huffman', block_size=1 << 16, workers=1)
+        entries = []
+        files = archive._collect_files(self.input_dir)
+        blocks = list(archive._read_blocks(self.input_dir, files, entries))
+
+        self.assertEqual(len(blocks), 1)
+        self.assertEqual(len(entries), len(self.files))
+
+    def test_dedup_stores_repeats_once(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        shared = random.Random(43).randbytes(20000)
+        self.files["lib/shared.so"] = shared
+        self.files["other/shared.so"] = shared
+        self.files["other/shared-copy.so"] = b"header" + shared
+        for path in ["lib/shared.so", "other/shared.so", "other/shared-copy.so"]:
+            full_path = os.path.join(self.input_dir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as f:
+                f.write(self.files[path])
+
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                archive = ArchiveCompressor('huffman', block_size=1024, workers=workers, dedup=True)
+                self._pack_unpack(archive)
+                self.assertGreater(archive.duplicate_count, 20)
+
+        plain_path = os.path.join(self.temp_dir.name, "plain.archive")
+        ArchiveCompressor('huffman', block_size=1024, workers=1).pack(self.input_dir, plain_path)
+        dedup_size = os.path.getsize(os.path.join(self.temp_dir.name, "data.archive"))
+        self.assertLess(dedup_size, os.path.getsize(plain_path) * 0.6)
+
+    def test_rejects_unsafe_path(self):
+        archive = ArchiveCompressor(workers=1)
+        with self.assertRaises(ValueError):
+            archive._output_path(self.temp_dir.name, "../escape.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Тесты для подбора уровня сжатия под скорость и срок
+"""
+import io
+import unittest
+from src.core.auto_level import LEVELS, LevelController, create_level_compressor
+from src.core.lz77 import LZ77Compressor
+from src.core.stream import StreamCompressor
+from src.utils.console import set_quiet
+
+
+class TestAutoLevel(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.data = b"".join(f"{i},user{i % 97},value{i * 31 % 1000}\n".encode() for i in range(3000))
+
+    def test_requires_exactly_one_goal(self):
+        with self.assertRaises(ValueError):
+            LevelController()
+        with self.assertRaises(ValueError):
+            LevelController(target_rate=1e6, deadline=5, total_size=10)
+        with self.assertRaises(ValueError):
+            LevelController(deadline=5)
+
+    def test_unreachable_goal_stores_blocks(self):
+        controller = LevelController(target_rate=1e12)
+        self.assertIsNone(controller.choose(1 << 16).algorithm)
+        controller = LevelController(deadline=1e-9, total_size=1 << 20)
+        self.assertIsNone(controller.choose(1 << 16).algorithm)
+
+    def test_loose_goal_picks_best_ratio(self):
+        controller = LevelController(deadline=1e6, total_size=1 << 16)
+        level = controller.choose(1 << 16)
+        self.assertEqual(level.ratio, min(candidate.ratio for candidate in LEVELS))
+
+    def test_measurements_override_expectations(self):
+        controller = LevelController(target_rate=1e3)
+        bwt = next(level for level in LEVELS if level.name == 'bwt')
+        # Уровень оказался медленным и слабым на этих данных - выбирается другой
+        controller.record(bwt, 1 << 16, 1 << 16, 1000.0)
+        self.assertEqual(controller.expected(bwt), ((1 << 16) / 1000.0, 1.0))
+        self.assertNotEqual(controller.choose(1 << 10), bwt)
+
+    def test_every_level_round_trips(self):
+        for level in LEVELS:
+            with self.subTest(level=level.name):
+                # Кадр потока распаковывается по своему магическому числу
+                compressed = create_level_compressor(level).compress_bytes(self.data)
+                self.assertEqual(StreamCompressor()._decompress_block(compressed), self.data)
+
+    def test_stream_with_controller(self):
+        compressed = io.BytesIO()
+        controller = LevelController(target_rate=1e5)
+        stream = StreamCompressor(block_size=8192, controller=controller)
+        stream.compress_stream(io.BytesIO(self.data), compressed)
+        self.assertEqual(controller.processed, len(self.data))
+        self.assertEqual(sum(measurement.blocks for measurement in controller.measurements.values()),
+                         stream.block_count)
+        self.assertIn(controller.dominant_level(), controller.measurements)
+
+        output = io.BytesIO()
+        StreamCompressor().decompress_stream(io.BytesIO(compressed.getvalue()), output)
+        self.assertEqual(output.getvalue(), self.data)
+
+    def test_lz77_max_chain(self):
+        for max_chain in (1, 4):
+            compressor = LZ77Compressor(max_chain=max_chain)
+            self.assertEqual(compressor.decompress_bytes(compressor.compress_bytes(self.data)), self.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Тесты для пакетного режима
+"""
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+from src.core.archive import ArchiveCompressor
+from src.core.batch import BatchService, parse_job_line
+from src.core.stream import StreamCompressor
+from src.models.batch_models import BatchJob
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.files = {}
+        for i in range(5):
+            path = os.path.join(self.temp_dir.name, f"file{i}.txt")
+            data = b"batch test data %d " % i * 30
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.files[path] = data
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_job_line(self):
+        job = parse_job_line('compress "my file.txt" out.huff')
+        self.assertEqual(job, BatchJob('compress', 'my file.txt', 'out.huff'))
+        self.assertIsNone(parse_job_line("# комментарий"))
+        with self.assertRaises(ValueError):
+            parse_job_line("delete file.txt")
+
+    def test_batch_cycle(self):
+        async def run():
+            async with BatchService('huffman', workers=2, concurrency=2) as service:
+                compressed = await service.run_batch(
+                    BatchJob('compress', path, path + '.huff') for path in self.files)
+                restored = await service.run_batch(
+                    BatchJob('decompress', path + '.huff', path + '.out') for path in self.files)
+                missing = await service.run_job(BatchJob('compress', 'missing.txt', os.devnull))
+                return compressed, restored, missing
+
+        compressed, restored, missing = asyncio.run(run())
+
+        self.assertTrue(all(result.ok for result in compressed + restored))
+        self.assertFalse(missing.ok)
+        for path, data in self.files.items():
+            with open(path + '.out', 'rb') as f:
+                self.assertEqual(data, f.read())
+
+    def test_container_formats(self):
+        path, data = next(iter(self.files.items()))
+        with open(path + '.str', 'wb') as out_f, open(path, 'rb') as in_f:
+            StreamCompressor('huffman', block_size=256).compress_stream(in_f, out_f)
+        archiver = ArchiveCompressor(workers=1)
+        archiver.pack(self.temp_dir.name, os.path.join(self.temp_dir.name, 'all.archive'))
+
+        async def run():
+            async with BatchService(workers=1) as service:
+                return await service.run_batch([
+                    BatchJob('decompress', path + '.str', path + '.out'),
+                    BatchJob('decompress', os.path.join(self.temp_dir.name, 'all.archive'), os.devnull),
+                ])
+
+        # Результаты приходят в порядке завершения
+        stream, archive = sorted(asyncio.run(run()), key=lambda result: result.job.input_path.endswith('.archive'))
+        self.assertTrue(stream.ok, stream.error)
+        with open(path + '.out', 'rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertFalse(archive.ok)
+        self.assertIn("unpack", archive.error)
+
+    def test_serve(self):
+        socket_path = os.path.join(self.temp_dir.name, "service.sock")
+        input_path = next(iter(self.files))
+
+        async def client():
+            while not os.path.exists(socket_path):
+                await asyncio.sleep(0.01)
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+            request = {'id': '1', 'action': 'compress', 'input': input_path, 'algorithm': 'rle'}
+            writer.write(json.dumps(request).encode('utf-8') + b"\n")
+            writer.write(b"not json\n")
+            responses = [json.loads(await reader.readline()) for _ in range(2)]
+            writer.close()
+            return responses
+
+        async def run():
+            async with BatchService(workers=1) as service:
+                server = asyncio.create_task(service.serve(socket_path))
+                try:
+                    return await asyncio.wait_for(client(), timeout=30)
+                finally:
+                    server.cancel()
+
+        responses = asyncio.run(run())
+        by_ok = {response['ok']: response for response in responses}
+        self.assertEqual(by_ok[True]['id'], '1')
+        self.assertTrue(os.path.exists(input_path + '.compressed'))
+        self.assertIn('error', by_ok[False])
+
+    def test_serve_keeps_regular_file(self):
+        path = os.path.join(self.temp_dir.name, "precious.txt")
+        with open(path, 'wb') as f:
+            f.write(b"data")
+
+        async def run():
+            async with BatchService(workers=1) as service:
+                await service.serve(path)
+
+        with self.assertRaisesRegex(ValueError, "не является сокетом"):
+            asyncio.run(run())
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b"data")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Тесты для пакетной записи кодов
+"""
+import io
+import unittest
+from src.core.huffman import HuffmanCompressor
+from src.utils.bit_io import BitWriter
+from src.utils.bit_packing import write_codes
+
+
+class TestBitPacking(unittest.TestCase):
+    def setUp(self):
+        self.data = b"bulk huffman encoder packs codes block by block " * 3000
+        self.huffman = HuffmanCompressor()
+        self.huffman.load_table(self.huffman.build_frequency_table(self.data))
+
+    def _bit_by_bit(self, prefix_bits):
+        output = io.BytesIO()
+        bit_writer = BitWriter(output)
+        bit_writer.write_int(0b101, prefix_bits)
+        for byte in self.data:
+            bit_writer.write_bits(self.huffman.codes[byte])
+        bit_writer.flush()
+        return output.getvalue()
+
+    def _bulk(self, prefix_bits):
+        output = io.BytesIO()
+        bit_writer = BitWriter(output)
+        bit_writer.write_int(0b101, prefix_bits)
+        total_bits = write_codes(bit_writer, self.data, self.huffman.codes)
+        bit_writer.flush()
+        self.assertEqual(total_bits, sum(len(self.huffman.codes[byte]) for byte in self.data))
+        return output.getvalue()
+
+    def test_matches_bit_writer(self):
+        # Блоки по BLOCK_SYMBOLS и незаконченный байт на стыке дают те же биты
+        for prefix_bits in (3, 8, 11):
+            with self.subTest(prefix_bits=prefix_bits):
+                self.assertEqual(self._bulk(prefix_bits), self._bit_by_bit(prefix_bits))
+
+if __name__ == '__main__':
+    unittest.main()
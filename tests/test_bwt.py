@@ -0,0 +1,54 @@
+"""
+Тесты для блочного сжатия BWT
+"""
+import os
+import random
+import unittest
+from src.core.bwt import (BWTCompressor, bwt_transform, bwt_inverse, mtf_encode, mtf_decode,
+                          zero_run_encode, zero_run_decode)
+from src.core.combined import CombinedCompressor
+from src.utils.suffix_array import suffix_array
+
+
+class TestSuffixArray(unittest.TestCase):
+    def test_matches_naive_sort(self):
+        random.seed(5)
+        for _ in range(200):
+            text = [random.randint(0, 3) for _ in range(random.randint(0, 40))]
+            expected = sorted(range(len(text)), key=lambda i: text[i:])
+            self.assertEqual(suffix_array(text, 3), expected, text)
+
+
+class TestBWT(unittest.TestCase):
+    def test_transform_round_trip(self):
+        for data in [b"", b"a", b"banana", b"\0\0\xff\xff\0", b"abracadabra" * 20]:
+            with self.subTest(data=data[:16]):
+                last_column, primary = bwt_transform(data)
+                self.assertEqual(bwt_inverse(last_column, primary), data)
+
+    def test_mtf_and_zero_runs_round_trip(self):
+        data = b"aaaabbbbbbbbaaaa" + bytes(600) + b"xyz"
+        mtf = mtf_encode(data)
+        self.assertEqual(mtf_decode(mtf), data)
+        self.assertEqual(zero_run_decode(zero_run_encode(mtf)), mtf)
+        self.assertLess(len(zero_run_encode(mtf)), len(mtf))
+
+    def test_compress_decompress_blocks(self):
+        data = os.urandom(500) + b"log line: request handled in 12 ms\n" * 300
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                compressor = BWTCompressor(block_size=4096, workers=workers)
+                self.assertEqual(compressor.decompress_bytes(compressor.compress_bytes(data)), data)
+
+    def test_better_ratio_on_redundant_text(self):
+        random.seed(11)
+        words = [b"GET", b"POST", b"/api/users", b"/api/orders", b"200", b"404", b"ms"]
+        data = b"\n".join(b" ".join(random.choice(words) for _ in range(6)) for _ in range(800))
+
+        bwt_size = len(BWTCompressor().compress_bytes(data))
+        combined_size = len(CombinedCompressor().compress_bytes(data))
+        self.assertLess(bwt_size, combined_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
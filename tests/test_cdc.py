@@ -0,0 +1,34 @@
+"""
+Тесты для разбиения по содержимому
+"""
+import random
+import unittest
+from src.utils.cdc import iter_chunks, chunk_limits
+
+
+class TestCDC(unittest.TestCase):
+    def setUp(self):
+        self.data = random.Random(7).randbytes(200000)
+
+    def test_chunks_cover_data(self):
+        chunks = list(iter_chunks(self.data, 4096))
+        min_size, max_size = chunk_limits(4096)
+
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertTrue(all(min_size <= len(chunk) <= max_size for chunk in chunks[:-1]))
+        self.assertGreater(len(chunks), 20)
+
+    def test_boundaries_resync_after_insert(self):
+        original = set(iter_chunks(self.data, 4096))
+        shifted = list(iter_chunks(b"inserted" + self.data, 4096))
+
+        # После вставки меняются только первые фрагменты, остальные совпадают
+        self.assertGreater(sum(chunk in original for chunk in shifted), len(shifted) - 3)
+
+    def test_small_data(self):
+        self.assertEqual(list(iter_chunks(b"", 4096)), [])
+        self.assertEqual(list(iter_chunks(b"abc", 4096)), [b"abc"])
+
+
+if __name__ == '__main__':
+    unittest.main()
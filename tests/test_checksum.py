@@ -0,0 +1,163 @@
+"""
+Тесты для контрольных сумм блоков и файлов
+"""
+import io
+import os
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from src.core.archive import ArchiveCompressor
+from src.core.combined import CombinedCompressor
+from src.core.segments import append_segment, decompress_segments_bytes, read_segments, verify_segments
+from src.core.stream import StreamCompressor, STREAM_MAGIC
+from src.utils.checksum import (add_checksum, append_file_checksum, crc32_combine, decompress_verified,
+                                read_file_checksum, split_checksum, verify_checksum, verify_file_checksum)
+from src.utils import zero_copy
+from src.utils.console import set_quiet
+
+
+def _flip_byte(data: bytes, position: int) -> bytes:
+    corrupted = bytearray(data)
+    corrupted[position] ^= 0x01
+    return bytes(corrupted)
+
+
+class TestChecksum(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.data = b"".join(f"record {i} value {i * 7}\n".encode() for i in range(5000))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_crc32_combine(self):
+        first, second = b"first part " * 100, os.urandom(3000)
+        self.assertEqual(crc32_combine(zlib.crc32(first), zlib.crc32(second), len(second)),
+                         zlib.crc32(first + second))
+        self.assertEqual(crc32_combine(zlib.crc32(first), 0, 0), zlib.crc32(first))
+
+    def test_single_file_trailer(self):
+        compressor = CombinedCompressor()
+        compressed = add_checksum(compressor.compress_bytes(self.data), self.data)
+        payload, crc, size = split_checksum(compressed)
+        self.assertEqual((crc, size), (zlib.crc32(self.data), len(self.data)))
+        self.assertEqual(decompress_verified(compressor, compressed), self.data)
+
+        # Файл без записи распаковывается как раньше
+        self.assertEqual(split_checksum(payload), (payload, None, None))
+        self.assertEqual(decompress_verified(compressor, payload), self.data)
+
+    def test_verify_checksum_detects_changes(self):
+        with self.assertRaisesRegex(ValueError, "контрольная сумма"):
+            verify_checksum(b"abcd", zlib.crc32(b"abce"), 4)
+        with self.assertRaisesRegex(ValueError, "ожидалось 5"):
+            verify_checksum(b"abcd", None, 5)
+
+    def test_file_checksum_keeps_zero_copy(self):
+        data = os.urandom(1 << 17)
+        with open(self._path('random.bin'), 'wb') as f:
+            f.write(data)
+        compressor = CombinedCompressor()
+        compressor.compress(self._path('random.bin'), self._path('random.cmp'))
+        append_file_checksum(self._path('random.bin'), self._path('random.cmp'))
+
+        crc, size = read_file_checksum(self._path('random.cmp'))
+        self.assertEqual((crc, size), (zlib.crc32(data), len(data)))
+        # Несжатый файл с записью контрольной суммы по-прежнему копируется без чтения в Python
+        with mock.patch('src.core.combined.copy_range', wraps=zero_copy.copy_range) as copy_range:
+            compressor.decompress(self._path('random.cmp'), self._path('random.out'))
+        self.assertEqual(copy_range.call_count, 1)
+        verify_file_checksum(self._path('random.out'), crc, size)
+
+        with open(self._path('random.out'), 'r+b') as f:
+            f.write(bytes([data[0] ^ 0x01]))
+        with self.assertRaisesRegex(ValueError, "контрольная сумма"):
+            verify_file_checksum(self._path('random.out'), crc, size)
+        self.assertEqual(read_file_checksum(self._path('random.bin')), (None, None))
+
+    def test_segment_checksum(self):
+        compressor = CombinedCompressor()
+        with open(self._path('log.cmp'), 'wb') as f:
+            f.write(add_checksum(compressor.compress_bytes(self.data), self.data))
+        segment = append_segment(self._path('log.cmp'), add_checksum(compressor.compress_bytes(b"tail\n"), b"tail\n"))
+
+        with open(self._path('log.cmp'), 'rb') as f:
+            data = f.read()
+        self.assertEqual(decompress_segments_bytes(data), self.data + b"tail\n")
+        # Портим запись CRC второго сегмента, данные сегмента целы
+        corrupted = _flip_byte(data, segment.offset + segment.size - 20)
+        with self.assertRaisesRegex(ValueError, "Сегмент 2"):
+            decompress_segments_bytes(corrupted)
+
+    def test_stream_detects_corrupt_block(self):
+        compressed = io.BytesIO()
+        StreamCompressor(block_size=4096).compress_stream(io.BytesIO(self.data), compressed)
+        data = compressed.getvalue()
+
+        # CRC первого кадра лежит сразу за длинами кадра
+        corrupted = _flip_byte(data, len(STREAM_MAGIC) + 8)
+        with self.assertRaisesRegex(ValueError, "блока 0"):
+            StreamCompressor().decompress_stream(io.BytesIO(corrupted), io.BytesIO())
+
+    def test_stream_verify_in_pool(self):
+        data = self.data * 3
+        for algorithm in ('combined', 'huffman'):
+            with self.subTest(algorithm=algorithm):
+                compressed = io.BytesIO()
+                StreamCompressor(algorithm, block_size=4096).compress_stream(io.BytesIO(data), compressed)
+                stream = StreamCompressor()
+                # Кадры, повторяющие таблицу Хаффмана, попадают в разные задачи пула
+                self.assertEqual(stream.verify(io.BytesIO(compressed.getvalue()), workers=2), len(data))
+                self.assertEqual(stream.block_count, (len(data) + 4095) // 4096)
+
+                corrupted = _flip_byte(compressed.getvalue(), len(STREAM_MAGIC) + 8)
+                with self.assertRaisesRegex(ValueError, "блок 0"):
+                    StreamCompressor().verify(io.BytesIO(corrupted), workers=2)
+
+    def test_segments_verify_in_pool(self):
+        compressor = CombinedCompressor()
+        with open(self._path('log.cmp'), 'wb') as f:
+            f.write(add_checksum(compressor.compress_bytes(self.data), self.data))
+        segment = append_segment(self._path('log.cmp'), add_checksum(compressor.compress_bytes(b"tail\n"), b"tail\n"))
+
+        with open(self._path('log.cmp'), 'rb') as f:
+            self.assertEqual(verify_segments(f, read_segments(f), workers=2), len(self.data) + 5)
+            f.seek(0)
+            corrupted = _flip_byte(f.read(), segment.offset + 10)
+        with self.assertRaisesRegex(ValueError, "Сегмент 2 поврежден"):
+            in_f = io.BytesIO(corrupted)
+            verify_segments(in_f, read_segments(in_f), workers=2)
+
+    def test_archive_verify_reports_bad_block(self):
+        input_dir = self._path('input')
+        os.makedirs(input_dir)
+        with open(os.path.join(input_dir, 'records.txt'), 'wb') as f:
+            f.write(self.data)
+        with open(os.path.join(input_dir, 'random.bin'), 'wb') as f:
+            f.write(os.urandom(20000))
+
+        archiver = ArchiveCompressor(block_size=8192, workers=1)
+        archiver.pack(input_dir, self._path('data.arc'))
+        self.assertEqual(archiver.verify(self._path('data.arc')), len(self.data) + 20000)
+
+        with open(self._path('data.arc'), 'rb') as f:
+            blocks, _, _, _ = archiver.read_index(f)
+            f.seek(0)
+            data = f.read()
+        # Середина третьего блока: меняет данные блока, но не его заголовок
+        block = blocks[2]
+        with open(self._path('bad.arc'), 'wb') as f:
+            f.write(_flip_byte(data, block.offset + block.compressed_size // 2))
+
+        with self.assertRaisesRegex(ValueError, "блок 2"):
+            archiver.verify(self._path('bad.arc'))
+        with self.assertRaises(ValueError):
+            archiver.unpack(self._path('bad.arc'), self._path('output'))
+
+
+if __name__ == '__main__':
+    unittest.main()
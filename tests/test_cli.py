@@ -0,0 +1,69 @@
+"""
+Тесты для полного цикла через командную строку
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from src.core.dictionary import DictionaryTrainer, save_dictionary
+from src.utils.console import set_quiet
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+        samples = [b'{"id": %d, "user": "user%d", "event": "login", "status": "ok"}' % (i, i * 7)
+                   for i in range(40)]
+        save_dictionary(DictionaryTrainer().train(samples), self._path('events.dict'))
+        self.data = b"\n".join(b'{"id": %d, "user": "user%d", "event": "logout", "status": "ok"}' % (i, i * 3)
+                               for i in range(3000))
+        with open(self._path('events.log'), 'wb') as f:
+            f.write(self.data)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def _run(self, *args, input_data=None) -> bytes:
+        result = subprocess.run([sys.executable, os.path.join(PROJECT_ROOT, 'run.py'), *args, '--quiet'],
+                                input=input_data, capture_output=True, cwd=PROJECT_ROOT)
+        self.assertEqual(result.returncode, 0, result.stderr.decode('utf-8', 'replace'))
+        return result.stdout
+
+    def _read(self, name: str) -> bytes:
+        with open(self._path(name), 'rb') as f:
+            return f.read()
+
+    def test_stream_with_dictionary(self):
+        dictionary = ('--dict', self._path('events.dict'))
+        self._run('compress', self._path('events.log'), self._path('events.str'),
+                  '-a', 'huffman', '--stream', '--block-size', '16384', *dictionary)
+
+        self._run('decompress', self._path('events.str'), self._path('events.out'), *dictionary)
+        self.assertEqual(self._read('events.out'), self.data)
+        self.assertEqual(self._run('decompress', '-', '-', *dictionary, input_data=self._read('events.str')),
+                         self.data)
+        self._run('test', self._path('events.str'), *dictionary)
+
+    def test_append_with_dictionary(self):
+        dictionary = ('--dict', self._path('events.dict'))
+        with open(self._path('tail.log'), 'wb') as f:
+            f.write(self.data[:2000])
+        self._run('compress', self._path('events.log'), self._path('events.cmp'), *dictionary)
+        self._run('compress', self._path('tail.log'), self._path('events.cmp'), '--append', *dictionary)
+
+        self._run('decompress', self._path('events.cmp'), self._path('events.out'), *dictionary)
+        self.assertEqual(self._read('events.out'), self.data + self.data[:2000])
+        self.assertEqual(self._run('decompress', '-', '-', *dictionary, input_data=self._read('events.cmp')),
+                         self.data + self.data[:2000])
+        self._run('test', self._path('events.cmp'), *dictionary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Тесты для обученных словарей
+"""
+import unittest
+from src.core.huffman import HuffmanCompressor
+from src.core.combined import CombinedCompressor
+from src.core.dictionary import DictionaryTrainer, dictionary_to_bytes, dictionary_from_bytes
+
+
+class TestDictionary(unittest.TestCase):
+    def setUp(self):
+        self.samples = [
+            b'{"id": %d, "user": "user%d", "event": "login", "status": "ok"}' % (i, i * 7)
+            for i in range(40)
+        ]
+        self.message = b'{"id": 1000, "user": "user3", "event": "logout", "status": "ok"}'
+        self.dictionary = DictionaryTrainer().train(self.samples)
+
+    def test_serialization_cycle(self):
+        restored = dictionary_from_bytes(dictionary_to_bytes(self.dictionary))
+        self.assertEqual(self.dictionary, restored)
+
+    def test_corrupted_dictionary(self):
+        data = bytearray(dictionary_to_bytes(self.dictionary))
+        data[-1] ^= 0xFF
+        with self.assertRaises(ValueError):
+            dictionary_from_bytes(bytes(data))
+
+    def test_canonical_codes_are_prefix_free(self):
+        huffman = HuffmanCompressor()
+        huffman.build_canonical_codes(self.dictionary.literal_code_lengths)
+        codes = sorted(huffman.codes.values())
+        for shorter, longer in zip(codes, codes[1:]):
+            self.assertFalse(longer.startswith(shorter))
+
+    def test_compress_decompress_cycle(self):
+        for compressor_class in [HuffmanCompressor, CombinedCompressor]:
+            with self.subTest(compressor=compressor_class.__name__):
+                compressor = compressor_class(self.dictionary)
+                for data in [self.message, b"\0\1\2 binary", b"x"]:
+                    compressed = compressor.compress_bytes(data)
+                    self.assertEqual(data, compressor.decompress_bytes(compressed))
+
+    def test_small_message_shrinks(self):
+        compressed = CombinedCompressor(self.dictionary).compress_bytes(self.message)
+        self.assertLess(len(compressed), len(self.message) * 0.6)
+
+    def test_missing_dictionary(self):
+        compressed = CombinedCompressor(self.dictionary).compress_bytes(self.message)
+        with self.assertRaises(ValueError):
+            CombinedCompressor().decompress_bytes(compressed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Тесты для оценки сжатия по выборке
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.core.estimator import (estimate, estimate_file, choose_algorithm, resolve_algorithm, sample_bytes,
+                                sample_file, SAMPLE_BLOCKS, SAMPLE_BLOCK_SIZE)
+from src.models.estimator_models import AlgorithmEstimate
+
+
+class TestEstimator(unittest.TestCase):
+    def test_sample_is_bounded(self):
+        data = bytes(range(256)) * 4096
+        sample = sample_bytes(data)
+        self.assertEqual(len(sample), SAMPLE_BLOCKS * SAMPLE_BLOCK_SIZE)
+        self.assertTrue(sample.startswith(data[:SAMPLE_BLOCK_SIZE]))
+        self.assertEqual(sample_bytes(b"short"), b"short")
+
+    def test_sample_file_matches_sample_bytes(self):
+        data = os.urandom(100_000)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            self.assertEqual(sample_file(f.name), sample_bytes(data))
+            estimates = estimate_file(f.name, ['huffman', 'rle'])
+            self.assertEqual([item.input_size for item in estimates], [len(data)] * 2)
+        finally:
+            os.unlink(f.name)
+
+    def test_extrapolation(self):
+        sample = b"extrapolated sample " * 100
+        huffman, = estimate(sample, len(sample) * 10, ['huffman'])
+        self.assertEqual(huffman.predicted_size, huffman.sample_compressed_size * 10)
+        self.assertGreater(huffman.ratio, 0)
+
+    def test_work_budget_and_candidates(self):
+        sample = b"budget sample 12345 " * 500
+        names = [item.algorithm for item in estimate(sample, len(sample))]
+        self.assertNotIn('filter', names)
+        self.assertNotIn('long', names)
+        # Бюджет исчерпан сразу: оценивается только самый быстрый алгоритм
+        with mock.patch('src.core.estimator.ESTIMATE_WORK_BUDGET', 0):
+            self.assertEqual([item.algorithm for item in estimate(sample, len(sample))], names[:1])
+        # Большая выборка отсекает медленные алгоритмы одинаково при каждом запуске
+        with mock.patch('src.core.estimator.ESTIMATE_WORK_BUDGET', len(sample) * 0.5):
+            limited = [item.algorithm for item in estimate(sample, len(sample))]
+            self.assertEqual([item.algorithm for item in estimate(sample, len(sample))], limited)
+        self.assertLess(len(limited), len(names))
+
+    def test_choose_prefers_faster_when_sizes_close(self):
+        estimates = [
+            AlgorithmEstimate('bwt', 1000, 500, 1000, 0.1, 0.1),
+            # Замер времени не влияет: huffman быстрее по реестру
+            AlgorithmEstimate('huffman', 1000, 505, 1000, 2.0, 0.1),
+            AlgorithmEstimate('rle', 1000, 900, 1000, 0.01, 0.01),
+            AlgorithmEstimate('fse', 1000, 1000, 1000, 0.0, 0.0, error="сбой"),
+        ]
+        self.assertEqual(choose_algorithm(estimates), 'huffman')
+
+    def test_resolve_algorithm(self):
+        self.assertEqual(resolve_algorithm('rle', b"data"), 'rle')
+        self.assertIn(resolve_algorithm('auto', b"a" * 20000), ('rle', 'fse', 'bwt', 'huffman', 'huffman4'))
+        data = b"".join(b"%d,user%d;" % (i, i % 13) for i in range(5000))
+        self.assertEqual(len({resolve_algorithm('auto', data) for _ in range(3)}), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
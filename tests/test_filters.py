@@ -0,0 +1,64 @@
+"""
+Тесты для фильтров числовых данных
+"""
+import os
+import struct
+import unittest
+from src.core.filters import (FilterCompressor, FILTER_IDS, SCAN_BLOCK, WIDTHS, apply_filters, remove_filters,
+                              choose_filters, parse_filters)
+from src.core.registry import create_compressor
+
+
+class TestFilters(unittest.TestCase):
+    def setUp(self):
+        self.ints = struct.pack('<5000i', *range(100000, 100000 + 5000 * 7, 7))
+
+    def test_each_filter_round_trip(self):
+        # Длины, не кратные ширине и группе из 8 элементов, оставляют хвост
+        for size in (0, 1, 13, 64, 1001):
+            data = os.urandom(size)
+            for name in FILTER_IDS:
+                for width in WIDTHS:
+                    with self.subTest(name=name, width=width, size=size):
+                        filtered = apply_filters(data, [(name, width)])
+                        self.assertEqual(len(filtered), len(data))
+                        self.assertEqual(remove_filters(filtered, [(name, width)]), data)
+
+    def test_delta_xor_match_elementwise(self):
+        # Несколько блоков свертки и неполный последний: переносы не выходят за элемент
+        data = os.urandom(2 * SCAN_BLOCK + 24)
+        for width in WIDTHS:
+            elements = [int.from_bytes(data[i:i + width], 'little') for i in range(0, len(data), width)]
+            mask = (1 << (8 * width)) - 1
+            for name, combine in (('delta', lambda a, b: (a - b) & mask), ('xor', lambda a, b: a ^ b)):
+                with self.subTest(name=name, width=width):
+                    expected = [elements[0]] + [combine(b, a) for a, b in zip(elements, elements[1:])]
+                    filtered = apply_filters(data, [(name, width)])
+                    self.assertEqual(filtered, b"".join(e.to_bytes(width, 'little') for e in expected))
+                    self.assertEqual(remove_filters(filtered, [(name, width)]), data)
+
+    def test_delta_shuffle_makes_runs(self):
+        filtered = apply_filters(self.ints, parse_filters("delta:4,shuffle:4"))
+        # Разности постоянны: после раскладки почти весь поток - серии одного байта
+        self.assertGreater(filtered.count(0), len(filtered) * 0.7)
+
+    def test_parse_errors(self):
+        with self.assertRaises(ValueError):
+            parse_filters("zip:4")
+        with self.assertRaises(ValueError):
+            parse_filters("delta:3")
+
+    def test_auto_detection(self):
+        self.assertIn(('delta', 4), choose_filters(self.ints))
+        self.assertEqual(choose_filters(b"plain english text, nothing numeric here. " * 50), [])
+
+    def test_filtered_compression(self):
+        compressor = FilterCompressor(algorithm='huffman', filters='auto')
+        compressed = compressor.compress_bytes(self.ints)
+
+        self.assertLess(len(compressed), len(create_compressor('huffman').compress_bytes(self.ints)) / 2)
+        self.assertEqual(create_compressor('filter').decompress_bytes(compressed), self.ints)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Тесты для энтропийного кодера tANS/FSE
+"""
+import io
+import os
+import random
+import unittest
+from src.core.combined import CombinedCompressor
+from src.core.fse import FSECompressor, encode_block, decode_block, normalize_counts
+from src.core.huffman import HuffmanCompressor
+
+
+class TestFSE(unittest.TestCase):
+    def test_round_trip(self):
+        random.seed(7)
+        cases = {
+            'empty': b"",
+            'single_byte': b"a",
+            'single_symbol': b"z" * 1000,
+            'all_bytes': bytes(range(256)) * 3,
+            'random': os.urandom(3000),
+            'skewed': bytes(random.choices(range(8), weights=[60, 20, 8, 5, 3, 2, 1, 1], k=10000)),
+        }
+        compressor = FSECompressor()
+        for name, data in cases.items():
+            with self.subTest(case=name):
+                self.assertEqual(compressor.decompress_bytes(compressor.compress_bytes(data)), data)
+
+    def test_normalized_counts_fill_table(self):
+        normalized = normalize_counts({0: 1000, 1: 1, 2: 1, 3: 3}, 5)
+        self.assertEqual(sum(normalized.values()), 32)
+        self.assertTrue(all(count >= 1 for count in normalized.values()))
+
+    def test_single_symbol_costs_no_bits(self):
+        encoded = encode_block(b"x" * 5000)
+        self.assertLess(len(encoded), 16)
+        self.assertEqual(decode_block(io.BytesIO(encoded)), b"x" * 5000)
+
+    def test_better_than_huffman_on_skewed_data(self):
+        random.seed(3)
+        data = bytes(random.choices(range(4), weights=[90, 6, 3, 1], k=20000))
+        fse_size = len(FSECompressor().compress_bytes(data))
+        huffman_size = len(HuffmanCompressor().compress_bytes(data))
+        self.assertLess(fse_size, huffman_size)
+
+    def test_combined_with_fse(self):
+        data = b"LZ77 tokens are skewed, FSE codes them tighter. " * 200
+        fse_data = CombinedCompressor(entropy='fse').compress_bytes(data)
+        huffman_data = CombinedCompressor().compress_bytes(data)
+
+        self.assertEqual(fse_data[:6], b"COMBI\2")
+        self.assertLess(len(fse_data), len(huffman_data))
+        # Версия формата в заголовке, распаковщик общий
+        self.assertEqual(CombinedCompressor().decompress_bytes(fse_data), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 """
 import unittest
 import os
+from unittest import mock
 from src.core.huffman import HuffmanCompressor
 
 
@@ -25,6 +26,22 @@ class TestHuffman(unittest.TestCase):
         # Тестируем, что сжатие -> распаковка дает исходные данные
         pass
 
+    def test_four_streams_round_trip(self):
+        for data in [b"a", b"abc", self.test_data, self.test_data * 50]:
+            with self.subTest(size=len(data)):
+                compressed = HuffmanCompressor(streams=4).compress_bytes(data)
+                self.assertEqual(compressed[7:8], b"\2")
+                self.assertEqual(HuffmanCompressor().decompress_bytes(compressed), data)
+
+    def test_four_streams_parallel_decode(self):
+        data = self.test_data * 200
+        compressed = HuffmanCompressor(streams=4).compress_bytes(data)
+
+        decompressor = HuffmanCompressor()
+        decompressor.parallel_min_size = 0
+        with mock.patch('src.core.huffman.os.cpu_count', return_value=4):
+            self.assertEqual(decompressor.decompress_bytes(compressed), data)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Тесты для упреждающего чтения и отложенной записи
+"""
+import io
+import threading
+import unittest
+from src.core.stream import StreamCompressor
+from src.utils.console import set_quiet
+from src.utils.io_pipeline import WriteBehind, prefetch, read_blocks
+
+
+class TestIOPipeline(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+
+    def test_prefetch_keeps_order(self):
+        self.assertEqual(list(prefetch(range(100))), list(range(100)))
+        self.assertEqual(list(prefetch(read_blocks(io.BytesIO(b"abcdefg"), 3))), [b"abc", b"def", b"g"])
+
+    def test_prefetch_runs_in_background_thread(self):
+        threads = set()
+
+        def items():
+            for i in range(5):
+                threads.add(threading.current_thread())
+                yield i
+
+        list(prefetch(items()))
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_prefetch_raises_producer_error(self):
+        def items():
+            yield 1
+            raise ValueError("ошибка чтения")
+
+        result = []
+        with self.assertRaisesRegex(ValueError, "ошибка чтения"):
+            for item in prefetch(items()):
+                result.append(item)
+        self.assertEqual(result, [1])
+
+    def test_prefetch_stops_early(self):
+        produced = []
+
+        def items():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        for item in prefetch(items(), depth=2):
+            if item == 3:
+                break
+        # Поток чтения не уходит дальше очереди и останавливается
+        self.assertLess(len(produced), 10)
+
+    def test_write_behind_order_and_position(self):
+        out = io.BytesIO()
+        with WriteBehind(out, position=10) as writer:
+            for i in range(50):
+                writer.write(bytes([i]) * 3)
+            self.assertEqual(writer.tell(), 160)
+        self.assertEqual(out.getvalue(), b"".join(bytes([i]) * 3 for i in range(50)))
+
+    def test_write_behind_raises_write_error(self):
+        def fail(data):
+            raise OSError("диск заполнен")
+
+        writer = WriteBehind()
+        writer.submit(fail, b"data")
+        with self.assertRaisesRegex(OSError, "диск заполнен"):
+            for _ in range(10):
+                writer.submit(fail, b"data")
+            writer.close()
+
+    def test_stream_cycle_through_pipeline(self):
+        data = b"".join(f"line {i}\n".encode() for i in range(20000))
+        compressed = io.BytesIO()
+        StreamCompressor('huffman', block_size=4096).compress_stream(io.BytesIO(data), compressed)
+        output = io.BytesIO()
+        StreamCompressor().decompress_stream(io.BytesIO(compressed.getvalue()), output)
+        self.assertEqual(output.getvalue(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Тесты для статистики заданий и тихого режима
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from src.core.huffman import HuffmanCompressor
+from src.utils.console import set_quiet
+from src.utils.job_stats import build_job_record, format_json_record, write_prometheus_textfile
+
+
+class TestJobStats(unittest.TestCase):
+    def test_json_record_fields(self):
+        record = build_job_record('compress', 'a.txt', 'a.huff', 'huffman', 1000, 250, 0.5, 0.4)
+        parsed = json.loads(format_json_record(record))
+
+        self.assertEqual(parsed['ratio'], 75.0)
+        self.assertEqual(parsed['throughput_bytes_per_sec'], 2000.0)
+        self.assertEqual(parsed['blocks'], 1)
+        self.assertNotIn('level', parsed)
+        self.assertEqual(set(parsed['table_caches']['huffman.tables']), {'hits', 'misses'})
+
+        record = build_job_record('compress', 'a.txt', '-', 'adaptive', 1000, 250, 0.5, 0.4, level='combined:16')
+        self.assertEqual(json.loads(format_json_record(record))['level'], 'combined:16')
+
+    def test_prometheus_textfile_sums_by_labels(self):
+        records = [
+            build_job_record('compress', 'a', 'a.c', 'huffman', 100, 50, 0.1, 0.1),
+            build_job_record('compress', 'b', 'b.c', 'huffman', 300, 150, 0.1, 0.1),
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'archiver.prom')
+            write_prometheus_textfile(path, records)
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+
+            self.assertEqual(os.listdir(temp_dir), ['archiver.prom'])
+
+        self.assertIn('archiver_jobs_total{action="compress",algorithm="huffman"} 2', text)
+        self.assertIn('archiver_original_bytes_total{action="compress",algorithm="huffman"} 400', text)
+        self.assertIn('# TYPE archiver_throughput_bytes_per_second gauge', text)
+
+    def test_quiet_mode_silences_engines(self):
+        output = io.StringIO()
+        set_quiet(True)
+        try:
+            with contextlib.redirect_stdout(output):
+                compressed = HuffmanCompressor().compress_bytes(b"quiet data " * 50)
+                HuffmanCompressor().decompress_bytes(compressed)
+        finally:
+            set_quiet(False)
+
+        self.assertEqual(output.getvalue(), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Тесты для поиска дальних совпадений
+"""
+import random
+import time
+import unittest
+from unittest import mock
+from src.core.long_range import LongRangeCompressor, find_long_matches, LONG_MIN_MATCH
+from src.core.registry import detect_codec, create_compressor
+from src.utils.console import set_quiet
+
+
+class TestLongRange(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        rng = random.Random(44)
+        self.table = rng.randbytes(5000)
+        # Повтор далеко за пределами окна LZ77 (65535 байтов)
+        self.data = self.table + rng.randbytes(100000) + self.table + b"tail"
+
+    def test_far_repeat_becomes_copy(self):
+        commands, literals = find_long_matches(self.data)
+        self.assertEqual(commands, [(105000, 105000, 5000), (4, 0, 0)])
+        self.assertEqual(len(literals), len(self.data) - len(self.table))
+
+    def test_round_trip(self):
+        for algorithm in ['huffman', 'combined']:
+            with self.subTest(algorithm=algorithm):
+                compressed = LongRangeCompressor(algorithm).compress_bytes(self.data)
+                self.assertEqual(detect_codec(compressed[:8]), 'long')
+                plain = create_compressor(algorithm).compress_bytes(self.data)
+                self.assertLess(len(compressed), len(plain) - 4500)
+                self.assertEqual(LongRangeCompressor().decompress_bytes(compressed), self.data)
+
+    def test_many_far_copies_decode_in_linear_time(self):
+        rng = random.Random(45)
+        base = rng.randbytes(1 << 16)
+        commands = [(len(base), 0, 0)]
+        data = bytearray(base)
+        for _ in range(100000):
+            offset = rng.randrange(len(base) - 64)
+            commands.append((0, len(data) - offset, 64))
+            data += base[offset:offset + 64]
+
+        # Команды строятся напрямую: поиск совпадений на 6 МБ сам по себе долгий
+        with mock.patch('src.core.long_range.find_long_matches', return_value=(commands, base)):
+            compressed = LongRangeCompressor('rle').compress_bytes(bytes(data))
+        start = time.perf_counter()
+        self.assertEqual(LongRangeCompressor().decompress_bytes(compressed), data)
+        # Копия хвоста вывода на каждую команду заняла бы здесь десятки секунд
+        self.assertLess(time.perf_counter() - start, 5.0)
+
+    def test_overlapping_copy(self):
+        data = b"x" + b"abc" * 1000 + b"y"
+        commands, literals = find_long_matches(data)
+        self.assertEqual(len(commands), 2)
+        self.assertLess(len(literals), LONG_MIN_MATCH)
+        compressed = LongRangeCompressor('huffman').compress_bytes(data)
+        self.assertEqual(LongRangeCompressor().decompress_bytes(compressed), data)
+
+    def test_short_and_empty(self):
+        for data in [b"", b"short", bytes(range(256))]:
+            with self.subTest(size=len(data)):
+                compressed = LongRangeCompressor('huffman').compress_bytes(data)
+                self.assertEqual(LongRangeCompressor().decompress_bytes(compressed), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -43,6 +43,11 @@ class TestLZ77(unittest.TestCase):
                 if os.path.exists(path):
                     os.remove(path)
 
+    def test_bytes_cycle_with_zero_bytes(self):
+        test_data = b"\0\0abc\0abc\0\0\0\0" + b"\0" * 40 + b"end\0"
+        compressed = self.compressor.compress_bytes(test_data)
+        self.assertEqual(test_data, self.compressor.decompress_bytes(compressed))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Тесты для бюджета памяти
+"""
+import unittest
+from src.utils.memory_budget import (MIN_BLOCK_SIZE, PROCESS_OVERHEAD, MemorySampler, current_rss_bytes,
+                                     memory_factor, parse_size, plan_memory)
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size('1048576'), 1 << 20)
+        self.assertEqual(parse_size('512K'), 512 << 10)
+        self.assertEqual(parse_size('2G'), 2 << 30)
+        self.assertEqual(parse_size('1.5MiB'), 3 << 19)
+        for text in ('много', '0', '-5M'):
+            with self.assertRaises(ValueError):
+                parse_size(text)
+
+    def test_whole_file_fits(self):
+        plan = plan_memory(1 << 30, 'huffman', 1 << 16, 4, input_size=10 << 20)
+        self.assertTrue(plan.whole_file)
+        self.assertLessEqual(plan.estimated_peak, 1 << 30)
+        self.assertEqual(plan.degradations, [])
+
+    def test_large_file_falls_back_to_stream(self):
+        plan = plan_memory(256 << 20, 'combined', 1 << 16, 8, input_size=2 << 30)
+        self.assertFalse(plan.whole_file)
+        self.assertEqual(plan.workers, 1)
+        self.assertLessEqual(plan.estimated_peak, 256 << 20)
+        self.assertTrue(any('потоком' in degradation for degradation in plan.degradations))
+
+    def test_workers_then_block_size_reduced(self):
+        factor = memory_factor('bwt')
+        budget = PROCESS_OVERHEAD * 3 + (1 << 20) * factor
+        plan = plan_memory(budget, 'bwt', 1 << 20, 16)
+        self.assertLess(plan.workers, 16)
+        self.assertLessEqual(plan.estimated_peak, budget)
+
+        plan = plan_memory(PROCESS_OVERHEAD + (1 << 20), 'bwt', 1 << 20, 16)
+        self.assertEqual(plan.workers, 1)
+        self.assertLess(plan.block_size, 1 << 20)
+        self.assertGreaterEqual(plan.block_size, MIN_BLOCK_SIZE)
+        self.assertLessEqual(plan.estimated_peak, PROCESS_OVERHEAD + (1 << 20))
+
+    def test_budget_too_small(self):
+        with self.assertRaises(ValueError):
+            plan_memory(PROCESS_OVERHEAD // 2, 'combined', 1 << 16, 1)
+        with self.assertRaises(ValueError):
+            plan_memory(PROCESS_OVERHEAD + (1 << 20), 'combined', 1 << 24, 1, min_block_size=1 << 24)
+
+    def test_filters_and_long_need_more_memory(self):
+        self.assertGreater(memory_factor('combined', filters='delta:4'), memory_factor('combined'))
+        self.assertGreater(memory_factor('combined', long=True), memory_factor('combined'))
+        self.assertEqual(memory_factor('auto'), memory_factor('combined'))
+
+    def test_sampler_tracks_peak(self):
+        if current_rss_bytes() is None:
+            self.skipTest("Нет /proc для опроса RSS")
+        with MemorySampler(interval=0.005, max_memory=1, trace_python=True) as sampler:
+            data = bytearray(32 << 20)
+            del data
+        self.assertGreaterEqual(sampler.peak, 32 << 20)
+        self.assertGreaterEqual(sampler.python_peak, 32 << 20)
+        self.assertTrue(sampler.over_budget)
+        self.assertFalse(sampler.running)
+
+
+if __name__ == '__main__':
+    unittest.main()
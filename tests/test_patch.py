@@ -0,0 +1,59 @@
+"""
+Тесты для сжатия относительно опорного файла
+"""
+import random
+import unittest
+from src.core.patch import PatchCompressor, PATCH_MAGIC, PATCH_CHUNK_SIZE
+from src.utils.format_detector import detect_format_from_header
+from src.utils.console import set_quiet
+
+
+class TestPatch(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        rng = random.Random(42)
+        self.reference = rng.randbytes(200000)
+        data = bytearray(self.reference)
+        data[1000:1010] = b"changed!!!"
+        data[50000:50000] = b"inserted block " * 20
+        del data[120000:121000]
+        self.data = bytes(data)
+
+    def test_round_trip(self):
+        compressed = PatchCompressor(self.reference, 'huffman').compress_bytes(self.data)
+        self.assertEqual(detect_format_from_header(compressed[:8]), 'patch')
+        self.assertTrue(compressed.startswith(PATCH_MAGIC))
+        # Случайные данные несжимаемы, так что размер патча - это размер изменений
+        self.assertLess(len(compressed), 2000)
+        self.assertEqual(PatchCompressor(self.reference).decompress_bytes(compressed), self.data)
+
+    def test_far_matches(self):
+        # Совпадения далеко за пределами окна LZ77: блоки переставлены местами
+        data = self.reference[100000:] + self.reference[:100000]
+        commands, literals = PatchCompressor(self.reference).encode_commands(data)
+        self.assertEqual(commands, [(0, 100000, 100000), (0, 0, 100000)])
+        self.assertEqual(literals, b"")
+
+    def test_literals_only(self):
+        for data in [b"", b"short", b"no reference at all " * 100]:
+            with self.subTest(size=len(data)):
+                compressed = PatchCompressor(b"", 'combined').compress_bytes(data)
+                self.assertEqual(PatchCompressor().decompress_bytes(compressed), data)
+
+    def test_match_extends_backwards(self):
+        data = b"x" + self.reference[5:5 + PATCH_CHUNK_SIZE * 3]
+        commands, literals = PatchCompressor(self.reference).encode_commands(data)
+        self.assertEqual(commands, [(1, 5, PATCH_CHUNK_SIZE * 3)])
+        self.assertEqual(literals, b"x")
+
+    def test_wrong_reference(self):
+        compressed = PatchCompressor(self.reference).compress_bytes(self.data)
+        with self.assertRaises(ValueError):
+            PatchCompressor(self.reference[:-1] + b"\0").decompress_bytes(compressed)
+        with self.assertRaises(ValueError):
+            PatchCompressor().decompress_bytes(compressed)
+
+
+if __name__ == '__main__':
+    unittest.main()
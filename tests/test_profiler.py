@@ -0,0 +1,53 @@
+"""
+Тесты для профилировщика этапов
+"""
+import unittest
+from src.core.combined import CombinedCompressor
+from src.utils.profiler import Profiler, PROFILER
+
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self):
+        profiler = Profiler()
+        with profiler.stage('outer'):
+            profiler.count('bytes', 10)
+            profiler.observe('lengths', [1, 2])
+
+        self.assertEqual(profiler.timers, {})
+        self.assertEqual(profiler.counters, {})
+        self.assertEqual(profiler.histograms, {})
+
+    def test_nested_stages_and_self_times(self):
+        profiler = Profiler()
+        profiler.enable()
+
+        @profiler.timed('inner')
+        def work():
+            return 42
+
+        with profiler.stage('outer'):
+            self.assertEqual(work(), 42)
+            self.assertEqual(work(), 42)
+
+        self.assertEqual(profiler.timers['outer;inner'][1], 2)
+        self_times = profiler.self_times()
+        total = profiler.timers['outer'][0]
+        self.assertAlmostEqual(self_times['outer'] + self_times['outer;inner'], total)
+
+    def test_engine_counters(self):
+        PROFILER.reset()
+        PROFILER.enable()
+        try:
+            CombinedCompressor().compress_bytes(b"aaaa profile me please " * 100)
+        finally:
+            PROFILER.enabled = False
+
+        self.assertIn('lz77.match', PROFILER.timers)
+        self.assertGreater(PROFILER.counters['lz77.tokens'], 0)
+        self.assertGreater(PROFILER.counters['huffman.bits_written'], 0)
+        self.assertIn('lz77.match_length', PROFILER.histograms)
+        PROFILER.reset()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Тесты для реестра алгоритмов и времени запуска CLI
+"""
+import unittest
+import os
+import subprocess
+import sys
+import tempfile
+from src.core.registry import CODECS, codec_names, create_compressor, detect_codec, codec_for_extension, base_codec
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет на импорт src.main при распаковке одного файла, микросекунды
+IMPORT_BUDGET_US = 150_000
+
+# Модули, которые не нужны для распаковки файла Хаффмана
+UNUSED_MODULES = [
+    'src.core.lz77', 'src.core.combined', 'src.core.rle', 'src.core.archive',
+    'src.core.batch', 'src.core.dictionary', 'src.core.fse', 'src.core.bwt', 'asyncio', 'concurrent.futures',
+]
+
+
+class TestRegistry(unittest.TestCase):
+    def test_detect_each_codec(self):
+        for name in CODECS:
+            with self.subTest(codec=name):
+                data = b"aaaa registry test " * 100
+                compressed = create_compressor(name).compress_bytes(data)
+                self.assertEqual(detect_codec(compressed[:8]), base_codec(name))
+                self.assertEqual(codec_for_extension("file" + CODECS[name].extension), base_codec(name))
+                self.assertEqual(create_compressor(detect_codec(compressed[:8])).decompress_bytes(compressed), data)
+
+    def test_unknown_codec(self):
+        self.assertIsNone(detect_codec(b"UNKNOWN!"))
+        with self.assertRaises(ValueError):
+            create_compressor('zip')
+
+    def test_containers_are_not_choices(self):
+        self.assertNotIn('filter', codec_names())
+        self.assertNotIn('long', codec_names())
+        self.assertEqual(codec_names(containers=True), list(CODECS))
+        # Формат обертки по-прежнему распознается для распаковки
+        self.assertEqual(detect_codec(b"LDM\0"), 'long')
+
+    def test_dictionary_support(self):
+        with self.assertRaises(ValueError):
+            create_compressor('rle', dictionary=object())
+
+
+class TestStartupImports(unittest.TestCase):
+    def test_decompress_imports_only_used_codec(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            compressed_path = os.path.join(temp_dir, "data.huff")
+            with open(compressed_path, 'wb') as f:
+                f.write(create_compressor('huffman').compress_bytes(b"startup test data"))
+
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', os.path.join(PROJECT_ROOT, 'run.py'),
+                 'decompress', compressed_path, os.path.join(temp_dir, "data.out")],
+                capture_output=True, text=True, cwd=PROJECT_ROOT)
+            self.assertEqual(result.returncode, 0, result.stdout)
+
+        imported = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imported[name.strip()] = int(cumulative)
+
+        self.assertIn('src.core.huffman', imported)
+        for module in UNUSED_MODULES:
+            self.assertNotIn(module, imported)
+        self.assertLess(imported['src.main'], IMPORT_BUDGET_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
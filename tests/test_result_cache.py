@@ -0,0 +1,87 @@
+"""
+Тесты для кэша результатов сжатия
+"""
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from src.core.batch import BatchService
+from src.models.batch_models import BatchJob
+from src.utils.result_cache import ResultCache, compression_params, hash_bytes
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+    def test_hit_and_miss(self):
+        cache = ResultCache(self.cache_dir)
+        key = cache.key(hash_bytes(b"input data"), compression_params('huffman'))
+
+        self.assertIsNone(cache.get(key, 10))
+        cache.put(key, b"compressed")
+        self.assertEqual(cache.get(key, 10), b"compressed")
+
+        self.assertEqual((cache.hits, cache.misses, cache.bytes_saved), (1, 1, 10))
+        self.assertEqual(cache.hit_rate, 50.0)
+        self.assertEqual(cache.save_stats(), {'hits': 1, 'misses': 1, 'bytes_saved': 10})
+        self.assertEqual(ResultCache(self.cache_dir).save_stats()['hits'], 1)
+
+    def test_key_depends_on_params(self):
+        content_hash = hash_bytes(b"same data")
+        self.assertNotEqual(ResultCache.key(content_hash, compression_params('huffman')),
+                            ResultCache.key(content_hash, compression_params('rle')))
+        self.assertNotEqual(ResultCache.key(content_hash, compression_params('huffman')),
+                            ResultCache.key(content_hash, compression_params('huffman', long=True)))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.cache_dir, max_size=250)
+        keys = [cache.key(hash_bytes(bytes([i])), 'p') for i in range(3)]
+        cache.put(keys[0], b"a" * 100)
+        cache.put(keys[1], b"b" * 100)
+
+        # Первая запись использовалась позже второй - вытесняется вторая
+        past = time.time() - 60
+        os.utime(cache._entry_path(keys[1]), (past, past))
+        self.assertIsNotNone(cache.lookup(keys[0], 1))
+        cache.put(keys[2], b"c" * 100)
+
+        self.assertIsNotNone(cache.lookup(keys[0], 1))
+        self.assertIsNone(cache.lookup(keys[1], 1))
+        self.assertIsNotNone(cache.lookup(keys[2], 1))
+
+    def test_batch_uses_cache(self):
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.temp_dir.name, f"file{i}.txt")
+            with open(path, 'wb') as f:
+                f.write(b"cached batch data %d " % i * 50)
+            paths.append(path)
+
+        async def run(cache):
+            async with BatchService('huffman', workers=1, concurrency=2, cache=cache) as service:
+                return await service.run_batch(BatchJob('compress', path, path + '.huff') for path in paths)
+
+        first = asyncio.run(run(ResultCache(self.cache_dir)))
+        outputs = {}
+        for path in paths:
+            with open(path + '.huff', 'rb') as f:
+                outputs[path] = f.read()
+            os.remove(path + '.huff')
+
+        cache = ResultCache(self.cache_dir)
+        second = asyncio.run(run(cache))
+
+        self.assertFalse(any(result.cached for result in first))
+        self.assertTrue(all(result.ok and result.cached for result in second))
+        self.assertEqual(cache.hits, 3)
+        for path in paths:
+            with open(path + '.huff', 'rb') as f:
+                self.assertEqual(f.read(), outputs[path])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Тесты для дописывания сегментов и кадров потока
+"""
+import io
+import os
+import tempfile
+import unittest
+from src.core.combined import CombinedCompressor
+from src.core.huffman import HuffmanCompressor
+from src.core.segments import (SEGMENTS_MAGIC, append_segment, decompress_segments,
+                               decompress_segments_bytes, read_segments)
+from src.core.stream import StreamCompressor
+from src.utils.console import set_quiet
+
+
+class TestSegments(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, 'logs.cmp')
+        self.parts = [
+            b"day one log line\n" * 200,
+            b"day two other entries\n" * 150,
+            bytes(range(256)) * 4,
+        ]
+
+    def _decompress_file(self):
+        with open(self.path, 'rb') as f:
+            segments = read_segments(f)
+            output = io.BytesIO()
+            decompress_segments(f, output, segments)
+        return segments, output.getvalue()
+
+    def test_append_to_single_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(CombinedCompressor().compress_bytes(self.parts[0]))
+        original_size = os.path.getsize(self.path)
+
+        append_segment(self.path, HuffmanCompressor().compress_bytes(self.parts[1]))
+        append_segment(self.path, CombinedCompressor().compress_bytes(self.parts[2]))
+
+        segments, output = self._decompress_file()
+        self.assertEqual(output, b"".join(self.parts))
+        self.assertEqual(len(segments), 3)
+        # Исходный файл не переписывается
+        self.assertEqual((segments[0].offset, segments[0].size), (0, original_size))
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        self.assertTrue(data.endswith(SEGMENTS_MAGIC))
+        self.assertEqual(decompress_segments_bytes(data), b"".join(self.parts))
+
+    def test_single_file_has_no_segments(self):
+        data = CombinedCompressor().compress_bytes(self.parts[0])
+        self.assertIsNone(read_segments(io.BytesIO(data)))
+        self.assertIsNone(decompress_segments_bytes(data))
+
+    def test_corrupted_index(self):
+        with open(self.path, 'wb') as f:
+            f.write(CombinedCompressor().compress_bytes(self.parts[0]))
+        append_segment(self.path, CombinedCompressor().compress_bytes(self.parts[1]))
+
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with self.assertRaises(ValueError):
+            read_segments(io.BytesIO(data[:10] + data[-40:]))
+
+    def test_append_stream(self):
+        with open(self.path, 'wb') as f:
+            StreamCompressor('huffman', block_size=1000).compress_stream(io.BytesIO(self.parts[0]), f)
+
+        stream = StreamCompressor('combined', block_size=1000)
+        with open(self.path, 'r+b') as f:
+            original_size, _ = stream.append_stream(io.BytesIO(self.parts[1]), f)
+        self.assertEqual(original_size, len(self.parts[1]))
+        self.assertEqual(stream.block_count, 4)
+
+        output = io.BytesIO()
+        with open(self.path, 'rb') as f:
+            StreamCompressor().decompress_stream(f, output)
+        self.assertEqual(output.getvalue(), self.parts[0] + self.parts[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Тесты для потокового формата
+"""
+import io
+import unittest
+from src.core.stream import StreamCompressor, STREAM_CHECKSUM_MAGIC
+from src.utils.format_detector import detect_format_from_header
+
+
+class TestStream(unittest.TestCase):
+    def setUp(self):
+        self.data = b"streaming block data for pipes " * 300 + bytes(range(256))
+
+    def _round_trip(self, stream, data):
+        compressed = io.BytesIO()
+        stream.compress_stream(io.BytesIO(data), compressed)
+
+        output = io.BytesIO()
+        StreamCompressor().decompress_stream(io.BytesIO(compressed.getvalue()), output)
+        return compressed.getvalue(), output.getvalue()
+
+    def test_round_trip(self):
+        for algorithm in ['huffman', 'lz77', 'rle', 'combined']:
+            with self.subTest(algorithm=algorithm):
+                stream = StreamCompressor(algorithm, block_size=1000)
+                compressed, output = self._round_trip(stream, self.data)
+                self.assertEqual(output, self.data)
+                self.assertEqual(stream.block_count, 10)
+                self.assertEqual(detect_format_from_header(compressed[:8]), 'stream')
+
+    def test_empty_stream(self):
+        compressed, output = self._round_trip(StreamCompressor('huffman'), b"")
+        self.assertEqual(output, b"")
+        self.assertTrue(compressed.startswith(STREAM_CHECKSUM_MAGIC))
+
+    def test_data_after_end_of_stream(self):
+        compressed, _ = self._round_trip(StreamCompressor('huffman', block_size=1000), self.data)
+        for suffix in (b"garbage", compressed):
+            with self.subTest(suffix=suffix[:7]):
+                with self.assertRaisesRegex(ValueError, "после конца потока"):
+                    StreamCompressor().decompress_stream(io.BytesIO(compressed + suffix), io.BytesIO())
+                with self.assertRaisesRegex(ValueError, "после конца потока"):
+                    StreamCompressor().verify(io.BytesIO(compressed + suffix))
+
+    def test_blocks_written_before_end_of_input(self):
+        compressed = io.BytesIO()
+        StreamCompressor('huffman', block_size=1000).compress_stream(io.BytesIO(self.data), compressed)
+
+        # Обрезанный поток: первые блоки уже выданы, затем ошибка
+        output = io.BytesIO()
+        with self.assertRaises(ValueError):
+            StreamCompressor().decompress_stream(io.BytesIO(compressed.getvalue()[:-100]), output)
+        self.assertGreater(len(output.getvalue()), 0)
+        self.assertTrue(self.data.startswith(output.getvalue()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Тесты для кэша таблиц Хаффмана
+"""
+import unittest
+from src.core.huffman import HuffmanCompressor, TABLE_CACHE
+from src.utils.lru_cache import LRUCache, cache_stats
+from src.utils.profiler import Profiler
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_eviction_order(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class TestHuffmanTableCache(unittest.TestCase):
+    def setUp(self):
+        TABLE_CACHE.clear()
+        self.compressor = HuffmanCompressor()
+        self.test_data = b"this is an example for huffman encoding" * 10
+
+    def test_repeated_decompress_hits_cache(self):
+        compressed = self.compressor.compress_bytes(self.test_data)
+        misses = TABLE_CACHE.misses
+
+        for _ in range(3):
+            self.assertEqual(self.test_data, HuffmanCompressor().decompress_bytes(compressed))
+
+        self.assertEqual(TABLE_CACHE.misses, misses)
+        self.assertEqual(TABLE_CACHE.hits, 3)
+
+    def test_counters_reported(self):
+        compressed = self.compressor.compress_bytes(self.test_data)
+        HuffmanCompressor().decompress_bytes(compressed)
+        stats = cache_stats()['huffman.tables']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+        profiler = Profiler()
+        profiler.enable()
+        self.assertIn('huffman.tables', profiler.report())
+
+    def test_cached_table_matches_fresh_build(self):
+        frequency = self.compressor.build_frequency_table(self.test_data)
+        self.compressor.load_table(frequency)
+        cached_codes = HuffmanCompressor()
+        cached_codes.load_table(frequency)
+
+        fresh = HuffmanCompressor()
+        fresh.build_codes(fresh.build_huffman_tree(frequency))
+        self.assertEqual(fresh.codes, cached_codes.codes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Тесты для повтора таблицы Хаффмана предыдущего блока
+"""
+import io
+import unittest
+from src.core.huffman import HuffmanCompressor, VERSION_REPEAT, VERSION_REUSABLE
+from src.core.stream import StreamCompressor
+from src.utils.console import set_quiet
+
+
+class TestTableReuse(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.blocks = [b"".join(f"{i},user{i % 97},value{i * 31 % 1000}\n".encode() for i in range(start, start + 150))
+                       for start in range(0, 600, 150)]
+
+    def _round_trip(self, blocks):
+        encoder = HuffmanCompressor(reuse_tables=True)
+        compressed = [encoder.compress_bytes(block) for block in blocks]
+        decoder = HuffmanCompressor()
+        self.assertEqual([decoder.decompress_bytes(data) for data in compressed], blocks)
+        return compressed
+
+    def test_similar_blocks_repeat_table(self):
+        compressed = self._round_trip(self.blocks)
+        self.assertEqual(compressed[0][7:8], VERSION_REUSABLE)
+        self.assertTrue(all(data[7:8] == VERSION_REPEAT for data in compressed[1:]))
+        self.assertLess(len(compressed[1]), len(HuffmanCompressor().compress_bytes(self.blocks[1])))
+
+    def test_new_symbols_need_new_table(self):
+        compressed = self._round_trip([self.blocks[0], bytes(range(256)) * 4, self.blocks[1]])
+        self.assertEqual([data[7:8] for data in compressed], [VERSION_REUSABLE] * 3)
+
+    def test_repeat_without_previous_table(self):
+        encoder = HuffmanCompressor(reuse_tables=True)
+        encoder.compress_bytes(self.blocks[0])
+        with self.assertRaisesRegex(ValueError, "предыдущего блока"):
+            HuffmanCompressor().decompress_bytes(encoder.compress_bytes(self.blocks[1]))
+        with self.assertRaises(ValueError):
+            HuffmanCompressor(streams=4, reuse_tables=True)
+
+    def test_stream_frames_repeat_table(self):
+        data = b"".join(self.blocks) * 4
+        stream = StreamCompressor('huffman', block_size=4096)
+        first, second = io.BytesIO(), io.BytesIO()
+        stream.compress_stream(io.BytesIO(data), first)
+        # Второй поток того же экземпляра не ссылается на таблицы первого
+        stream.compress_stream(io.BytesIO(data), second)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertGreater(first.getvalue().count(b"HUFFMAN" + VERSION_REPEAT), 0)
+
+        decoder = StreamCompressor()
+        for compressed in (first, second):
+            output = io.BytesIO()
+            decoder.decompress_stream(io.BytesIO(compressed.getvalue()), output)
+            self.assertEqual(output.getvalue(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Тесты для копирования несжатых данных без прохода через Python
+"""
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from src.core.archive import ArchiveCompressor
+from src.core.combined import CombinedCompressor
+from src.core.stream import StreamCompressor
+from src.models.archive_models import StoredRange
+from src.utils import zero_copy
+from src.utils.console import set_quiet
+
+
+class TestZeroCopy(unittest.TestCase):
+    def setUp(self):
+        set_quiet(True)
+        self.addCleanup(set_quiet, False)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        # Детерминированные случайные данные - несжимаемы
+        self.data = random.Random(40).randbytes(1 << 21)
+
+    def _path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def _write(self, name, data):
+        with open(self._path(name), 'wb') as f:
+            f.write(data)
+        return self._path(name)
+
+    def _read(self, name):
+        with open(self._path(name), 'rb') as f:
+            return f.read()
+
+    def test_copy_range_between_files(self):
+        source = self._write('source.bin', self.data)
+        with open(source, 'rb') as in_f, open(self._path('copy.bin'), 'wb') as out_f:
+            out_f.write(b"header")
+            zero_copy.copy_range(in_f, out_f, 100, 5000)
+            out_f.write(b"tail")
+            self.assertEqual(in_f.tell(), 0)
+
+        self.assertEqual(self._read('copy.bin'), b"header" + self.data[100:5100] + b"tail")
+
+    def test_copy_range_fallback(self):
+        in_f = io.BytesIO(self.data)
+        in_f.seek(7)
+        out_f = io.BytesIO()
+        zero_copy.copy_range(in_f, out_f, 10, zero_copy.COPY_CHUNK_SIZE + 10)
+
+        self.assertEqual(out_f.getvalue(), self.data[10:zero_copy.COPY_CHUNK_SIZE + 20])
+        self.assertEqual(in_f.tell(), 7)
+
+    def test_copy_range_truncated_input(self):
+        source = self._write('source.bin', self.data[:1000])
+        with open(source, 'rb') as in_f, open(self._path('copy.bin'), 'wb') as out_f:
+            with self.assertRaises(ValueError):
+                zero_copy.copy_range(in_f, out_f, 500, 1000)
+
+    def test_combined_stores_without_reading(self):
+        source = self._write('random.bin', self.data)
+        compressor = CombinedCompressor()
+        # Несжимаемый файл определяется по выборке и не сжимается целиком
+        with mock.patch.object(CombinedCompressor, 'compress_bytes') as compress_bytes:
+            compressor.compress(source, self._path('random.cmp'))
+        compress_bytes.assert_not_called()
+
+        compressed = self._read('random.cmp')
+        self.assertTrue(compressed.startswith(CombinedCompressor.STORED_MAGIC))
+        self.assertEqual(len(compressed), len(self.data) + CombinedCompressor.STORED_HEADER_SIZE)
+        self.assertEqual(compressor.decompress_bytes(compressed), self.data)
+
+        compressor.decompress(self._path('random.cmp'), self._path('random.out'))
+        self.assertEqual(self._read('random.out'), self.data)
+
+    def test_stream_stored_blocks(self):
+        compressed = io.BytesIO()
+        StreamCompressor('combined', block_size=1 << 18).compress_stream(io.BytesIO(self.data), compressed)
+        source = self._write('random.stream', compressed.getvalue())
+
+        with open(source, 'rb') as in_f, open(self._path('random.out'), 'wb') as out_f:
+            StreamCompressor().decompress_stream(in_f, out_f)
+        self.assertEqual(self._read('random.out'), self.data)
+
+    def test_archive_stored_blocks(self):
+        input_dir = self._path('input')
+        os.makedirs(os.path.join(input_dir, 'sub'))
+        files = {
+            'random.bin': self.data[:300000],
+            'sub/other.bin': self.data[300000:310000],
+            'text.txt': b"compressible line\n" * 2000,
+        }
+        for path, data in files.items():
+            with open(os.path.join(input_dir, path), 'wb') as f:
+                f.write(data)
+
+        archiver = ArchiveCompressor(block_size=1 << 16, workers=1)
+        archiver.pack(input_dir, self._path('data.arc'))
+
+        with open(self._path('data.arc'), 'rb') as f:
+            blocks, _, _, _ = archiver.read_index(f)
+            stored = [archiver._read_block(f, block) for block in blocks]
+        self.assertTrue(any(isinstance(block, StoredRange) for block in stored))
+
+        archiver.unpack(self._path('data.arc'), self._path('output'))
+        for path, data in files.items():
+            with open(os.path.join(self._path('output'), path), 'rb') as f:
+                self.assertEqual(f.read(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()